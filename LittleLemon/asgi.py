@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LittleLemon.settings')
 
 application = get_asgi_application()
+
+# Build what the first requests would otherwise pay for (see LittleLemonAPI.warmup).
+from LittleLemonAPI.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -10,8 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
+import django
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,6 +35,13 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# Serving profile. 'full' serves the admin and the browsable API next to the
+# API; 'api' (LITTLELEMON_PROFILE=api) is for API-only workers: no admin,
+# messages or static files apps, no browser middleware, JSON rendering only.
+SERVING_PROFILE = os.environ.get('LITTLELEMON_PROFILE', 'full')
+if SERVING_PROFILE not in ('full', 'api'):
+    raise ImproperlyConfigured(f'Unknown LITTLELEMON_PROFILE {SERVING_PROFILE!r}')
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -44,14 +56,34 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'LittleLemonAPI.instrumentation.InstrumentationMiddleware',
+    'LittleLemonAPI.admission.AdmissionMiddleware',
+    'LittleLemonAPI.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'LittleLemonAPI.browser.BrowserMiddleware',
+]
+
+# Run by LittleLemonAPI.browser.BrowserMiddleware, except for the token
+# authenticated routes below.
+BROWSER_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+BROWSER_MIDDLEWARE_EXEMPT_PATHS = ('/api/', '/auth/')
+
+# The admin checks look for these in MIDDLEWARE; BrowserMiddleware runs them.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+if SERVING_PROFILE == 'api':
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in ('django.contrib.admin', 'django.contrib.messages', 'django.contrib.staticfiles')
+    ]
+    MIDDLEWARE.remove('LittleLemonAPI.browser.BrowserMiddleware')
 
 ROOT_URLCONF = 'LittleLemon.urls'
 
@@ -76,12 +108,125 @@ WSGI_APPLICATION = 'LittleLemon.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+#
+# LITTLELEMON_DB_PROFILE picks the database profile:
+#   sqlite   - the local db.sqlite3 file (or LITTLELEMON_SQLITE_PATH) tuned
+#              for concurrent access (default)
+#   postgres - PostgreSQL with pooled, health-checked connections, configured
+#              through the POSTGRES_* environment variables
+
+DATABASE_PROFILE = os.environ.get('LITTLELEMON_DB_PROFILE', 'sqlite')
+
+if DATABASE_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('LITTLELEMON_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Seconds to wait for the write lock before "database is locked".
+                'timeout': 20,
+            },
+        }
     }
+    if django.VERSION >= (5, 1):
+        # Take the write lock when a transaction starts rather than when it
+        # first writes, so concurrent checkouts queue instead of deadlocking.
+        DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+elif DATABASE_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'littlelemon'),
+            'USER': os.environ.get('POSTGRES_USER', 'littlelemon'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if django.VERSION >= (5, 1):
+        # Native psycopg pool (needs psycopg[pool]); pooled connections can't
+        # also be persistent.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 20)),
+            'timeout': int(os.environ.get('POSTGRES_POOL_TIMEOUT', 10)),
+        }
+else:
+    raise ImproperlyConfigured(f'Unknown LITTLELEMON_DB_PROFILE {DATABASE_PROFILE!r}')
+
+# Read replicas (LittleLemonAPI.replicas), comma-separated in
+# LITTLELEMON_DB_REPLICAS: SQLite file paths for the sqlite profile (copies
+# refreshed with `manage.py sync_replicas`), hosts for postgres. Each becomes
+# an alias replica1, replica2, ...; tests read them through the primary.
+DATABASE_REPLICAS = []
+for number, location in enumerate(filter(None, os.environ.get('LITTLELEMON_DB_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = dict(DATABASES['default'], OPTIONS=dict(DATABASES['default']['OPTIONS']), TEST={'MIRROR': 'default'})
+    DATABASES[alias]['NAME' if DATABASE_PROFILE == 'sqlite' else 'HOST'] = location.strip()
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['LittleLemonAPI.replicas.ReplicaRouter']
+
+# Seconds a client reads from the primary after writing; how far (seconds) a
+# PostgreSQL replica may lag before it is skipped; how long a replica health
+# check is trusted.
+REPLICA_STICKY_SECONDS = 10
+REPLICA_MAX_LAG = 5
+REPLICA_HEALTH_INTERVAL = 5
+
+# Models always read from the primary: what authentication and role checks
+# read, which must reflect a login or group change on the very next request.
+REPLICA_PRIMARY_MODELS = ['authtoken.token', 'auth.user', 'auth.group', 'auth.user_groups']
+
+# Cache shared by every process serving the app: the catalog and per-user
+# response versions, role and token generations, replica stickiness and
+# (optionally) throttle buckets live here, so a process-local cache would let
+# workers serve stale responses and authorization.
+#
+# LITTLELEMON_CACHE selects a shared server, as production needs:
+#   redis://host:6379/0 (also rediss://, unix://) - Redis (needs redis)
+#   memcached://host:11211[,host:11211]          - Memcached (needs pymemcache)
+# Anything else is a directory for a small file-based cache that stands in for
+# development (by default in the temp directory): every write lists the
+# directory, and culling at MAX_ENTRIES drops keys at random, versions
+# included. `manage.py check --deploy` rejects it (LittleLemonAPI.checks).
+CACHE_LOCATION = os.environ.get('LITTLELEMON_CACHE', '')
+if CACHE_LOCATION.startswith(('redis://', 'rediss://', 'unix://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_LOCATION,
+        }
+    }
+elif CACHE_LOCATION.startswith('memcached://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': CACHE_LOCATION[len('memcached://'):].split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_LOCATION or os.path.join(tempfile.gettempdir(), 'littlelemon-cache'),
+            'OPTIONS': {'MAX_ENTRIES': 1000},
+        }
+    }
+
+# Applied to every new SQLite connection by LittleLemonAPI.db.configure_sqlite
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 20000,
+    'temp_store': 'MEMORY',
 }
 
 
@@ -128,8 +273,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'LittleLemonAPI.authentication.CachedTokenAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'LittleLemonAPI.renderers.FastJSONRenderer',
+    ) if SERVING_PROFILE == 'api' else (
+        'LittleLemonAPI.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # Token buckets of LittleLemonAPI.throttling, per user and throttle_scope:
+    # N/period allows bursts of N writes, refilled at N per period.
+    'DEFAULT_THROTTLE_RATES': {
+        'cart': '60/min',
+        'checkout': '10/min',
+    },
     # 'DEFAULT_PERMISSION_CLASSES': [
     #     'rest_framework.permissions.IsAuthenticated',
     # ]
@@ -137,4 +294,78 @@ REST_FRAMEWORK = {
 
 DJOSER = {
     "USER_ID_FIELD": 'username',
-}
\ No newline at end of file
+}
+
+# Group-membership cache used by LittleLemonAPI.roles; entries are checked
+# against a per-user generation in CACHES on every use.
+ROLE_CACHE_TTL = 300
+ROLE_CACHE_MAX_ENTRIES = 10000
+
+# Pre-serialized menu/category responses held by LittleLemonAPI.catalog
+CATALOG_CACHE_TTL = 3600
+CATALOG_CACHE_MAX_ENTRIES = 512
+
+# Full-text menu search (LittleLemonAPI.search): how similar a misspelled word
+# must be to an indexed term (0-1, difflib ratio) to match it.
+SEARCH_TYPO_CUTOFF = 0.75
+
+# Per-user cart/order responses held by LittleLemonAPI.usercache
+USER_CACHE_TTL = 300
+USER_CACHE_MAX_ENTRIES = 10000
+
+# Per-route latency samples kept by LittleLemonAPI.instrumentation, and whether
+# exceeding a view's query_budget raises instead of logging a warning.
+INSTRUMENTATION_SAMPLES = 1000
+QUERY_BUDGET_STRICT = False
+
+# Where throttle buckets live: 'local' (per process) or 'cache' (the default
+# Django cache, shared by workers when it is). How long an idle local bucket is
+# kept, and at most how many.
+THROTTLE_BACKEND = os.environ.get('LITTLELEMON_THROTTLE_BACKEND', 'local')
+THROTTLE_BUCKET_TTL = 3600
+THROTTLE_MAX_ENTRIES = 10000
+
+# Admission control for API writes (LittleLemonAPI.admission): writes run at
+# once per process, writes waiting for a slot and for how long (seconds), the
+# average write SQL time (ms) above which writes are shed, its half-life
+# (seconds) while no writes finish, and the Retry-After sent with a 503.
+ADMISSION_PATHS = ('/api/',)
+ADMISSION_MAX_CONCURRENT = 16
+ADMISSION_MAX_QUEUE = 64
+ADMISSION_QUEUE_TIMEOUT = 2.0
+ADMISSION_MAX_DB_MS = 500
+ADMISSION_DB_HALF_LIFE = 5.0
+ADMISSION_RETRY_AFTER = 1
+
+# Token -> user cache in front of TokenAuthentication (LittleLemonAPI.authentication).
+# Each hit is checked against a per-user generation in the shared cache, so
+# logouts, user edits and group changes reach every worker at once.
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_MAX_ENTRIES = 10000
+
+# Background jobs (LittleLemonAPI.jobs). With JOBS_EAGER, jobs run in the
+# enqueueing process right after its transaction commits, so no runjobs
+# worker is needed during development.
+JOBS_EAGER = False
+JOBS_MAX_ATTEMPTS = 5
+JOBS_LOCK_TIMEOUT = 300
+
+# Order archival (LittleLemonAPI.archive, `manage.py archive_orders`): age in
+# days after which delivered orders leave the live tables, and orders moved per
+# transaction.
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 500
+
+# Server-sent order events (LittleLemonAPI.events): seconds between keepalive
+# comments on idle streams, events buffered per client before it is
+# disconnected as too slow, seconds between polls for events recorded by other
+# processes, and seconds recorded events are kept.
+ORDER_STREAM_HEARTBEAT = 15
+ORDER_STREAM_QUEUE_SIZE = 100
+ORDER_STREAM_POLL_INTERVAL = 1.0
+ORDER_EVENT_RETENTION = 3600
+
+# Have wsgi.py/asgi.py build the URL resolvers, model metadata and serializer
+# fields when a worker starts instead of on its first requests
+# (LittleLemonAPI.warmup). LITTLELEMON_WARM_UP=0 turns it off.
+WARM_UP_ON_START = os.environ.get('LITTLELEMON_WARM_UP', '1') != '0'
@@ -0,0 +1,158 @@
+"""
+Admission control for API writes: past a point, queueing more writes only
+makes every one of them slower, so AdmissionMiddleware turns the excess away
+with 503 and Retry-After instead.
+
+At most ADMISSION_MAX_CONCURRENT writes run at once per process. Up to
+ADMISSION_MAX_QUEUE more wait, each for at most ADMISSION_QUEUE_TIMEOUT
+seconds; beyond that they are shed. Writes are also shed while the database is
+slow: when the SQL time of recent writes (a moving average that decays towards
+zero over ADMISSION_DB_HALF_LIFE seconds without writes) exceeds
+ADMISSION_MAX_DB_MS, typically because they queue for the SQLite write lock.
+
+Reads, and anything outside ADMISSION_PATHS, are always admitted. Shed
+requests are counted in instrumentation.counters as shed:<reason>.
+"""
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+
+from .instrumentation import _current_counter, counters
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ConcurrencyGate:
+    def __init__(self, max_concurrent, max_queue):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def try_acquire(self):
+        with self._condition:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                return True
+            return False
+
+    def acquire(self, timeout):
+        """None once a slot is held, else the reason the request is shed."""
+        with self._condition:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                return None
+            if self.waiting >= self.max_queue:
+                return 'queue-full'
+            self.waiting += 1
+            try:
+                if not self._condition.wait_for(lambda: self.active < self.max_concurrent, timeout):
+                    return 'queue-timeout'
+                self.active += 1
+                return None
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+
+class DatabaseLoad:
+    """Exponentially weighted average of writes' SQL time, decaying while no writes finish."""
+
+    def __init__(self, half_life, weight=0.2):
+        self.half_life = half_life
+        self.weight = weight
+        self._value = 0.0
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decayed(self, now):
+        return self._value * 0.5 ** ((now - self._stamp) / self.half_life)
+
+    def observe(self, db_ms):
+        with self._lock:
+            now = time.monotonic()
+            self._value = self._decayed(now) * (1 - self.weight) + db_ms * self.weight
+            self._stamp = now
+
+    def current(self):
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+
+class AdmissionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.paths = tuple(getattr(settings, 'ADMISSION_PATHS', ('/api/',)))
+        self.queue_timeout = getattr(settings, 'ADMISSION_QUEUE_TIMEOUT', 2.0)
+        self.max_db_ms = getattr(settings, 'ADMISSION_MAX_DB_MS', 500)
+        self.retry_after = getattr(settings, 'ADMISSION_RETRY_AFTER', 1)
+        self.gate = ConcurrencyGate(
+            getattr(settings, 'ADMISSION_MAX_CONCURRENT', 16),
+            getattr(settings, 'ADMISSION_MAX_QUEUE', 64),
+        )
+        self.load = DatabaseLoad(getattr(settings, 'ADMISSION_DB_HALF_LIFE', 5.0))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.applies(request):
+            return self.get_response(request)
+        reason = self.check_load() or self.gate.acquire(self.queue_timeout)
+        if reason:
+            return self.shed(reason)
+        try:
+            before = self.db_seconds()
+            response = self.get_response(request)
+            self.load.observe((self.db_seconds() - before) * 1000)
+            return response
+        finally:
+            self.gate.release()
+
+    async def __acall__(self, request):
+        if not self.applies(request):
+            return await self.get_response(request)
+        reason = self.check_load()
+        if not reason and not self.gate.try_acquire():
+            # Wait on a thread of its own, not the one shared by sync views.
+            reason = await sync_to_async(self.gate.acquire, thread_sensitive=False)(self.queue_timeout)
+        if reason:
+            return self.shed(reason)
+        try:
+            before = self.db_seconds()
+            response = await self.get_response(request)
+            self.load.observe((self.db_seconds() - before) * 1000)
+            return response
+        finally:
+            self.gate.release()
+
+    def applies(self, request):
+        return request.method not in SAFE_METHODS and request.path_info.startswith(self.paths)
+
+    def check_load(self):
+        if self.load.current() > self.max_db_ms:
+            return 'database-slow'
+        return None
+
+    def db_seconds(self):
+        # SQL time so far, from the counter InstrumentationMiddleware started.
+        counter = _current_counter.get()
+        return counter.duration if counter else 0.0
+
+    def shed(self, reason):
+        counters.increment(f'shed:{reason}')
+        response = JsonResponse({'error': 'Server busy, retry later'}, status=503)
+        response['Retry-After'] = str(self.retry_after)
+        return response
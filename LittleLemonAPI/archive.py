@@ -0,0 +1,44 @@
+"""
+Moves delivered orders older than ARCHIVE_AFTER_DAYS from Order/OrderItem to
+ArchivedOrder/ArchivedOrderItem, so the live tables (and the indexes every
+order query walks) hold only recent and open orders however old the shop is.
+Archived history is served by the /api/orders/archive endpoints.
+
+Orders move in batches of ARCHIVE_BATCH_SIZE, one transaction each, so
+checkouts are held up by at most one batch and an interrupted run loses
+nothing: every order is either live or archived.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from . import usercache
+from .models import ArchivedOrder, Order
+
+
+def cutoff(days=None):
+    """Orders dated before this are old enough to archive."""
+    if days is None:
+        days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 90)
+    return timezone.localdate() - timedelta(days=days)
+
+
+def archive_batch(before, batch_size=None):
+    """Archive up to `batch_size` delivered orders dated before `before`, oldest first. Returns how many were moved."""
+    if batch_size is None:
+        batch_size = getattr(settings, 'ARCHIVE_BATCH_SIZE', 500)
+    using = router.db_for_write(Order)
+    with transaction.atomic(using=using):
+        # Seeks the (date, id) index; the few undelivered old orders are
+        # filtered out on the way.
+        candidates = Order.objects.using(using).filter(date__lt=before, status=True).order_by('date', 'id')
+        if connections[using].features.has_select_for_update_skip_locked:
+            # Leave orders a request is updating for the next run.
+            candidates = candidates.select_for_update(skip_locked=True)
+        rows = list(candidates.values_list('id', 'user_id')[:batch_size])
+        moved = ArchivedOrder.objects.archive([order_id for order_id, _ in rows])
+        for user_id in {user_id for _, user_id in rows}:
+            usercache.bump(user_id)
+    return moved
@@ -0,0 +1,214 @@
+"""
+Async (ASGI-native) variants of the read-heavy endpoints, routed under
+/api/async/. They return the same JSON as their DRF counterparts in views.py
+but never leave the event loop except for the ORM calls themselves, so a
+single ASGI worker can hold many slow clients without tying up a thread each.
+"""
+import asyncio
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound, ValidationError
+from rest_framework.request import Request
+
+from . import catalog, events, usercache
+from .authentication import aauthenticate_credentials
+from .filters import FieldFilterBackend, StableOrderingFilter
+from .models import Cart, MenuItem, Order, OrderItem
+from .pagination import AsyncPagination, OrderCursorPagination
+from .renderers import FastJSONRenderer, dumps
+from .roles import DELIVERY_CREW, MANAGER, ahas_role, set_request_roles
+from .serializers import CartSerializer, MenuItemSerializer, OrderSerializer, OrderWithItemsSerializer, values_for
+from .views import MenuItemView, OrderView
+
+
+async def authenticate(request):
+    """Async equivalent of CachedTokenAuthentication."""
+    auth = request.headers.get('Authorization', '').split()
+    if not auth or auth[0].lower() != 'token':
+        return AnonymousUser()
+    if len(auth) != 2:
+        raise AuthenticationFailed('Invalid token header.')
+    user, group_names = await aauthenticate_credentials(auth[1])
+    set_request_roles(request, group_names)
+    return user
+
+
+class AsyncAPIView(View):
+    """
+    The parts of DRF's APIView the read endpoints need: token authentication,
+    filter backends, DRF-style error bodies and JSON rendering.
+    """
+    http_method_names = ['get', 'head', 'options']
+    authentication_required = False
+    filter_backends = ()
+    renderer = FastJSONRenderer()
+
+    async def dispatch(self, request, *args, **kwargs):
+        # DRF's Request gives the filter backends query_params and friends.
+        self.request = Request(request)
+        try:
+            request.user = await authenticate(request)
+            if self.authentication_required and not request.user.is_authenticated:
+                raise NotAuthenticated()
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(exc)
+        except Http404 as exc:
+            # As DRF does: the message of the Http404 becomes the detail.
+            return self.handle_exception(NotFound(*exc.args))
+
+    def handle_exception(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status=exc.status_code)
+        if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+            response['WWW-Authenticate'] = 'Token'
+        return response
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(self.renderer.render(data), status=status, content_type='application/json')
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def afilter_queryset(self, queryset):
+        """filter_queryset() for backends that may need the database while building the filter."""
+        for backend in self.filter_backends:
+            backend = backend()
+            if hasattr(backend, 'afilter_queryset'):
+                queryset = await backend.afilter_queryset(self.request, queryset, self)
+            else:
+                queryset = backend.filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def list_body(self, queryset, serializer_class):
+        """Render one page of `queryset`; flat serializers are built from .values() rows."""
+        paginator = AsyncPagination()
+        queryset = await self.afilter_queryset(queryset)
+        if serializer_class is OrderWithItemsSerializer:
+            page = await paginator.apaginate_queryset(queryset, self.request)
+            data = serializer_class(page, many=True).data
+        else:
+            data = await paginator.apaginate_queryset(values_for(serializer_class, queryset), self.request)
+        return self.renderer.render(paginator.get_paginated_data(data))
+
+
+class MenuItemListView(AsyncAPIView):
+    filter_backends = MenuItemView.filter_backends
+    filter_fields = MenuItemView.filter_fields
+    search_fields = MenuItemView.search_fields
+    ordering_fields = MenuItemView.ordering_fields
+    ordering = MenuItemView.ordering
+
+    async def get(self, request):
+        return await catalog.acached_response(
+            request, 'async-menu-items', lambda: self.list_body(MenuItem.objects.all(), MenuItemSerializer),
+        )
+
+
+class MenuItemDetailView(AsyncAPIView):
+    filter_backends = (FieldFilterBackend,)
+    filter_fields = MenuItemView.filter_fields
+
+    async def get(self, request, pk):
+        try:
+            item = await self.filter_queryset(MenuItem.objects.all()).aget(pk=pk)
+        except MenuItem.DoesNotExist:
+            # get_object_or_404()'s message, which the sync view returns.
+            raise Http404(f'No {MenuItem._meta.object_name} matches the given query.')
+        return self.render(MenuItemSerializer(item).data)
+
+
+class CartListView(AsyncAPIView):
+    authentication_required = True
+
+    async def get(self, request):
+        queryset = values_for(CartSerializer, Cart.objects.filter(user=request.user).order_by('id'))
+
+        async def build():
+            return self.renderer.render([row async for row in queryset])
+
+        return await usercache.acached_response(request, request.user.pk, 'async-cart', build)
+
+
+class OrderListView(AsyncAPIView):
+    """Async GET /api/orders, with the same role scoping, filters, ?expand=items and ?cursor= support."""
+    authentication_required = True
+    filter_backends = (FieldFilterBackend, StableOrderingFilter)
+    filter_fields = OrderView.filter_fields
+    ordering_fields = OrderView.ordering_fields
+    ordering = OrderView.ordering
+
+    async def get_queryset(self, request):
+        queryset = Order.objects.all()
+        if self.request.query_params.get('expand') == 'items':
+            queryset = queryset.prefetch_related(Prefetch('orderitem_set', queryset=OrderItem.objects.order_by('id')))
+        if await ahas_role(request, MANAGER):
+            return queryset
+        if await ahas_role(request, DELIVERY_CREW):
+            return queryset.filter(delivery_crew=request.user)
+        return queryset.filter(user=request.user)
+
+    async def get(self, request):
+        queryset = await self.get_queryset(request)
+        serializer_class = OrderWithItemsSerializer if self.request.query_params.get('expand') == 'items' else OrderSerializer
+        if OrderCursorPagination.cursor_query_param in self.request.query_params:
+            paginator = OrderCursorPagination()
+            queryset = self.filter_queryset(queryset)
+            if serializer_class is OrderSerializer:
+                queryset = values_for(serializer_class, queryset)
+            rows = [row async for row in paginator.page_queryset(queryset, self.request)]
+            page = paginator.finish_page(rows)
+            data = page if serializer_class is OrderSerializer else serializer_class(page, many=True).data
+            return self.render(paginator.get_paginated_data(data))
+        return HttpResponse(await self.list_body(queryset, serializer_class), content_type='application/json')
+
+
+class OrderStreamView(AsyncAPIView):
+    """
+    Server-sent events for order status and delivery crew changes, for clients
+    that would otherwise poll /api/orders. Managers receive every order,
+    everyone else the orders they placed or deliver; ?order=<id> follows one
+    order. Idle streams get a comment line every ORDER_STREAM_HEARTBEAT
+    seconds so proxies keep them open.
+    """
+    authentication_required = True
+
+    async def get(self, request):
+        order_id = self.request.query_params.get('order')
+        if order_id is not None:
+            try:
+                order_id = int(order_id)
+            except ValueError:
+                raise ValidationError({'order': ['A valid integer is required.']})
+        everything = await ahas_role(request, MANAGER)
+        response = StreamingHttpResponse(self.stream(request.user.pk, everything, order_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, user_id, everything, order_id):
+        heartbeat = getattr(settings, 'ORDER_STREAM_HEARTBEAT', 15)
+        # Subscribe inside the generator so the subscription's lifetime is
+        # exactly the stream's: the finally runs when the client disconnects.
+        subscriber = events.broker.subscribe(events.Subscriber(user_id, everything=everything, order_id=order_id))
+        try:
+            yield b'retry: 3000\n\n'
+            while not subscriber.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
+                    continue
+                yield b'id: %d\nevent: %s\ndata: %s\n\n' % (event['seq'], event['type'].encode(), dumps(event))
+            # Too slow to keep up: tell the client to reload before reconnecting.
+            yield b'event: reset\ndata: {}\n\n'
+        finally:
+            events.broker.unsubscribe(subscriber)
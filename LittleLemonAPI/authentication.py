@@ -0,0 +1,114 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import roles
+from .caching import TTLCache
+
+# token key -> (generation, user, token, group names). An entry is only used
+# while its user's generation in the Django cache (shared by every worker) is
+# still the one it was loaded under.
+_token_cache = TTLCache(
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60),
+    max_entries=getattr(settings, 'TOKEN_CACHE_MAX_ENTRIES', 10000),
+)
+
+
+def generation_key(user_id):
+    return f'littlelemon:token-generation:{user_id}'
+
+
+def invalidate_user_tokens(*user_ids):
+    """Forget every cached token of the users (logout, password or group change), in every worker, now and again once the current transaction commits."""
+    if not user_ids:
+        return
+    user_ids = frozenset(user_ids)
+    forget_user_tokens(user_ids)
+    # Until the commit, a concurrent request can still load and cache the old
+    # user.
+    transaction.on_commit(lambda: forget_user_tokens(user_ids))
+
+
+def forget_user_tokens(user_ids):
+    _token_cache.delete_where(lambda entry: entry[1].pk in user_ids)
+    # Other workers drop their entries on their next hit.
+    cache.set_many({generation_key(user_id): time.time_ns() for user_id in user_ids}, timeout=None)
+
+
+def _remember(key, generation, user, token, group_names):
+    _token_cache.set(key, (generation, user, token, group_names))
+
+
+def _unpack(entry):
+    _, user, token, group_names = entry
+    # Each request gets its own copy so per-request attributes never leak
+    # between concurrent requests sharing the cached instance.
+    return copy.copy(user), token, group_names
+
+
+def _from_cache(key):
+    entry = _token_cache.get(key)
+    if entry is None or cache.get(generation_key(entry[1].pk)) != entry[0]:
+        return None
+    return _unpack(entry)
+
+
+async def _afrom_cache(key):
+    entry = _token_cache.get(key)
+    if entry is None or await cache.aget(generation_key(entry[1].pk)) != entry[0]:
+        return None
+    return _unpack(entry)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication backed by a process-local LRU/TTL map of
+    token -> (user, token, group names).
+
+    On a hit the request is authenticated and its roles resolved with one
+    cache read and no database query. djoser logout, token deletion, any
+    save of the user (password changes included) and group membership
+    changes move the user's shared generation, so every worker drops its
+    entries on the next request.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            roles.set_request_roles(request, self._group_names)
+        return result
+
+    def authenticate_credentials(self, key):
+        cached = _from_cache(key)
+        if cached is not None:
+            user, token, self._group_names = cached
+            return user, token
+        user, token = super().authenticate_credentials(key)
+        generation = cache.get(generation_key(user.pk))
+        self._group_names = roles.get_user_roles(user)
+        _remember(key, generation, user, token, self._group_names)
+        return user, token
+
+
+async def aauthenticate_credentials(key):
+    """Async counterpart used by async_views; returns `(user, group names)`."""
+    cached = await _afrom_cache(key)
+    if cached is not None:
+        user, _, group_names = cached
+        return user, group_names
+    try:
+        token = await Token.objects.select_related('user').aget(key=key)
+    except Token.DoesNotExist:
+        raise AuthenticationFailed('Invalid token.')
+    if not token.user.is_active:
+        raise AuthenticationFailed('User inactive or deleted.')
+    generation = await cache.aget(generation_key(token.user_id))
+    group_names = await roles.aget_user_roles(token.user)
+    _remember(key, generation, token.user, token, group_names)
+    return copy.copy(token.user), group_names
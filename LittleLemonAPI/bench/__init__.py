@@ -0,0 +1,8 @@
+"""
+In-process benchmark harness for the LittleLemon API.
+
+Run it through ``python manage.py bench``. It builds a throwaway test
+database, fills it with realistic volumes of data (see data.py) and drives
+each route through the Django test client and the project's real WSGI and ASGI
+applications (see drivers.py).
+"""
@@ -0,0 +1,111 @@
+import datetime
+import random
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from rest_framework.authtoken.models import Token
+
+from .. import catalog, search
+from ..models import Cart, Category, MenuItem, Order, OrderItem
+from ..roles import CUSTOMER, DELIVERY_CREW, MANAGER
+
+
+STYLES = ['Classic', 'Spicy', 'Vegan', 'Truffle', 'Smoked', 'Garden', 'Double', 'Mini']
+DISHES = ['Margherita', 'Pepperoni', 'Lasagna', 'Tiramisu', 'Bruschetta', 'Risotto', 'Carbonara', 'Gelato', 'Focaccia', 'Calzone']
+
+
+@dataclass
+class Dataset:
+    categories: list = field(default_factory=list)
+    menu_items: list = field(default_factory=list)
+    customers: list = field(default_factory=list)
+    crew: list = field(default_factory=list)
+    managers: list = field(default_factory=list)
+    tokens: dict = field(default_factory=dict)
+
+    def token(self, user):
+        return self.tokens[user.pk]
+
+
+def create_users(prefix, count, group):
+    users = User.objects.bulk_create([
+        # Benchmarks authenticate with tokens; hashing real passwords would
+        # dominate the setup time.
+        User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password='!')
+        for i in range(count)
+    ])
+    if not users or users[0].pk is None:
+        users = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+    User.groups.through.objects.bulk_create([
+        User.groups.through(user_id=user.pk, group_id=group.pk) for user in users
+    ])
+    return users
+
+
+def generate(scale=1.0, seed=0):
+    """Populate the current database with a menu, users, carts and an order history sized by `scale`."""
+    rng = random.Random(seed)
+    n = lambda base: max(int(base * scale), 1)
+    groups = {name: Group.objects.get_or_create(name=name)[0] for name in (MANAGER, DELIVERY_CREW, CUSTOMER)}
+    data = Dataset()
+
+    Category.objects.bulk_create([
+        Category(slug=f'category-{i}', title=f'Category {i}') for i in range(n(20))
+    ])
+    data.categories = list(Category.objects.order_by('id'))
+    MenuItem.objects.bulk_create([
+        MenuItem(
+            title=f'{rng.choice(STYLES)} {rng.choice(DISHES)} {i}',
+            price=Decimal(rng.randint(200, 4000)) / 100,
+            featured=rng.random() < 0.1,
+            category=rng.choice(data.categories),
+        )
+        for i in range(n(2000))
+    ], batch_size=500)
+    data.menu_items = list(MenuItem.objects.order_by('id'))
+
+    data.customers = create_users('bench-customer-', n(1000), groups[CUSTOMER])
+    data.crew = create_users('bench-crew-', n(25), groups[DELIVERY_CREW])
+    data.managers = create_users('bench-manager-', max(n(3), 1), groups[MANAGER])
+    everyone = data.customers + data.crew + data.managers
+    tokens = Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in everyone])
+    data.tokens = {token.user_id: token.key for token in tokens}
+
+    today = datetime.date.today()
+    orders = Order.objects.bulk_create([
+        Order(
+            user=rng.choice(data.customers),
+            delivery_crew=rng.choice(data.crew),
+            status=rng.random() < 0.8,
+            total=Decimal('0'),
+            date=today - datetime.timedelta(days=rng.randint(0, 365)),
+        )
+        for _ in range(n(5000))
+    ], batch_size=500)
+    if not orders or orders[0].pk is None:
+        orders = list(Order.objects.order_by('id'))
+    order_items = []
+    for order in orders:
+        for item in rng.sample(data.menu_items, 3):
+            quantity = rng.randint(1, 4)
+            order_items.append(OrderItem(order=order, menuitem=item, quantity=quantity, unit_price=item.price, price=item.price * quantity))
+    OrderItem.objects.bulk_create(order_items, batch_size=1000)
+
+    # bulk_create bypasses the signals that normally keep the catalog and the
+    # search index fresh.
+    catalog.invalidate()
+    search.rebuild()
+    return data
+
+
+def fill_carts(data, users, items_per_cart=3, seed=0):
+    """Give each of `users` a fresh cart of `items_per_cart` distinct menu items."""
+    rng = random.Random(seed)
+    Cart.objects.filter(user__in=users).delete()
+    rows = []
+    for user in users:
+        for item in rng.sample(data.menu_items, items_per_cart):
+            quantity = rng.randint(1, 3)
+            rows.append(Cart(user=user, menuitem=item, quantity=quantity, unit_price=item.price, price=item.price * quantity))
+    Cart.objects.bulk_create(rows, batch_size=1000)
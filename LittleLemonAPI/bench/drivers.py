@@ -0,0 +1,143 @@
+import asyncio
+import io
+import json
+import sys
+from urllib.parse import urlsplit
+
+
+def encode_body(data):
+    return json.dumps(data).encode() if data is not None else b''
+
+
+class ClientDriver:
+    """Goes through django.test.Client, the same path the test suite uses."""
+    name = 'client'
+
+    def __init__(self):
+        # Imported here so the startup benchmark's workers can use
+        # WSGIDriver without loading the test framework.
+        from django.test import Client
+        self.client = Client()
+
+    def request(self, method, path, token=None, data=None):
+        extra = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        response = self.client.generic(method, path, encode_body(data), content_type='application/json', **extra)
+        return response.status_code, {key.lower(): value for key, value in response.items()}
+
+    def close(self):
+        pass
+
+
+class WSGIDriver:
+    """Calls the project's WSGI application directly with a hand-built environ."""
+    name = 'wsgi'
+
+    def __init__(self):
+        from LittleLemon.wsgi import application
+        self.application = application
+
+    def request(self, method, path, token=None, data=None):
+        url = urlsplit(path)
+        body = encode_body(data)
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if token:
+            environ['HTTP_AUTHORIZATION'] = f'Token {token}'
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured['status'] = int(status.split(' ', 1)[0])
+            captured['headers'] = {key.lower(): value for key, value in headers}
+
+        result = self.application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return captured['status'], captured['headers']
+
+    def close(self):
+        pass
+
+
+class ASGIDriver:
+    """Drives the project's ASGI application on a private event loop."""
+    name = 'asgi'
+
+    def __init__(self):
+        from LittleLemon.asgi import application
+        self.application = application
+        self.loop = asyncio.new_event_loop()
+
+    async def call(self, method, path, token, data):
+        url = urlsplit(path)
+        body = encode_body(data)
+        headers = [
+            (b'host', b'testserver'),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ]
+        if token:
+            headers.append((b'authorization', f'Token {token}'.encode()))
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': headers,
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        disconnected = asyncio.Event()
+        captured = {}
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            # The client stays connected until the response is complete.
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                captured['status'] = message['status']
+                captured['headers'] = {key.decode().lower(): value.decode() for key, value in message['headers']}
+
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            disconnected.set()
+        return captured['status'], captured['headers']
+
+    def request(self, method, path, token=None, data=None):
+        return self.loop.run_until_complete(self.call(method, path, token, data))
+
+    def close(self):
+        self.loop.close()
+
+
+DRIVERS = {driver.name: driver for driver in (ClientDriver, WSGIDriver, ASGIDriver)}
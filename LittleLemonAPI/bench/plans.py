@@ -0,0 +1,167 @@
+"""
+Query plan checks for the explain_queries command: replay a request to every
+route in LittleLemonAPI/urls.py, capture the SQL it runs and ask the database
+how it would execute each statement.
+
+Findings are full table scans and sorts the planner can't satisfy from an
+index (SQLite's "USE TEMP B-TREE", a PostgreSQL Sort node). Scans of small
+lookup tables are expected; a scan of orders, order items or the cart is an
+index gap.
+"""
+import json
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from .. import archive
+from ..models import ArchivedOrder, Order
+from .data import fill_carts
+from .scenarios import Call
+
+# Routes that can't be replayed as a single request/response.
+SKIPPED = {
+    'async/orders/stream': 'streams until the client disconnects',
+}
+
+NOT_EXPLAINED = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA')
+
+
+@dataclass
+class Statement:
+    sql: str
+    params: tuple
+    plan: list = field(default_factory=list)
+    findings: list = field(default_factory=list)
+
+
+def replays(data):
+    """(route, role, Call) for every route, against the data from bench.data.generate()."""
+    # Archive old orders first, as a shop that runs archive_orders would.
+    before = archive.cutoff()
+    while archive.archive_batch(before):
+        pass
+    archived = ArchivedOrder.objects.order_by('id').first()
+    order = Order.objects.filter(delivery_crew__isnull=False).order_by('id').first()
+    customer = next(user for user in data.customers if user.pk == order.user_id)
+    crew = next(user for user in data.crew if user.pk == order.delivery_crew_id)
+    manager = data.managers[0]
+    fill_carts(data, [customer])
+    item = data.menu_items[0]
+    c, w, m = data.token(customer), data.token(crew), data.token(manager)
+    return [
+        ('categories', 'anonymous', Call('GET', '/api/categories')),
+        ('menu-items', 'anonymous', Call('GET', '/api/menu-items?page=3')),
+        ('menu-items', 'anonymous', Call('GET', f'/api/menu-items?category={item.category_id}&ordering=-price')),
+        ('menu-items', 'anonymous', Call('GET', '/api/menu-items?search=marg')),
+        ('menu-items', 'manager', Call('POST', '/api/menu-items', m, {'title': 'Explained', 'price': '9.50', 'featured': False, 'category': item.category_id}, 201)),
+        ('menu-items/<int:pk>', 'anonymous', Call('GET', f'/api/menu-items/{item.pk}')),
+        ('menu-items/<int:pk>', 'manager', Call('PATCH', f'/api/menu-items/{item.pk}', m, {'price': '1.00'})),
+        ('groups/manager/users', 'manager', Call('GET', '/api/groups/manager/users', m)),
+        ('groups/manager/users', 'manager', Call('POST', '/api/groups/manager/users', m, {'username': customer.username})),
+        ('groups/manager/users/<int:userId>', 'manager', Call('DELETE', f'/api/groups/manager/users/{manager.pk}', m)),
+        ('groups/manager/users/bulk', 'manager', Call('POST', '/api/groups/manager/users/bulk', m, {'users': [customer.pk, crew.username]})),
+        ('groups/delivery-crew/users', 'manager', Call('GET', '/api/groups/delivery-crew/users', m)),
+        ('groups/delivery-crew/users', 'manager', Call('POST', '/api/groups/delivery-crew/users', m, {'userId': customer.pk}, 201)),
+        ('groups/delivery-crew/users/<int:userId>', 'manager', Call('DELETE', f'/api/groups/delivery-crew/users/{crew.pk}', m)),
+        ('groups/delivery-crew/users/bulk', 'manager', Call('DELETE', '/api/groups/delivery-crew/users/bulk', m, {'users': [crew.pk]})),
+        ('cart/menu-items', 'customer', Call('GET', '/api/cart/menu-items', c)),
+        ('cart/menu-items', 'customer', Call('POST', '/api/cart/menu-items', c, {'itemId': item.pk, 'quantity': 1}, 201)),
+        ('cart/menu-items', 'customer', Call('DELETE', '/api/cart/menu-items', c)),
+        ('cart/menu-items/batch', 'customer', Call('POST', '/api/cart/menu-items/batch', c, {'items': [{'itemId': item.pk, 'quantity': 2}]}, 201)),
+        ('orders', 'customer', Call('GET', '/api/orders', c)),
+        ('orders', 'customer', Call('GET', '/api/orders?cursor=', c)),
+        ('orders', 'delivery crew', Call('GET', '/api/orders?cursor=', w)),
+        ('orders', 'delivery crew', Call('GET', '/api/orders?status=0', w)),
+        ('orders', 'delivery crew', Call('GET', '/api/orders?cursor=&status=0', w)),
+        ('orders', 'manager', Call('GET', '/api/orders?cursor=&expand=items', m)),
+        ('orders', 'manager', Call('GET', f'/api/orders?user={customer.pk}&ordering=-date', m)),
+        ('orders', 'customer', Call('POST', '/api/orders', c, None, 201)),
+        ('orders/<int:orderId>', 'customer', Call('GET', f'/api/orders/{order.pk}', c)),
+        ('orders/<int:orderId>', 'manager', Call('PUT', f'/api/orders/{order.pk}', m, {'delivery_crew': crew.pk, 'status': True})),
+        ('orders/<int:orderId>', 'delivery crew', Call('PATCH', f'/api/orders/{order.pk}', w, {'status': True})),
+        ('orders/<int:orderId>', 'manager', Call('DELETE', f'/api/orders/{order.pk}', m)),
+        ('orders/archive', 'customer', Call('GET', '/api/orders/archive', c)),
+        ('orders/archive', 'delivery crew', Call('GET', '/api/orders/archive?cursor=', w)),
+        ('orders/archive', 'manager', Call('GET', f'/api/orders/archive?cursor=&user={archived.user_id}', m)),
+        ('orders/archive/<int:orderId>', 'manager', Call('GET', f'/api/orders/archive/{archived.pk}', m)),
+        ('reports/sales', 'manager', Call('GET', '/api/reports/sales', m)),
+        ('reports/sales', 'manager', Call('GET', '/api/reports/sales?by=menuitem', m)),
+        ('stats/requests', 'manager', Call('GET', '/api/stats/requests', m)),
+        ('stats/counters', 'manager', Call('GET', '/api/stats/counters', m)),
+        ('async/menu-items', 'anonymous', Call('GET', '/api/async/menu-items?page=3')),
+        ('async/menu-items/<int:pk>', 'anonymous', Call('GET', f'/api/async/menu-items/{item.pk}')),
+        ('async/cart/menu-items', 'customer', Call('GET', '/api/async/cart/menu-items', c)),
+        ('async/orders', 'customer', Call('GET', '/api/async/orders', c)),
+        ('async/orders', 'delivery crew', Call('GET', '/api/async/orders', w)),
+    ]
+
+
+def capture(connection, send):
+    """Run `send()` inside a transaction that is rolled back, returning its result and the statements it executed."""
+    statements = []
+
+    def record(execute, sql, params, many, context):
+        if not many and not sql.lstrip().upper().startswith(NOT_EXPLAINED):
+            statements.append(Statement(sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+
+    with transaction.atomic(using=connection.alias):
+        with connection.execute_wrapper(record):
+            result = send()
+        transaction.set_rollback(True, using=connection.alias)
+    return result, statements
+
+
+def explain(connection, statement):
+    """Fill in statement.plan (lines of text) and statement.findings."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + statement.sql, statement.params)
+            rows = cursor.fetchall()
+            depth = {0: -1}
+            subqueries = set()
+            for node, parent, _, detail in rows:
+                depth[node] = depth.get(parent, -1) + 1
+                statement.plan.append('  ' * depth[node] + detail)
+                if detail.startswith(('CO-ROUTINE ', 'MATERIALIZE ')):
+                    # Scanning a VALUES list or subquery result is expected.
+                    subqueries.add(detail.split()[1])
+                statement.findings += sqlite_findings(detail, subqueries)
+            if ' LIMIT ' in statement.sql and not any(finding.startswith('temp b-tree') for finding in statement.findings):
+                # A scan in the requested order stops at the LIMIT.
+                statement.findings = [finding for finding in statement.findings if not finding.startswith('full scan')]
+        elif connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + statement.sql, statement.params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            walk_postgresql(plan[0]['Plan'], statement, 0)
+        else:
+            statement.plan.append(f'EXPLAIN is not supported for {connection.vendor}')
+    return statement
+
+
+def sqlite_findings(detail, subqueries=()):
+    if detail.startswith('USE TEMP B-TREE'):
+        return [f'temp b-tree sort ({detail[len("USE TEMP B-TREE FOR "):].lower()})']
+    if not detail.startswith('SCAN ') or ' USING ' in detail or 'VIRTUAL TABLE' in detail or 'CONSTANT ROW' in detail:
+        return []
+    table = detail.split()[1]
+    if table in subqueries:
+        return []
+    return [f'full scan of {table}']
+
+
+def walk_postgresql(node, statement, depth):
+    label = node['Node Type']
+    if node.get('Relation Name'):
+        label += f' on {node["Relation Name"]}'
+    if node.get('Index Name'):
+        label += f' using {node["Index Name"]}'
+    statement.plan.append('  ' * depth + label)
+    if node['Node Type'] == 'Seq Scan':
+        statement.findings.append(f'full scan of {node["Relation Name"]}')
+    elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+        statement.findings.append(f'sort ({", ".join(node.get("Sort Key", []))})')
+    for child in node.get('Plans', ()):
+        walk_postgresql(child, statement, depth + 1)
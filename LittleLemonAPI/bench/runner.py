@@ -0,0 +1,108 @@
+import re
+import statistics
+import threading
+import time
+
+from django.db import connections
+
+from ..instrumentation import percentile
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def queries_from_headers(headers):
+    """Query count reported by InstrumentationMiddleware in the Server-Timing header."""
+    match = QUERIES_RE.search(headers.get('server-timing', ''))
+    return int(match.group(1)) if match else None
+
+
+class Measurements:
+    def __init__(self):
+        self.latencies = []
+        self.queries = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def record(self, latency, status, headers, call):
+        query_count = queries_from_headers(headers)
+        with self.lock:
+            self.latencies.append(latency)
+            if status != call.expect:
+                self.errors += 1
+            if query_count is not None:
+                self.queries.append(query_count)
+
+
+def issue(driver, calls, measurements):
+    for call in calls:
+        t0 = time.perf_counter()
+        status, headers = driver.request(call.method, call.path, call.token, call.data)
+        measurements.record((time.perf_counter() - t0) * 1000, status, headers, call)
+
+
+def run_threaded(driver_class, calls, measurements, concurrency):
+    def worker(chunk):
+        driver = driver_class()
+        try:
+            issue(driver, chunk, measurements)
+        finally:
+            driver.close()
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(calls[i::concurrency],)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_scenario(driver, scenario, data, count, concurrency=None):
+    calls = scenario.prepare(data, count)
+    warmup, timed = calls[:scenario.warmup], calls[scenario.warmup:]
+    issue(driver, warmup, Measurements())
+    concurrency = concurrency or scenario.concurrency
+    measurements = Measurements()
+    start = time.perf_counter()
+    if concurrency > 1:
+        run_threaded(type(driver), timed, measurements, concurrency)
+    else:
+        issue(driver, timed, measurements)
+    elapsed = time.perf_counter() - start
+    scenario.cleanup(data, timed)
+    return summarize(measurements.latencies, measurements.queries, measurements.errors, elapsed)
+
+
+def summarize(latencies, queries, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed if elapsed else None,
+        'mean_ms': statistics.fmean(latencies) if latencies else None,
+        'p50_ms': percentile(ordered, 50),
+        'p95_ms': percentile(ordered, 95),
+        'p99_ms': percentile(ordered, 99),
+        'queries_per_request': statistics.fmean(queries) if queries else None,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare two result sets keyed by "driver:scenario".
+
+    Returns `(rows, regressions)`. A regression is throughput falling, or p95
+    latency or queries per request rising, by more than `threshold` percent.
+    """
+    rows = []
+    regressions = []
+    for key in sorted(set(baseline) & set(current)):
+        for metric, higher_is_better in (('rps', True), ('p95_ms', False), ('queries_per_request', False)):
+            old, new = baseline[key].get(metric), current[key].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            rows.append((key, metric, old, new, change))
+            worse = -change if higher_is_better else change
+            if threshold is not None and worse > threshold:
+                regressions.append((key, metric, change))
+    return rows, regressions
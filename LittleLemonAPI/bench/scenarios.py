@@ -0,0 +1,149 @@
+import random
+from dataclasses import dataclass
+
+from django.contrib.auth.models import Group, User
+
+from ..models import Cart
+from ..roles import DELIVERY_CREW
+from .data import fill_carts
+
+
+@dataclass
+class Call:
+    method: str
+    path: str
+    token: str = None
+    data: dict = None
+    expect: int = 200
+
+
+class Scenario:
+    name = None
+    # Untimed requests issued first so caches and connections are warm.
+    warmup = 0
+    # Number of client threads the timed calls are spread over.
+    concurrency = 1
+
+    def prepare(self, data, count):
+        """Reset whatever state the scenario mutates and return `warmup + count` calls."""
+        raise NotImplementedError
+
+    def cleanup(self, data, calls):
+        pass
+
+
+class MenuList(Scenario):
+    name = 'menu-list'
+    warmup = 10
+    prefix = '/api'
+
+    def prepare(self, data, count):
+        return [Call('GET', f'{self.prefix}/menu-items?page={i % 5 + 1}') for i in range(self.warmup + count)]
+
+
+class AsyncMenuList(MenuList):
+    name = 'async-menu-list'
+    prefix = '/api/async'
+
+
+class MenuSearch(Scenario):
+    """Full-text ?search= with prefixes and misspellings."""
+    name = 'menu-search'
+    warmup = 10
+    queries = ['marg', 'spicy pep', 'lasagne', 'tiramisu', 'carbonarra', 'vegan', 'truf risotto', 'focacia', 'gelato mini']
+
+    def prepare(self, data, count):
+        # Distinct URLs so the catalog cache doesn't answer repeats.
+        return [
+            Call('GET', f'/api/menu-items?search={self.queries[i % len(self.queries)]}&run={i}')
+            for i in range(self.warmup + count)
+        ]
+
+
+class CartAdd(Scenario):
+    name = 'cart-add'
+
+    def prepare(self, data, count):
+        rng = random.Random(count)
+        users = data.customers[:count]
+        Cart.objects.filter(user__in=users).delete()
+        return [
+            Call('POST', '/api/cart/menu-items', data.token(user), {'itemId': rng.choice(data.menu_items).pk, 'quantity': 1}, 201)
+            for user in users
+        ]
+
+
+class CartBatch(Scenario):
+    """Ten items per request through the single-statement batch endpoint."""
+    name = 'cart-batch'
+
+    def prepare(self, data, count):
+        rng = random.Random(count)
+        users = data.customers[:count]
+        Cart.objects.filter(user__in=users).delete()
+        return [
+            Call('POST', '/api/cart/menu-items/batch', data.token(user), {
+                'items': [{'itemId': item.pk, 'quantity': rng.randint(1, 3)} for item in rng.sample(data.menu_items, 10)],
+            }, 201)
+            for user in users
+        ]
+
+
+class Checkout(Scenario):
+    name = 'checkout'
+
+    def prepare(self, data, count):
+        users = data.customers[:count]
+        fill_carts(data, users, seed=count)
+        return [Call('POST', '/api/orders', data.token(user), {}, 201) for user in users]
+
+
+class ConcurrentCheckout(Checkout):
+    """Checkouts from parallel clients; compares how database profiles handle write contention."""
+    name = 'concurrent-checkout'
+    concurrency = 8
+
+
+class OrderFeed(Scenario):
+    name = 'order-feed'
+    warmup = 10
+    prefix = '/api'
+
+    def prepare(self, data, count):
+        manager = data.managers[0]
+        calls = []
+        for i in range(self.warmup + count):
+            if i % 2:
+                calls.append(Call('GET', f'{self.prefix}/orders?cursor=', data.token(manager)))
+            else:
+                customer = data.customers[i % len(data.customers)]
+                calls.append(Call('GET', f'{self.prefix}/orders', data.token(customer)))
+        return calls
+
+
+class AsyncOrderFeed(OrderFeed):
+    name = 'async-order-feed'
+    prefix = '/api/async'
+
+
+class GroupAdmin(Scenario):
+    name = 'group-admin'
+
+    def prepare(self, data, count):
+        manager = data.managers[0]
+        users = data.customers[:count]
+        self.remove_from_crew(users)
+        return [Call('POST', '/api/groups/delivery-crew/users', data.token(manager), {'userId': user.pk}, 201) for user in users]
+
+    def cleanup(self, data, calls):
+        self.remove_from_crew(User.objects.filter(pk__in=[call.data['userId'] for call in calls]))
+
+    def remove_from_crew(self, users):
+        group = Group.objects.get(name=DELIVERY_CREW)
+        User.groups.through.objects.filter(group=group, user__in=users).delete()
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (MenuList, AsyncMenuList, MenuSearch, CartAdd, CartBatch, Checkout, ConcurrentCheckout, OrderFeed, AsyncOrderFeed, GroupAdmin)
+}
@@ -0,0 +1,47 @@
+"""
+One worker start, measured: run as `python -m LittleLemonAPI.bench.startup`
+by the bench_startup command, in a fresh interpreter so nothing is imported
+yet. Prints a JSON line with the time to load the WSGI application, the first
+requests' latencies and the steady per-request cost of two cheap routes.
+"""
+import json
+import os
+import sys
+import time
+
+started = time.perf_counter()
+
+from LittleLemon.wsgi import application  # noqa: E402
+
+loaded = time.perf_counter()
+
+
+def main():
+    from django.conf import settings
+
+    from .drivers import WSGIDriver
+
+    # Production-like: no DEBUG query logging.
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    driver = WSGIDriver()
+    token = os.environ.get('LITTLELEMON_BENCH_TOKEN')
+    routes = {'anonymous': ('/api/menu-items', None), 'token': ('/api/cart/menu-items', token)}
+    result = {'ready_at': time.time(), 'load_ms': (loaded - started) * 1000}
+    for name, (path, credentials) in routes.items():
+        t0 = time.perf_counter()
+        status, _ = driver.request('GET', path, credentials)
+        result[f'first_{name}_ms'] = (time.perf_counter() - t0) * 1000
+        if status != 200:
+            sys.exit(f'GET {path} returned {status}')
+    count = int(os.environ.get('LITTLELEMON_BENCH_REQUESTS', 500))
+    for name, (path, credentials) in routes.items():
+        t0 = time.perf_counter()
+        for _ in range(count):
+            driver.request('GET', path, credentials)
+        result[f'{name}_us'] = (time.perf_counter() - t0) / count * 1_000_000
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Middleware only browsers need (sessions, CSRF, session authentication,
+messages, X-Frame-Options), skipped for the token-authenticated API.
+
+BrowserMiddleware stands in MIDDLEWARE for the whole BROWSER_MIDDLEWARE list:
+requests under BROWSER_MIDDLEWARE_EXEMPT_PATHS go straight past it, everything
+else (the admin, the browsable API) runs through the full chain as if it were
+listed in MIDDLEWARE itself, hooks included.
+
+Workers started with LITTLELEMON_PROFILE=api leave it out altogether.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.module_loading import import_string
+
+
+class BrowserMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.exempt_paths = tuple(getattr(settings, 'BROWSER_MIDDLEWARE_EXEMPT_PATHS', ()))
+        self.view_hooks = []
+        self.template_response_hooks = []
+        self.exception_hooks = []
+        # Built like BaseHandler.load_middleware(); Django's own middleware
+        # follows whichever mode (sync or async) get_response is in.
+        handler = get_response
+        for path in reversed(getattr(settings, 'BROWSER_MIDDLEWARE', ())):
+            try:
+                instance = import_string(path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(instance, 'process_view'):
+                self.view_hooks.insert(0, instance.process_view)
+            if hasattr(instance, 'process_template_response'):
+                self.template_response_hooks.append(instance.process_template_response)
+            if hasattr(instance, 'process_exception'):
+                self.exception_hooks.append(instance.process_exception)
+            handler = instance
+        self.browser_chain = handler
+
+    def exempt(self, request):
+        return request.path_info.startswith(self.exempt_paths)
+
+    def __call__(self, request):
+        if self.exempt(request):
+            return self.get_response(request)
+        return self.browser_chain(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.exempt(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        if self.exempt(request):
+            return response
+        for hook in self.template_response_hooks:
+            response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if self.exempt(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
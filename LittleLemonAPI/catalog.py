@@ -0,0 +1,104 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .caching import TTLCache
+from .replicas import primary_reads
+
+VERSION_KEY = 'littlelemon:catalog-version'
+
+# (name, version, variant) -> (body, etag). Old versions are never read again
+# and simply age out of the LRU.
+_entries = TTLCache(
+    ttl=getattr(settings, 'CATALOG_CACHE_TTL', 3600),
+    max_entries=getattr(settings, 'CATALOG_CACHE_MAX_ENTRIES', 512),
+)
+
+
+def get_version():
+    """Current catalog version, shared between processes through the Django cache (see CACHES)."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    """
+    Give the catalog a new version once the current transaction commits, so
+    every process rebuilds its cached menu/category bodies on next read.
+
+    The version is a fresh timestamp rather than an increment: two concurrent
+    invalidations on a backend without atomic incr() still leave a version no
+    body was built under.
+    """
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, time.time_ns(), timeout=None))
+
+
+def make_entry(body):
+    return body, '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def get_or_build(name, variant, build):
+    """Return `(body, etag)` for the current version, calling `build()` to produce the JSON bytes on a miss."""
+    key = (name, get_version(), variant)
+    entry = _entries.get(key)
+    if entry is None:
+        with primary_reads():
+            entry = make_entry(build())
+        _entries.set(key, entry)
+    return entry
+
+
+async def aget_or_build(name, variant, build):
+    """Like get_or_build(), with `build` a coroutine function."""
+    key = (name, await aget_version(), variant)
+    entry = _entries.get(key)
+    if entry is None:
+        with primary_reads():
+            entry = make_entry(await build())
+        _entries.set(key, entry)
+    return entry
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    # If-None-Match uses the weak comparison function.
+    candidates = [tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(header)]
+    return '*' in candidates or etag in candidates
+
+
+def cached_response(request, name, build):
+    """Serve a catalog read from memory, answering 304 when the client already has this body."""
+    return entry_response(request, get_or_build(name, request.build_absolute_uri(), build))
+
+
+async def acached_response(request, name, build):
+    return entry_response(request, await aget_or_build(name, request.build_absolute_uri(), build))
+
+
+def entry_response(request, entry):
+    body, etag = entry
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Backends whose entries are private to one process.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Shared cache servers. The file-based and database caches are shared too, but
+# every write to them scans or culls the whole store, and culling drops the
+# version keys at random; they are for development only.
+PRODUCTION_CACHES = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+)
+
+
+def default_cache_backend():
+    return settings.CACHES.get('default', {}).get('BACKEND')
+
+
+@register('caches')
+def check_shared_cache(app_configs, **kwargs):
+    """Response versions and invalidations must reach every worker, so the default cache has to be shared."""
+    backend = default_cache_backend()
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f'The default cache ({backend}) is local to each process.',
+            hint='Set LITTLELEMON_CACHE to a Redis or Memcached server, or a directory for development.',
+            id='LittleLemonAPI.E001',
+        )]
+    return []
+
+
+@register('caches', deploy=True)
+def check_production_cache(app_configs, **kwargs):
+    """Versions and generations are read and written on every request: deployments need a cache server."""
+    backend = default_cache_backend()
+    if backend not in PRODUCTION_CACHES and backend not in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f'The default cache ({backend}) is for development only.',
+            hint='Set LITTLELEMON_CACHE to a redis:// or memcached:// server.',
+            id='LittleLemonAPI.E002',
+        )]
+    return []
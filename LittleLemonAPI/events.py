@@ -0,0 +1,172 @@
+"""
+Pub/sub for order changes, feeding the server-sent events stream
+(async_views.OrderStreamView).
+
+Every open stream is a Subscriber holding an asyncio queue on the event loop
+that serves it. Subscribers are indexed by user id, so publishing an event
+touches only the connections that may see it: the order's customer, its
+delivery crew (old and new), and managers, who see everything.
+
+Changes reach streams in any process: publish_order_change() records an
+OrderEvent in the transaction that changes the order (in a request, or in a
+`manage.py runjobs` worker assigning crew), and each process serving streams
+runs a Relay that polls for new events every ORDER_STREAM_POLL_INTERVAL
+seconds while it has subscribers. Events older than ORDER_EVENT_RETENTION
+seconds are pruned by the relays and the job workers.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import OrderEvent
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    def __init__(self, user_id, everything=False, order_id=None):
+        self.user_id = user_id
+        self.everything = everything
+        self.order_id = order_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=getattr(settings, 'ORDER_STREAM_QUEUE_SIZE', 100))
+        # Set when the client fell too far behind; its stream then ends and
+        # the client reconnects and reloads instead of missing events silently.
+        self.overflowed = False
+
+    def wants(self, event):
+        return self.order_id is None or event['id'] == self.order_id
+
+    def deliver(self, event):
+        # Runs on self.loop. A full queue means the reader has events to
+        # drain, so it will notice the flag without being woken.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class Broker:
+    def __init__(self):
+        self._by_user = defaultdict(set)
+        self._everything = set()
+        self._lock = threading.Lock()
+        self.relay = Relay(self)
+
+    def subscribe(self, subscriber):
+        with self._lock:
+            if subscriber.everything:
+                self._everything.add(subscriber)
+            else:
+                self._by_user[subscriber.user_id].add(subscriber)
+        self.relay.ensure_running()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._everything.discard(subscriber)
+            subscribers = self._by_user.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._by_user[subscriber.user_id]
+
+    def publish(self, event, user_ids):
+        """Fan `event` out to managers and to subscribers among `user_ids`. Safe to call from any thread."""
+        with self._lock:
+            recipients = set(self._everything)
+            for user_id in user_ids:
+                recipients.update(self._by_user.get(user_id, ()))
+        for subscriber in recipients:
+            if not subscriber.wants(event):
+                continue
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # The loop serving it has shut down.
+                self.unsubscribe(subscriber)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._everything) + sum(len(subscribers) for subscribers in self._by_user.values())
+
+
+class Relay:
+    """Polls OrderEvent on a thread of its own and publishes new events to the broker, for as long as it has subscribers."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def ensure_running(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name='order-event-relay', daemon=True)
+                self._thread.start()
+
+    def should_stop(self):
+        # Under the same lock as ensure_running(), so a subscriber added while
+        # the relay is stopping starts a new one.
+        with self._lock:
+            if len(self.broker):
+                return False
+            self._thread = None
+            return True
+
+    def run(self):
+        interval = getattr(settings, 'ORDER_STREAM_POLL_INTERVAL', 1.0)
+        last_id = None
+        polls = 0
+        try:
+            while not self.should_stop():
+                try:
+                    if last_id is None:
+                        # Streams start with what happens after they open.
+                        last_id = OrderEvent.objects.aggregate(last=Max('id'))['last'] or 0
+                    last_id = self.poll(last_id)
+                    polls += 1
+                    if polls % 60 == 0:
+                        prune()
+                except DatabaseError:
+                    logger.exception('Polling order events failed')
+                    connection.close()
+                time.sleep(interval)
+        finally:
+            connection.close()
+
+    def poll(self, last_id):
+        for event in OrderEvent.objects.filter(id__gt=last_id).order_by('id'):
+            self.broker.publish(dict(event.payload, seq=event.pk), event.recipients)
+            last_id = event.pk
+        return last_id
+
+
+broker = Broker()
+
+
+def prune():
+    """Delete events no stream can still be waiting for."""
+    retention = getattr(settings, 'ORDER_EVENT_RETENTION', 3600)
+    return OrderEvent.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=retention)).delete()[0]
+
+
+def publish_order_change(order, previous_crew_id=None):
+    """Record the order's current status and crew for the streams; they see it once the surrounding transaction commits."""
+    event = {
+        'type': 'order',
+        'id': order.pk,
+        'user': order.user_id,
+        'delivery_crew': order.delivery_crew_id,
+        'status': order.status,
+    }
+    user_ids = {order.user_id, order.delivery_crew_id, previous_crew_id} - {None}
+    OrderEvent.objects.create(payload=event, recipients=sorted(user_ids))
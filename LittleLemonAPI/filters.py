@@ -0,0 +1,116 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, models
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter, SearchFilter
+
+from . import search
+
+TRUE_VALUES = ('1', 'true', 't', 'yes')
+FALSE_VALUES = ('0', 'false', 'f', 'no')
+
+
+class FieldFilterBackend(BaseFilterBackend):
+    """
+    Filters on the fields a view lists in `filter_fields`.
+
+    `?field=value` is an exact match. Numeric and date fields additionally accept
+    `field__gte`, `field__lte`, `field__gt` and `field__lt` so range queries can
+    use the column index. Foreign keys filter by primary key.
+    """
+    range_lookups = ('gte', 'lte', 'gt', 'lt')
+    range_types = (models.DecimalField, models.IntegerField, models.DateField, models.DateTimeField)
+
+    def get_lookups(self, field):
+        if isinstance(field, self.range_types) and not field.is_relation:
+            return ('exact',) + self.range_lookups
+        return ('exact',)
+
+    def to_python(self, field, raw):
+        if isinstance(field, models.BooleanField):
+            value = raw.lower()
+            if value in TRUE_VALUES:
+                return True
+            if value in FALSE_VALUES:
+                return False
+            raise DjangoValidationError('Must be true or false.')
+        if field.is_relation:
+            field = field.target_field
+        return field.to_python(raw)
+
+    def filter_queryset(self, request, queryset, view):
+        filter_fields = getattr(view, 'filter_fields', None)
+        if not filter_fields:
+            return queryset
+        opts = queryset.model._meta
+        filters = {}
+        errors = {}
+        for name in filter_fields:
+            field = opts.get_field(name)
+            for lookup in self.get_lookups(field):
+                param = name if lookup == 'exact' else f'{name}__{lookup}'
+                raw = request.query_params.get(param)
+                if raw is None:
+                    continue
+                try:
+                    value = self.to_python(field, raw)
+                except DjangoValidationError as e:
+                    errors[param] = e.messages
+                    continue
+                if isinstance(field, models.BooleanField):
+                    # `field=False` compiles to `NOT field` on SQLite, which
+                    # can't seek a composite index on the column; IN can.
+                    filters[f'{name}__in'] = [value]
+                else:
+                    filters[param] = value
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**filters)
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    `?search=` backed by the full-text index in search.py instead of icontains
+    scans. Results come best match first unless `?ordering=` is given. On
+    databases without an index this is plain SearchFilter over `search_fields`.
+    """
+
+    def get_expression(self, request, queryset, vocabulary):
+        text = request.query_params.get(self.search_param, '')
+        return search.build_query(connections[queryset.db].vendor, text, vocabulary) if text.strip() else None
+
+    def filter_queryset(self, request, queryset, view):
+        if not search.is_supported(connections[queryset.db]):
+            return super().filter_queryset(request, queryset, view)
+        if not request.query_params.get(self.search_param, '').strip():
+            return queryset
+        expression = self.get_expression(request, queryset, search.get_vocabulary(queryset.db))
+        return search.apply(queryset, expression) if expression else queryset
+
+    async def afilter_queryset(self, request, queryset, view):
+        # The vocabulary may have to be loaded from the database.
+        if not search.is_supported(connections[queryset.db]):
+            return super().filter_queryset(request, queryset, view)
+        if not request.query_params.get(self.search_param, '').strip():
+            return queryset
+        expression = self.get_expression(request, queryset, await search.aget_vocabulary(queryset.db))
+        return search.apply(queryset, expression) if expression else queryset
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that always ends on the primary key so pages never overlap or
+    skip rows. Full-text search results keep their rank unless the client
+    picks an ordering.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if search.RANK in queryset.query.extra_select and not request.query_params.get(self.ordering_param):
+            return [search.RANK, 'id']
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering is None:
+            return None
+        ordering = list(ordering)
+        if not any(term.lstrip('-') in ('id', 'pk') for term in ordering):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return ordering
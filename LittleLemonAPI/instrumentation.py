@@ -0,0 +1,207 @@
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# The counter for the request being handled. A context variable rather than a
+# per-connection execute_wrapper() so that queries an async view runs through
+# sync_to_async (on another thread's connection) are still attributed to it.
+_current_counter = ContextVar('littlelemon_query_counter', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    counter = _current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counter.duration += time.perf_counter() - start
+        counter.count += 1
+
+
+def install_query_counter(connection, **kwargs):
+    """connection_created receiver that puts count_queries on every new database connection."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = max(math.ceil(pct / 100.0 * len(values)), 1)
+    return values[rank - 1]
+
+
+class RouteStats:
+    """Keeps the most recent samples per route and summarises them on demand."""
+    metrics = ('total_ms', 'db_ms', 'render_ms', 'queries')
+
+    def __init__(self, max_samples):
+        self.max_samples = max_samples
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, route, sample):
+        with self._lock:
+            self._samples[route].append(sample)
+            self._counts[route] += 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = {route: list(values) for route, values in self._samples.items()}
+            counts = dict(self._counts)
+        summary = {}
+        for route, values in sorted(samples.items()):
+            summary[route] = {'requests': counts[route]}
+            for i, metric in enumerate(self.metrics):
+                column = sorted(sample[i] for sample in values)
+                summary[route][metric] = {
+                    'p50': percentile(column, 50),
+                    'p95': percentile(column, 95),
+                    'p99': percentile(column, 99),
+                }
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+stats = RouteStats(getattr(settings, 'INSTRUMENTATION_SAMPLES', 1000))
+
+
+class Counters:
+    """Named event counts since the process started (or the last reset)."""
+
+    def __init__(self):
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(sorted(self._counts.items()))
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+# e.g. throttled:cart, shed:queue-full (see throttling.py and admission.py)
+counters = Counters()
+
+
+def get_route(request):
+    match = getattr(request, 'resolver_match', None)
+    return f'{request.method} /{match.route}' if match else f'{request.method} <unmatched>'
+
+
+def get_query_budget(request):
+    """The `query_budget` declared on the resolved view: an int, or a dict keyed by HTTP method."""
+    match = getattr(request, 'resolver_match', None)
+    view_class = getattr(match.func, 'view_class', None) if match else None
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        budget = budget.get(request.method)
+    return budget
+
+
+class InstrumentationMiddleware:
+    """
+    Records query count, SQL time, render time and total latency for every
+    request, reports them in a Server-Timing header and aggregates them per
+    route in `stats`.
+
+    Views may declare `query_budget`. Going over it logs a warning, or raises
+    QueryBudgetExceeded when QUERY_BUDGET_STRICT is on, so a test that hits an
+    N+1 regression fails instead of passing slowly.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter, token, start = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_counter.reset(token)
+        return self.finish(request, response, counter, start)
+
+    async def __acall__(self, request):
+        counter, token, start = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_counter.reset(token)
+        return self.finish(request, response, counter, start)
+
+    def begin(self, request):
+        counter = QueryCounter()
+        request._render_ms = 0.0
+        return counter, _current_counter.set(counter), time.perf_counter()
+
+    def finish(self, request, response, counter, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = counter.duration * 1000
+        route = get_route(request)
+        stats.record(route, (total_ms, db_ms, request._render_ms, counter.count))
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.2f};desc="{counter.count} queries"',
+            f'render;dur={request._render_ms:.2f}',
+            f'total;dur={total_ms:.2f}',
+        ])
+        self.check_budget(request, route, counter.count)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized to bytes) after this hook runs.
+        start = time.perf_counter()
+
+        def finished(rendered):
+            request._render_ms += (time.perf_counter() - start) * 1000
+
+        response.add_post_render_callback(finished)
+        return response
+
+    def check_budget(self, request, route, count):
+        budget = get_query_budget(request)
+        if budget is None or count <= budget:
+            return
+        message = f'{route} ran {count} queries, over its budget of {budget}'
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
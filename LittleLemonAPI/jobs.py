@@ -0,0 +1,127 @@
+"""
+A small job queue backed by the Job table, so checkout side effects run in
+worker processes (`manage.py runjobs`) instead of inside the request.
+
+Jobs are enqueued in the caller's transaction: they become visible to workers
+only if the order (or whatever else) they refer to is committed. Any number of
+workers may poll the table; each job is claimed by exactly one of them.
+"""
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Job, Order
+from .roles import DELIVERY_CREW
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def job(name):
+    """Register the decorated function as the handler for jobs called `name`. It receives the payload as kwargs."""
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+
+def enqueue(name, run_at=None, **payload):
+    if name not in _handlers:
+        raise ValueError(f'Unknown job {name!r}')
+    queued = Job.objects.create(name=name, payload=payload, run_at=run_at or timezone.now())
+    if getattr(settings, 'JOBS_EAGER', False):
+        # Development and tests: run once the enclosing transaction commits,
+        # as a worker would, but in this process.
+        transaction.on_commit(lambda: run_pending(worker_id='eager'))
+    return queued
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker_id, limit=10):
+    """
+    Mark up to `limit` due jobs as running for `worker_id` and return them.
+
+    The status=queued condition on the UPDATE is what makes a claim exclusive:
+    two workers that picked the same candidates race on that statement, and
+    each row is flipped by only one of them. Where the database supports it,
+    SKIP LOCKED keeps workers from picking the same candidates to begin with.
+    """
+    now = timezone.now()
+    connection = connections[router.db_for_write(Job)]
+    with transaction.atomic(using=connection.alias):
+        candidates = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        Job.objects.filter(pk__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(pk__in=ids, status=Job.RUNNING, locked_by=worker_id, locked_at=now).order_by('run_at', 'id'))
+
+
+def requeue_stale():
+    """Put back jobs whose worker died mid-run (held longer than JOBS_LOCK_TIMEOUT seconds)."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOBS_LOCK_TIMEOUT', 300))
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff).update(status=Job.QUEUED, locked_by='', locked_at=None)
+
+
+def run(queued):
+    """Run one claimed job. Finished jobs are deleted; failures are retried with backoff up to JOBS_MAX_ATTEMPTS."""
+    try:
+        _handlers[queued.name](**queued.payload)
+    except Exception:
+        logger.exception('Job %s (%s) failed', queued.pk, queued.name)
+        retry = queued.attempts < getattr(settings, 'JOBS_MAX_ATTEMPTS', 5)
+        Job.objects.filter(pk=queued.pk).update(
+            status=Job.QUEUED if retry else Job.FAILED,
+            run_at=timezone.now() + timedelta(seconds=2 ** queued.attempts),
+            locked_by='',
+            locked_at=None,
+            last_error=traceback.format_exc(),
+        )
+        return False
+    Job.objects.filter(pk=queued.pk).delete()
+    return True
+
+
+def run_pending(worker_id=None, limit=10):
+    """Claim and run one batch of due jobs. Returns how many were claimed."""
+    claimed = claim(worker_id or default_worker_id(), limit)
+    for queued in claimed:
+        run(queued)
+    return len(claimed)
+
+
+@job('assign_delivery_crew')
+def assign_delivery_crew(order_id):
+    """Give an unassigned order to the active delivery crew member with the fewest undelivered orders."""
+    with transaction.atomic():
+        order = Order.objects.select_for_update().filter(pk=order_id, delivery_crew__isnull=True).first()
+        if order is None:
+            # Deleted, or assigned by a manager in the meantime.
+            return
+        crew = (
+            User.objects.filter(groups__name=DELIVERY_CREW, is_active=True)
+            .annotate(load=Count('delivery_crew', filter=Q(delivery_crew__status=False)))
+            .order_by('load', 'id')
+            .first()
+        )
+        if crew is None:
+            logger.warning('No delivery crew available for order %s', order_id)
+            return
+        order.delivery_crew = crew
+        order.save(update_fields=['delivery_crew'])
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import archive
+
+
+class Command(BaseCommand):
+    help = 'Move delivered orders older than ARCHIVE_AFTER_DAYS, with their items, to the archive tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive delivered orders older than this many days. Defaults to ARCHIVE_AFTER_DAYS.')
+        parser.add_argument('--batch-size', type=int, help='Orders moved per transaction. Defaults to ARCHIVE_BATCH_SIZE.')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches.')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches, to leave room for live writes.')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days must not be negative')
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        before = archive.cutoff(options['days'])
+        total = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            moved = archive.archive_batch(before, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            batches += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Batch {batches}: archived {moved} order(s)')
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(f'Archived {total} order(s) dated before {before.isoformat()} in {batches} batch(es)')
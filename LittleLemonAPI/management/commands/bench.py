@@ -0,0 +1,105 @@
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from ...bench.data import generate
+from ...bench.drivers import DRIVERS
+from ...bench.runner import compare, run_scenario
+from ...bench.scenarios import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API routes in-process against a generated test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--driver', action='append', choices=sorted(DRIVERS), help='Driver(s) to use. Defaults to all.')
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='Scenario(s) to run. Defaults to all.')
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for the generated data volume.')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario and driver.')
+        parser.add_argument('--concurrency', type=int, help="Client threads per scenario, overriding the scenario's default.")
+        parser.add_argument('--save', metavar='FILE', help='Write the results as a JSON baseline.')
+        parser.add_argument('--compare', metavar='FILE', help='Compare the results against a saved baseline.')
+        parser.add_argument('--max-regression', type=float, metavar='PERCENT', help='Exit with an error if any metric regresses by more than this.')
+
+    def handle(self, *args, **options):
+        drivers = options['driver'] or sorted(DRIVERS)
+        scenarios = options['scenario'] or list(SCENARIOS)
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+
+        setup_test_environment(debug=False)
+        self.use_file_databases()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            started = time.perf_counter()
+            data = generate(scale=options['scale'])
+            self.stdout.write(f'Generated data in {time.perf_counter() - started:.1f}s')
+            results = {}
+            for driver_name in drivers:
+                driver = DRIVERS[driver_name]()
+                try:
+                    for scenario_name in scenarios:
+                        key = f'{driver_name}:{scenario_name}'
+                        results[key] = run_scenario(
+                            driver, SCENARIOS[scenario_name](), data, options['requests'], options['concurrency'],
+                        )
+                        self.report(key, results[key])
+                finally:
+                    driver.close()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump({'meta': self.meta(options), 'results': results}, f, indent=2)
+            self.stdout.write(f'Saved baseline to {options["save"]}')
+        if baseline is not None:
+            self.compare(baseline, results, options['max_regression'])
+
+    def use_file_databases(self):
+        # SQLite test databases default to in-memory, which has neither the
+        # WAL journal nor realistic locking. Benchmark against real files.
+        self.tempdir = tempfile.mkdtemp(prefix='littlelemon-bench-')
+        for connection in connections.all():
+            if connection.vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME']:
+                connection.settings_dict['TEST']['NAME'] = os.path.join(self.tempdir, f'{connection.alias}.sqlite3')
+
+    def report(self, key, result):
+        queries = result['queries_per_request']
+        self.stdout.write(
+            f'{key:<24} {result["rps"]:>9.1f} req/s  '
+            f'p50 {result["p50_ms"]:>7.2f}ms  p95 {result["p95_ms"]:>7.2f}ms  p99 {result["p99_ms"]:>7.2f}ms  '
+            f'{queries if queries is None else round(queries, 1)} queries/req  {result["errors"]} errors'
+        )
+
+    def compare(self, baseline, results, threshold):
+        rows, regressions = compare(baseline, results, threshold)
+        for key, metric, old, new, change in rows:
+            self.stdout.write(f'{key:<24} {metric:<20} {old:>10.2f} -> {new:>10.2f}  ({change:+.1f}%)')
+        if regressions:
+            summary = ', '.join(f'{key} {metric} {change:+.1f}%' for key, metric, change in regressions)
+            raise CommandError(f'Regressed by more than {threshold}%: {summary}')
+
+    def meta(self, options):
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'scale': options['scale'],
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'database_profile': getattr(settings, 'DATABASE_PROFILE', None),
+        }
@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from rest_framework.authtoken.models import Token
+
+from ...bench.data import generate
+
+COLUMNS = [
+    ('ready_ms', 'ready'),
+    ('load_ms', 'load app'),
+    ('first_anonymous_ms', '1st anon'),
+    ('first_token_ms', '1st token'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure worker startup (interpreter start to application loaded), first-request latency '
+        'and per-request overhead for each serving profile, with and without warm-up.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', choices=['full', 'api'], help='Serving profile(s). Defaults to both.')
+        parser.add_argument('--runs', type=int, default=5, help='Worker starts per configuration; medians are reported.')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per route for the steady-state figures.')
+        parser.add_argument('--scale', type=float, default=0.1, help='Multiplier for the generated data volume.')
+
+    def handle(self, *args, **options):
+        profiles = options['profile'] or ['full', 'api']
+        setup_test_environment(debug=False)
+        self.use_file_database()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            data = generate(scale=options['scale'])
+            user = data.customers[0]
+            env = dict(
+                os.environ,
+                LITTLELEMON_BENCH_TOKEN=Token.objects.get(user=user).key,
+                LITTLELEMON_BENCH_REQUESTS=str(options['requests']),
+                **self.database_env(),
+            )
+            # The children open the database themselves.
+            connections.close_all()
+            self.stdout.write(f'{"profile":<8} {"warm-up":<8}' + ''.join(f'{label:>11}' for _, label in COLUMNS) + f'{"anon/req":>11}{"token/req":>11}')
+            for profile in profiles:
+                for warm_up in (False, True):
+                    runs = [self.start_worker(dict(env, LITTLELEMON_PROFILE=profile, LITTLELEMON_WARM_UP='1' if warm_up else '0')) for _ in range(options['runs'])]
+                    medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+                    self.stdout.write(
+                        f'{profile:<8} {"on" if warm_up else "off":<8}'
+                        + ''.join(f'{medians[key]:>9.1f}ms' for key, _ in COLUMNS)
+                        + f'{medians["anonymous_us"]:>9.0f}us{medians["token_us"]:>9.0f}us'
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def use_file_database(self):
+        # The workers are separate processes, so the test database must be a file.
+        self.tempdir = tempfile.mkdtemp(prefix='littlelemon-startup-')
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(self.tempdir, 'default.sqlite3')
+
+    def database_env(self):
+        name = str(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+        if settings.DATABASE_PROFILE == 'sqlite':
+            return {'LITTLELEMON_SQLITE_PATH': name}
+        return {'POSTGRES_DB': name}
+
+    def start_worker(self, env):
+        spawned = time.time()
+        completed = subprocess.run(
+            [sys.executable, '-m', 'LittleLemonAPI.bench.startup'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f'Worker failed:\n{completed.stderr}')
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['ready_ms'] = (result.pop('ready_at') - spawned) * 1000
+        return result
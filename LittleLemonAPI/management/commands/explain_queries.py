@@ -0,0 +1,78 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from ... import roles, urls
+from ...bench.data import generate
+from ...bench.drivers import ClientDriver
+from ...bench.plans import SKIPPED, capture, explain, replays
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a request to every API route against a generated test database and '
+        'report the statements whose query plans scan whole tables or sort without an index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.5, help='Multiplier for the generated data volume.')
+        parser.add_argument('--route', action='append', help='Only replay these routes (as written in urls.py).')
+        parser.add_argument('--ignore', action='append', default=[], metavar='TABLE', help='Tables whose full scans are expected, e.g. auth_group.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the plan of every statement, not only flagged ones.')
+        parser.add_argument('--fail', action='store_true', help='Exit with an error if anything is flagged.')
+
+    def handle(self, *args, **options):
+        # Replays run inside a transaction, so views' own transactions add
+        # savepoint queries that would trip the query budgets.
+        logging.getLogger('LittleLemonAPI.instrumentation').setLevel(logging.ERROR)
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            data = generate(scale=options['scale'])
+            flagged = self.replay_all(data, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        if flagged and options['fail']:
+            raise CommandError(f'{flagged} statement(s) flagged')
+
+    def replay_all(self, data, options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        driver = ClientDriver()
+        calls = replays(data)
+        known = {str(pattern.pattern) for pattern in urls.urlpatterns}
+        for route in sorted(known - {route for route, _, _ in calls} - set(SKIPPED)):
+            self.stdout.write(self.style.WARNING(f'No replay for route {route}'))
+        if options['route']:
+            calls = [replay for replay in calls if replay[0] in options['route']]
+        for route, reason in SKIPPED.items():
+            if not options['route'] or route in options['route']:
+                self.stdout.write(f'Skipped {route}: {reason}')
+        user_ids = [user.pk for user in data.managers + data.crew[:1] + data.customers]
+        flagged = 0
+        for route, role, call in calls:
+            (status, _), statements = capture(connection, lambda: driver.request(call.method, call.path, call.token, call.data))
+            # The replay's writes were rolled back; so must be what they cached.
+            roles.invalidate_roles(*user_ids)
+            header = f'{call.method} {call.path} ({role}): {status}, {len(statements)} statement(s)'
+            if status != call.expect:
+                header += self.style.WARNING(f' expected {call.expect}')
+            self.stdout.write(header)
+            for statement in statements:
+                explain(connection, statement)
+                findings = [
+                    finding for finding in statement.findings
+                    if not any(finding == f'full scan of {table}' for table in options['ignore'])
+                ]
+                if not findings and not options['verbose_plans']:
+                    continue
+                if findings:
+                    flagged += 1
+                    self.stdout.write(self.style.ERROR('  ! ' + '; '.join(findings)))
+                self.stdout.write(f'    {statement.sql}')
+                for line in statement.plan:
+                    self.stdout.write(f'      {line}')
+        self.stdout.write(f'{flagged} statement(s) flagged across {len(calls)} request(s)')
+        return flagged
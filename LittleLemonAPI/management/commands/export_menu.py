@@ -0,0 +1,31 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import menu_io
+
+
+class Command(BaseCommand):
+    help = 'Write every menu item, with its category, as CSV or JSON Lines that import_menu can read back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="File to write, or '-' (the default) for stdout.")
+        parser.add_argument('--format', choices=menu_io.FORMATS, help='Output format. Guessed from the file extension, csv for stdout.')
+
+    def handle(self, *args, **options):
+        to_stdout = options['path'] == '-'
+        fmt = options['format'] or ('csv' if to_stdout else menu_io.guess_format(options['path']))
+        if fmt is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format.')
+        started = time.perf_counter()
+        stream = self.stdout if to_stdout else open(options['path'], 'w', newline='', encoding='utf-8')
+        try:
+            count = menu_io.write_rows(stream, fmt, menu_io.export_rows())
+        finally:
+            if not to_stdout:
+                stream.close()
+        elapsed = time.perf_counter() - started
+        # Keep the summary out of the data when exporting to stdout.
+        summary = sys.stderr if to_stdout else self.stdout
+        summary.write(f'Exported {count} menu items in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f} rows/s)\n')
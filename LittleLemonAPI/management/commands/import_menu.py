@@ -0,0 +1,49 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import menu_io
+
+
+class Command(BaseCommand):
+    help = (
+        'Create or update categories and menu items from CSV or JSON Lines. Rows are matched to existing '
+        'menu items by title and to categories by slug, and applied in chunks of one transaction each. '
+        'Cached menu responses are invalidated once the import ends, through the cache configured in CACHES: '
+        'serving processes see the new menu only if they share that cache with this command.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read, or '-' for stdin.")
+        parser.add_argument('--format', choices=menu_io.FORMATS, help='Input format. Guessed from the file extension by default.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per chunk (and per transaction).')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or menu_io.guess_format(options['path'])
+        if fmt is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format.')
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        importer = menu_io.Importer()
+        started = time.perf_counter()
+        try:
+            rows = (menu_io.clean_row(line, row) for line, row in menu_io.read_rows(stream, fmt))
+            for chunk in menu_io.chunked(rows, options['batch_size']):
+                importer.apply(chunk)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{importer.counts["rows"]} rows ({self.rate(importer.counts["rows"], started)})')
+        except menu_io.RowError as e:
+            raise CommandError(f'{e} ({importer.counts["rows"]} rows before it were imported)')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            importer.finish()
+        counts = importer.counts
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {counts["rows"]} rows in {time.perf_counter() - started:.2f}s ({self.rate(counts["rows"], started)}): '
+            f'{counts["created"]} created, {counts["updated"]} updated, {counts["unchanged"]} unchanged, '
+            f'{counts["categories_created"]} new categories'
+        ))
+
+    def rate(self, rows, started):
+        return f'{rows / max(time.perf_counter() - started, 1e-9):.0f} rows/s'
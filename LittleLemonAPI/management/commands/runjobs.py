@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ... import events, jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs. Start as many worker processes as needed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker-id', default=jobs.default_worker_id(), help='Name recorded on claimed jobs. Defaults to host:pid.')
+        parser.add_argument('--batch', type=int, default=10, help='Jobs claimed per poll.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit when no jobs are due instead of polling.')
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id']
+        processed = 0
+        pruned_at = 0.0
+        self.stdout.write(f'Worker {worker_id} started')
+        try:
+            while True:
+                close_old_connections()
+                requeued = jobs.requeue_stale()
+                if requeued:
+                    self.stdout.write(f'Requeued {requeued} stale job(s)')
+                if time.monotonic() - pruned_at > 60:
+                    # Stream events are pruned here too, in case no process
+                    # serves streams (see events.py).
+                    events.prune()
+                    pruned_at = time.monotonic()
+                claimed = jobs.run_pending(worker_id, options['batch'])
+                processed += claimed
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Worker {worker_id} processed {processed} job(s)')
@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from ... import replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary onto its stand-in replicas (DATABASE_REPLICAS) for local testing.'
+
+    def handle(self, *args, **options):
+        aliases = replicas.replica_aliases()
+        if not aliases:
+            raise CommandError('No replicas configured; set LITTLELEMON_DB_REPLICAS.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Only SQLite stand-in replicas can be synced; real replicas follow the primary by replication.')
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        try:
+            for alias in aliases:
+                connections[alias].close()
+                target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    # The online backup API gives a consistent copy even while
+                    # the primary is being written to.
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'Synced {alias} ({connections[alias].settings_dict["NAME"]})')
+        finally:
+            source.close()
+        replicas.health.clear()
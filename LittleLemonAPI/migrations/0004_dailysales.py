@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Order = apps.get_model('LittleLemonAPI', 'Order')
+    OrderItem = apps.get_model('LittleLemonAPI', 'OrderItem')
+    DailySales = apps.get_model('LittleLemonAPI', 'DailySales')
+    # Order.total becomes derived from the order's items.
+    item_total = (
+        OrderItem.objects.using(db).filter(order=OuterRef('pk'))
+        .values('order').annotate(total=Sum('price')).values('total')
+    )
+    Order.objects.using(db).filter(pk__in=OrderItem.objects.using(db).values('order')).update(
+        total=Coalesce(Subquery(item_total), Value(0), output_field=DecimalField(max_digits=6, decimal_places=2)),
+    )
+    rows = (
+        OrderItem.objects.using(db).values('order__date', 'menuitem')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('price')).order_by()
+    )
+    DailySales.objects.using(db).bulk_create(
+        [DailySales(date=row['order__date'], menuitem_id=row['menuitem'], quantity=row['quantity'], revenue=row['revenue']) for row in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0003_order_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('menuitem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='LittleLemonAPI.menuitem')),
+            ],
+            options={
+                'unique_together': {('date', 'menuitem')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+from django.db import migrations
+
+SQLITE = [
+    """CREATE VIRTUAL TABLE littlelemon_menuitem_fts USING fts5(
+        title, category, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    "CREATE VIRTUAL TABLE littlelemon_menuitem_fts_vocab USING fts5vocab(littlelemon_menuitem_fts, row)",
+    """INSERT INTO littlelemon_menuitem_fts (rowid, title, category)
+        SELECT m."id", m."title", c."title"
+        FROM "LittleLemonAPI_menuitem" m INNER JOIN "LittleLemonAPI_category" c ON c."id" = m."category_id"
+    """,
+]
+SQLITE_REVERSE = [
+    "DROP TABLE littlelemon_menuitem_fts_vocab",
+    "DROP TABLE littlelemon_menuitem_fts",
+]
+
+POSTGRESQL = [
+    """CREATE TABLE littlelemon_menuitem_search (
+        menuitem_id bigint PRIMARY KEY,
+        document tsvector NOT NULL
+    )""",
+    "CREATE INDEX littlelemon_menuitem_search_document ON littlelemon_menuitem_search USING gin (document)",
+    """INSERT INTO littlelemon_menuitem_search (menuitem_id, document)
+        SELECT m."id", setweight(to_tsvector('simple', m."title"), 'A') || setweight(to_tsvector('simple', c."title"), 'B')
+        FROM "LittleLemonAPI_menuitem" m INNER JOIN "LittleLemonAPI_category" c ON c."id" = m."category_id"
+    """,
+]
+POSTGRESQL_REVERSE = [
+    "DROP TABLE littlelemon_menuitem_search",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0005_job'),
+    ]
+
+    # The search index (see LittleLemonAPI/search.py) is database specific;
+    # other backends get no index and search falls back to icontains.
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE, 'postgresql': POSTGRESQL}),
+            run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRESQL_REVERSE}),
+        ),
+    ]
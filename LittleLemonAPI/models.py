@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import connections, models, router
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # Create your models here.
 class Category(models.Model):
@@ -12,29 +13,226 @@ class MenuItem(models.Model):
     featured = models.BooleanField(db_index=True)
     category = models.ForeignKey(Category, on_delete=models.PROTECT)
     
+class CartManager(models.Manager):
+    def add_items(self, user, quantities):
+        """
+        Add menu items to a user's cart in a single INSERT ... ON CONFLICT DO UPDATE.
+
+        `quantities` maps menu item ids to the quantity to add. Items already in
+        the cart have their quantity increased; unit_price and price are taken
+        from the current menu price. Ids that don't exist are skipped. Returns
+        the number of cart rows inserted or updated.
+        """
+        if not quantities:
+            return 0
+        connection = connections[router.db_for_write(self.model)]
+        qn = connection.ops.quote_name
+        cart = qn(self.model._meta.db_table)
+        menuitem = qn(MenuItem._meta.db_table)
+        values = ', '.join(['(%s, %s)'] * len(quantities))
+        sql = (
+            f'INSERT INTO {cart} ("user_id", "menuitem_id", "quantity", "unit_price", "price") '
+            f'SELECT %s, m."id", v.column2, m."price", m."price" * v.column2 '
+            f'FROM {menuitem} m, (VALUES {values}) v '
+            f'WHERE m."id" = v.column1 '
+            f'ON CONFLICT ("menuitem_id", "user_id") DO UPDATE SET '
+            f'"quantity" = {cart}."quantity" + excluded."quantity", '
+            f'"unit_price" = excluded."unit_price", '
+            f'"price" = excluded."unit_price" * ({cart}."quantity" + excluded."quantity")'
+        )
+        params = [user.pk]
+        for menuitem_id, quantity in quantities.items():
+            params += [menuitem_id, quantity]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
 class Cart(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
     quantity = models.SmallIntegerField()
     unit_price = models.DecimalField(max_digits=6, decimal_places=2)
     price = models.DecimalField(max_digits=6, decimal_places=2)
     
+    objects = CartManager()
+    
     class Meta:
         unique_together = ('menuitem', 'user')
+        indexes = [
+            # A user's cart in id order, read from the index alone (covers
+            # the checkout read too); replaces the index on user.
+            models.Index(fields=['user', 'id', 'menuitem', 'quantity', 'unit_price', 'price'], name='cart_user_covering_idx'),
+        ]
         
 class Order(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="delivery_crew", null=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="delivery_crew", null=True, db_index=False)
     status = models.BooleanField(db_index=True, default=False)
     total = models.DecimalField(max_digits=6, decimal_places=2)
     date = models.DateField(db_index=True)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination of the orders feed seeks on (date, id).
+            models.Index(fields=['date', 'id'], name='order_date_id_idx'),
+            # A customer's orders and a crew member's, newest first, and a
+            # crew member's filtered by status. These lead with the foreign
+            # keys and replace their single-column indexes.
+            models.Index(fields=['user', 'date', 'id'], name='order_user_date_id_idx'),
+            models.Index(fields=['delivery_crew', 'date', 'id'], name='order_crew_date_id_idx'),
+            models.Index(fields=['delivery_crew', 'status', 'date', 'id'], name='order_crew_status_date_idx'),
+        ]
+        
 class OrderItem(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, db_index=False)
     menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
     quantity = models.SmallIntegerField()
     unit_price = models.DecimalField(max_digits=6, decimal_places=2)
     price = models.DecimalField(max_digits=6, decimal_places=2)
     
     class Meta:
-        unique_together = ('order', 'menuitem')
\ No newline at end of file
+        unique_together = ('order', 'menuitem')
+        indexes = [
+            # An order's items in id order, read from the index alone;
+            # replaces the index on order.
+            models.Index(fields=['order', 'id', 'menuitem', 'quantity', 'unit_price', 'price'], name='orderitem_order_covering_idx'),
+        ]
+
+# Order changes for the server-sent event streams (see events.py). Written in
+# the transaction that changes the order, by whichever process changes it, and
+# polled by every process that serves streams.
+class OrderEvent(models.Model):
+    payload = models.JSONField()
+    # Users whose streams see the event besides managers'.
+    recipients = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+class ArchivedOrderManager(models.Manager):
+    def archive(self, order_ids):
+        """
+        Copy the given orders and their items into the archive tables and
+        delete them from the live ones, keeping their ids. Runs four
+        statements and no signals; call it inside a transaction. Returns the
+        number of orders moved.
+        """
+        if not order_ids:
+            return 0
+        connection = connections[router.db_for_write(self.model)]
+        qn = connection.ops.quote_name
+        order = qn(Order._meta.db_table)
+        orderitem = qn(OrderItem._meta.db_table)
+        archived_order = qn(self.model._meta.db_table)
+        archived_item = qn(ArchivedOrderItem._meta.db_table)
+        order_ids = list(order_ids)
+        ids = ', '.join(['%s'] * len(order_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {archived_order} ("id", "user_id", "delivery_crew_id", "total", "date") '
+                f'SELECT "id", "user_id", "delivery_crew_id", "total", "date" FROM {order} WHERE "id" IN ({ids})',
+                order_ids,
+            )
+            cursor.execute(
+                f'INSERT INTO {archived_item} ("id", "order_id", "menuitem_id", "quantity", "unit_price", "price") '
+                f'SELECT "id", "order_id", "menuitem_id", "quantity", "unit_price", "price" FROM {orderitem} WHERE "order_id" IN ({ids})',
+                order_ids,
+            )
+            cursor.execute(f'DELETE FROM {orderitem} WHERE "order_id" IN ({ids})', order_ids)
+            cursor.execute(f'DELETE FROM {order} WHERE "id" IN ({ids})', order_ids)
+            return cursor.rowcount
+
+# Delivered orders moved out of Order/OrderItem by `manage.py archive_orders`,
+# so the live tables and their indexes only hold recent and open orders.
+# Archived orders keep their ids and are never modified; the status column is
+# dropped (they were all delivered) and items keep their menu item id even
+# after the menu item is deleted.
+class ArchivedOrder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', db_index=False)
+    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='+', null=True, db_index=False)
+    total = models.DecimalField(max_digits=6, decimal_places=2)
+    date = models.DateField()
+    
+    objects = ArchivedOrderManager()
+    
+    class Meta:
+        indexes = [
+            # The same access paths as the live orders feed.
+            models.Index(fields=['date', 'id'], name='archivedorder_date_id_idx'),
+            models.Index(fields=['user', 'date', 'id'], name='archivedorder_user_date_idx'),
+            models.Index(fields=['delivery_crew', 'date', 'id'], name='archivedorder_crew_date_idx'),
+        ]
+        
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, db_index=False)
+    menuitem = models.ForeignKey(MenuItem, on_delete=models.DO_NOTHING, related_name='+', db_constraint=False, db_index=False)
+    quantity = models.SmallIntegerField()
+    unit_price = models.DecimalField(max_digits=6, decimal_places=2)
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'id'], name='archivedorderitem_order_idx'),
+        ]
+
+class DailySalesManager(models.Manager):
+    def record(self, date, lines, sign=1):
+        """
+        Fold order lines into the rollup for `date` with a single
+        INSERT ... ON CONFLICT DO UPDATE. `lines` are (menuitem_id, quantity,
+        price) tuples; pass sign=-1 to take a deleted order back out.
+        """
+        lines = list(lines)
+        if not lines:
+            return
+        connection = connections[router.db_for_write(self.model)]
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        values = ', '.join(['(%s, %s, %s, %s)'] * len(lines))
+        sql = (
+            f'INSERT INTO {table} ("date", "menuitem_id", "quantity", "revenue") VALUES {values} '
+            f'ON CONFLICT ("date", "menuitem_id") DO UPDATE SET '
+            f'"quantity" = {table}."quantity" + excluded."quantity", '
+            f'"revenue" = {table}."revenue" + excluded."revenue"'
+        )
+        params = []
+        for menuitem_id, quantity, price in lines:
+            params += [date, menuitem_id, sign * quantity, sign * price]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+# Units sold and revenue per menu item per day, kept up to date by checkout and
+# order deletion so sales reports never have to scan orders.
+class DailySales(models.Model):
+    date = models.DateField()
+    menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    objects = DailySalesManager()
+    
+    class Meta:
+        unique_together = ('date', 'menuitem')
+
+# Work deferred out of the request path, run by `manage.py runjobs` (see jobs.py).
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (FAILED, 'Failed')]
+    
+    name = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    locked_by = models.CharField(max_length=128, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            # Workers poll for the oldest due job in a status.
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
@@ -0,0 +1,143 @@
+import base64
+import binascii
+import datetime
+import math
+
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CustomPagination(pagination.PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class AsyncPagination(CustomPagination):
+    """
+    CustomPagination for async views: the same query parameters and response
+    shape, but counted with acount() and fetched with async iteration.
+    """
+
+    async def apaginate_queryset(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.count = await queryset.acount()
+        self.num_pages = max(math.ceil(self.count / page_size), 1)
+        number = request.query_params.get(self.page_query_param) or 1
+        if number in self.last_page_strings:
+            number = self.num_pages
+        try:
+            self.number = int(number)
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if not 1 <= self.number <= self.num_pages:
+            raise NotFound(self.invalid_page_message)
+        offset = (self.number - 1) * page_size
+        return [obj async for obj in queryset[offset:offset + page_size]]
+
+    def get_next_link(self):
+        if self.number >= self.num_pages:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def get_paginated_data(self, data):
+        return {
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+
+class OrderCursorPagination(pagination.BasePagination):
+    """
+    Keyset pagination over orders, newest first.
+
+    The cursor is an opaque token encoding the (date, id) of the last order on
+    the previous page. Each page seeks past that position using the
+    (date, id) index instead of counting an OFFSET, so page N costs the same as
+    page 1, and orders placed while a client is paging never shift the rows
+    it has not seen yet. Pass an empty `cursor=` to request the first page.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def encode_cursor(self, order):
+        # Pages may hold Order instances or .values() rows.
+        date, pk = (order['date'], order['id']) if isinstance(order, dict) else (order.date, order.pk)
+        raw = f'{date.isoformat()}:{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+            date, pk = raw.split(':')
+            return datetime.date.fromisoformat(date), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """The unevaluated query for the requested page, plus one row to detect a next page."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by('-date', '-id')
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            date, pk = self.decode_cursor(token)
+            # Equivalent to (date, id) < (:date, :pk); the leading date range
+            # lets the database seek into the index.
+            queryset = queryset.filter(date__lte=date).filter(Q(date__lt=date) | Q(id__lt=pk))
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {'next': self.get_next_link(), 'results': data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
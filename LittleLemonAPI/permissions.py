@@ -1,5 +1,6 @@
 from rest_framework.permissions import IsAuthenticated
+from .roles import MANAGER, has_role
 
 class IsManagerUser(IsAuthenticated):
     def has_permission(self, request, view):
-        return bool(request.user and request.user.groups.filter(name='Manager').exists())
+        return bool(request.user and has_role(request, MANAGER))
@@ -0,0 +1,51 @@
+"""
+JSON rendering for hot list responses.
+
+orjson is used when it is installed; it serializes dicts, lists, dates and
+datetimes in C and only calls back into Python for Decimal. Without it the
+renderer falls back to DRF's own encoder, so it is an optional dependency.
+"""
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class DecimalStringEncoder(JSONEncoder):
+    # Match DRF's COERCE_DECIMAL_TO_STRING behaviour: .values() rows hold the
+    # Decimals a DecimalField would have turned into strings, and DRF's own
+    # encoder would write as floats. The database converter quantizes them,
+    # so str() keeps the places.
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+_fallback_encoder = DecimalStringEncoder()
+
+
+def dumps(data):
+    if orjson is None:
+        return FastJSONRenderer().render(data)
+    # The stdlib encoder DRF uses turns int dict keys into strings, and DRF
+    # writes UTC datetimes with a Z; so do we.
+    return orjson.dumps(data, default=_fallback_encoder.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+class FastJSONRenderer(JSONRenderer):
+    encoder_class = DecimalStringEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Indented output (?indent / Accept: ...; indent=N) is for humans; let
+        # DRF handle it.
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
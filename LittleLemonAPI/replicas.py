@@ -0,0 +1,233 @@
+"""
+Read replicas: ReplicaRouter sends the reads of safe (GET/HEAD/OPTIONS)
+requests to a replica and everything else to the primary.
+
+ReplicaMiddleware picks one replica per request, so all of a response's
+queries see the same snapshot. Reads go to the primary when the request
+writes, when it runs inside a transaction on the primary, when no replica is
+healthy, and for REPLICA_STICKY_SECONDS after the same client's last write,
+so users always see their own changes. Code running outside a request
+(commands, jobs) reads from the primary, and so does authentication: the
+models in REPLICA_PRIMARY_MODELS (tokens, users and their groups) are always
+read from the primary, so a token issued by a login is valid on the very next
+request, whichever credential that login was made with.
+
+A replica is healthy while it answers and, on PostgreSQL, lags by less than
+REPLICA_MAX_LAG seconds. The result is trusted for REPLICA_HEALTH_INTERVAL
+seconds; a replica that fails mid-request is skipped for that long and the
+request is retried on the primary.
+
+Replicas are the aliases named in DATABASE_REPLICAS. Locally they can be
+SQLite copies of the primary refreshed with `manage.py sync_replicas`. With
+none configured the middleware removes itself and never touches the cache.
+"""
+import hashlib
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# The replica serving the current request's reads; None means the primary.
+_read_alias = ContextVar('littlelemon_read_alias', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+@contextmanager
+def primary_reads():
+    """
+    Read from the primary inside the block. For bodies cached under a version
+    that a write just bumped: built from a replica that hasn't caught up, they
+    would be served stale until the next write.
+    """
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_lag(connection):
+    """Seconds the replica is behind its primary. Runs on the driver connection, so it isn't counted as a request query."""
+    connection.ensure_connection()
+    with connection.wrap_database_errors:
+        cursor = connection.connection.cursor()
+        try:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+                    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+                )
+                lag = cursor.fetchone()[0]
+                return float(lag or 0)
+            # SQLite stand-ins are whole copies: no lag to measure, but make
+            # sure the file really is a copy of the database and not empty.
+            cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+            cursor.fetchone()
+            return 0.0
+        finally:
+            cursor.close()
+
+
+class ReplicaHealth:
+    def __init__(self):
+        self._checked = {}  # alias -> (trusted until, healthy)
+        self._lock = threading.Lock()
+
+    def check(self, alias):
+        try:
+            return replica_lag(connections[alias]) <= getattr(settings, 'REPLICA_MAX_LAG', 5)
+        except DatabaseError:
+            return False
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._checked.get(alias)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        healthy = self.check(alias)
+        self._record(alias, healthy)
+        return healthy
+
+    def mark_down(self, alias):
+        self._record(alias, False)
+
+    def _record(self, alias, healthy):
+        with self._lock:
+            self._checked[alias] = (time.monotonic() + getattr(settings, 'REPLICA_HEALTH_INTERVAL', 5), healthy)
+
+    def clear(self):
+        with self._lock:
+            self._checked.clear()
+
+
+health = ReplicaHealth()
+_turns = itertools.count()
+
+
+def choose_replica():
+    """A healthy replica, round-robin, or None to read from the primary."""
+    aliases = replica_aliases()
+    if not aliases:
+        return None
+    start = next(_turns)
+    for offset in range(len(aliases)):
+        alias = aliases[(start + offset) % len(aliases)]
+        if health.is_healthy(alias):
+            return alias
+    return None
+
+
+def client_key(request):
+    """Identifies the client across requests: its Authorization header, else its session."""
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return 'littlelemon:sticky:' + hashlib.blake2b(credential.encode(), digest_size=16).hexdigest()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in getattr(settings, 'REPLICA_PRIMARY_MODELS', ()):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Follow relations on the database the instance came from.
+            return instance._state.db
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Chooses where each request reads from and remembers which clients just wrote."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        # Without replicas every read is on the primary: no replica to choose
+        # and no sticky markers to keep.
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = client_key(request)
+        alias = None
+        if request.method in SAFE_METHODS:
+            alias = choose_replica()
+            # The marker only matters when a replica could serve the read.
+            if alias is not None and key and cache.get(key):
+                alias = None
+        token = _read_alias.set(alias)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if self.wrote(request, response) and key:
+            cache.set(key, True, timeout=getattr(settings, 'REPLICA_STICKY_SECONDS', 10))
+        return response
+
+    async def __acall__(self, request):
+        key = client_key(request)
+        alias = None
+        if request.method in SAFE_METHODS:
+            alias = await sync_to_async(choose_replica)()
+            if alias is not None and key and await cache.aget(key):
+                alias = None
+        token = _read_alias.set(alias)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if self.wrote(request, response) and key:
+            await cache.aset(key, True, timeout=getattr(settings, 'REPLICA_STICKY_SECONDS', 10))
+        return response
+
+    def wrote(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
+
+    def process_exception(self, request, exception):
+        alias = _read_alias.get()
+        if alias is None or not isinstance(exception, DatabaseError):
+            return None
+        health.mark_down(alias)
+        match = request.resolver_match
+        if match is None or iscoroutinefunction(match.func):
+            return None
+        # Reads have no side effects, so the view can simply run again.
+        _read_alias.set(None)
+        return match.func(request, *match.args, **match.kwargs)
@@ -0,0 +1,170 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+
+from .caching import TTLCache
+
+MANAGER = 'Manager'
+DELIVERY_CREW = 'Delivery Crew'
+CUSTOMER = 'Customer'
+
+# Sent with `user_ids` whenever group membership changes.
+roles_changed = Signal()
+
+# user id -> (generation, frozenset of group names), shared by every request in
+# this process. An entry is only used while the user's generation in the Django
+# cache (shared by every worker) is still the one it was loaded under, so a
+# membership change made through any worker takes effect on the next request.
+_role_cache = TTLCache(
+    ttl=getattr(settings, 'ROLE_CACHE_TTL', 300),
+    max_entries=getattr(settings, 'ROLE_CACHE_MAX_ENTRIES', 10000),
+)
+
+# group name -> Group
+_groups = TTLCache(ttl=getattr(settings, 'ROLE_CACHE_TTL', 300), max_entries=64)
+
+
+def generation_key(user_id):
+    return f'littlelemon:role-generation:{user_id}'
+
+
+def _cached_roles(user_id, generation):
+    entry = _role_cache.get(user_id)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+    return None
+
+
+def get_user_roles(user):
+    """
+    Return the names of all groups `user` belongs to: one cache read on a hit,
+    plus a single query on a miss.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+    # Read before the groups, so a change committed in between invalidates
+    # what is loaded here.
+    generation = cache.get(generation_key(user.pk))
+    roles = _cached_roles(user.pk, generation)
+    if roles is None:
+        roles = frozenset(user.groups.values_list('name', flat=True))
+        _role_cache.set(user.pk, (generation, roles))
+    return roles
+
+
+async def aget_user_roles(user):
+    """Async counterpart of get_user_roles() for async views."""
+    if not user or not user.is_authenticated:
+        return frozenset()
+    generation = await cache.aget(generation_key(user.pk))
+    roles = _cached_roles(user.pk, generation)
+    if roles is None:
+        roles = frozenset([name async for name in user.groups.values_list('name', flat=True)])
+        _role_cache.set(user.pk, (generation, roles))
+    return roles
+
+
+# DRF wraps the Django request; memoize on the underlying HttpRequest so
+# middleware, permissions and views all share the same answer.
+def _http_request(request):
+    return getattr(request, '_request', request)
+
+
+def get_roles(request):
+    """Resolve the requesting user's roles once per request."""
+    http_request = _http_request(request)
+    roles = getattr(http_request, '_littlelemon_roles', None)
+    if roles is None:
+        roles = get_user_roles(request.user)
+        http_request._littlelemon_roles = roles
+    return roles
+
+
+async def aget_roles(request):
+    http_request = _http_request(request)
+    roles = getattr(http_request, '_littlelemon_roles', None)
+    if roles is None:
+        roles = await aget_user_roles(request.user)
+        http_request._littlelemon_roles = roles
+    return roles
+
+
+def has_role(request, name):
+    return name in get_roles(request)
+
+
+def set_request_roles(request, roles):
+    """Record roles already known for this request, e.g. by a cached authentication backend."""
+    _http_request(request)._littlelemon_roles = roles
+
+
+async def ahas_role(request, name):
+    return name in await aget_roles(request)
+
+
+def invalidate_roles(*user_ids):
+    """Drop the cached roles of users whose group membership changed, in every worker, now and again once the current transaction commits."""
+    if not user_ids:
+        return
+    user_ids = frozenset(user_ids)
+    _forget_roles(user_ids)
+    # Until the commit, a concurrent request can still read and cache the old
+    # membership.
+    transaction.on_commit(lambda: _forget_roles(user_ids))
+
+
+def _forget_roles(user_ids):
+    for user_id in user_ids:
+        _role_cache.delete(user_id)
+    # Other workers drop their entries on their next read.
+    cache.set_many({generation_key(user_id): time.time_ns() for user_id in user_ids}, timeout=None)
+    roles_changed.send(sender=None, user_ids=user_ids)
+
+
+def get_group(name):
+    """The Group called `name`, looked up once per ROLE_CACHE_TTL. Raises Group.DoesNotExist."""
+    group = _groups.get(name)
+    if group is None:
+        group = Group.objects.get(name=name)
+        _groups.set(name, group)
+    return group
+
+
+def forget_groups():
+    _groups.clear()
+
+
+def add_members(group, user_ids):
+    """
+    Add the users to `group` with a single INSERT into the auth membership
+    table, returning the ids that were not members yet.
+    """
+    membership = User.groups.through
+    user_ids = set(user_ids)
+    existing = set(
+        membership.objects.filter(group_id=group.pk, user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    added = user_ids - existing
+    membership.objects.bulk_create(
+        [membership(user_id=user_id, group_id=group.pk) for user_id in sorted(added)],
+        ignore_conflicts=True,
+    )
+    # Bulk writes skip m2m_changed, which normally does this.
+    invalidate_roles(*added)
+    return added
+
+
+def remove_members(group, user_ids):
+    """Remove the users from `group` with a single DELETE, returning the ids that were members."""
+    membership = User.groups.through
+    removed = set(
+        membership.objects.filter(group_id=group.pk, user_id__in=set(user_ids)).values_list('user_id', flat=True)
+    )
+    if removed:
+        membership.objects.filter(group_id=group.pk, user_id__in=removed).delete()
+    invalidate_roles(*removed)
+    return removed
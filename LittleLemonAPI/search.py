@@ -0,0 +1,203 @@
+"""
+Full-text search over menu item and category titles.
+
+On SQLite the index is an FTS5 table (plus an fts5vocab view of its terms); on
+PostgreSQL it is a tsvector table with a GIN index. Both are created by
+migration 0006 and kept in sync by the MenuItem/Category signals. Other
+databases have no index and search falls back to DRF's icontains SearchFilter.
+
+Every query word matches as a prefix. A word that is not the prefix of any
+indexed term is also matched against close spellings from the index
+vocabulary, so "margarita" still finds "Margherita". Results are ranked with
+bm25 (SQLite) or ts_rank (PostgreSQL), titles weighing more than categories.
+"""
+import bisect
+import difflib
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, router
+
+from . import catalog
+from .caching import TTLCache
+from .models import Category, MenuItem
+
+FTS_TABLE = 'littlelemon_menuitem_fts'
+VOCAB_TABLE = 'littlelemon_menuitem_fts_vocab'
+PG_TABLE = 'littlelemon_menuitem_search'
+
+RANK = 'search_rank'
+
+# (database alias, catalog version) -> Vocabulary
+_vocabularies = TTLCache(ttl=getattr(settings, 'CATALOG_CACHE_TTL', 3600), max_entries=8)
+
+_word = re.compile(r'[^\W_]+')
+
+
+def is_supported(connection):
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def words(text):
+    """Lower-cased, accent-stripped words, matching how the index tokenizes."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return _word.findall(''.join(c for c in text if not unicodedata.combining(c)))
+
+
+def _document_sql(connection):
+    qn = connection.ops.quote_name
+    return f'FROM {qn(MenuItem._meta.db_table)} m INNER JOIN {qn(Category._meta.db_table)} c ON c."id" = m."category_id"'
+
+
+def index_items(where, params, using=None):
+    """(Re)index the menu items matching `where` (SQL over `m`, the menu item, and `c`, its category)."""
+    connection = connections[using or router.db_for_write(MenuItem)]
+    if not is_supported(connection):
+        return
+    source = _document_sql(connection)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT m."id" {source} WHERE {where})', params)
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, category) SELECT m."id", m."title", c."title" {source} WHERE {where}', params)
+        else:
+            cursor.execute(
+                f'INSERT INTO {PG_TABLE} (menuitem_id, document) '
+                f"SELECT m.\"id\", setweight(to_tsvector('simple', m.\"title\"), 'A') || setweight(to_tsvector('simple', c.\"title\"), 'B') "
+                f'{source} WHERE {where} '
+                f'ON CONFLICT (menuitem_id) DO UPDATE SET document = excluded.document',
+                params,
+            )
+
+
+def index_menuitem(pk, using=None):
+    index_items('m."id" = %s', [pk], using)
+
+
+def index_category(pk, using=None):
+    index_items('m."category_id" = %s', [pk], using)
+
+
+def remove_menuitem(pk, using=None):
+    connection = connections[using or router.db_for_write(MenuItem)]
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+        else:
+            cursor.execute(f'DELETE FROM {PG_TABLE} WHERE menuitem_id = %s', [pk])
+
+
+def rebuild(using=None):
+    """Reindex every menu item, e.g. after bulk writes that bypass the signals."""
+    connection = connections[using or router.db_for_write(MenuItem)]
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE if connection.vendor == "sqlite" else PG_TABLE}')
+    index_items('1 = 1', [], connection.alias)
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Vocabulary:
+    """
+    The indexed terms, sorted for prefix checks and with a trigram index so a
+    misspelled word is only compared with terms it shares trigrams with.
+    """
+
+    def __init__(self, terms):
+        self.terms = sorted(terms)
+        self._postings = defaultdict(list)
+        for i, term in enumerate(self.terms):
+            for gram in trigrams(term):
+                self._postings[gram].append(i)
+
+    def has_prefix(self, word):
+        i = bisect.bisect_left(self.terms, word)
+        return i < len(self.terms) and self.terms[i].startswith(word)
+
+    def similar(self, word, n, cutoff):
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        # A close spelling shares most of its trigrams with the word.
+        needed = max(len(grams) // 2, 1)
+        candidates = [self.terms[i] for i, count in shared.items() if count >= needed]
+        return difflib.get_close_matches(word, candidates, n=n, cutoff=cutoff)
+
+
+def _load_vocabulary(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'SELECT term FROM {VOCAB_TABLE}')
+        else:
+            cursor.execute(f"SELECT word FROM ts_stat('SELECT document FROM {PG_TABLE}')")
+        return Vocabulary(row[0] for row in cursor.fetchall())
+
+
+def get_vocabulary(using):
+    key = (using, catalog.get_version())
+    vocabulary = _vocabularies.get(key)
+    if vocabulary is None:
+        vocabulary = _load_vocabulary(connections[using])
+        _vocabularies.set(key, vocabulary)
+    return vocabulary
+
+
+async def aget_vocabulary(using):
+    key = (using, await catalog.aget_version())
+    vocabulary = _vocabularies.get(key)
+    if vocabulary is None:
+        vocabulary = await sync_to_async(_load_vocabulary)(connections[using])
+        _vocabularies.set(key, vocabulary)
+    return vocabulary
+
+
+def alternatives(word, vocabulary):
+    """The (term, is_prefix) pairs one query word matches."""
+    if len(word) < 3 or vocabulary.has_prefix(word):
+        return [(word, True)]
+    close = vocabulary.similar(word, 3, getattr(settings, 'SEARCH_TYPO_CUTOFF', 0.75))
+    return [(word, True)] + [(term, False) for term in close]
+
+
+def build_query(vendor, text, vocabulary):
+    """Translate user input into an FTS5 MATCH or tsquery expression; None when there's nothing to search for."""
+    groups = [alternatives(word, vocabulary) for word in words(text)]
+    if not groups:
+        return None
+    if vendor == 'sqlite':
+        return ' AND '.join(
+            '(' + ' OR '.join(f'"{term}"' + ('*' if prefix else '') for term, prefix in group) + ')' for group in groups
+        )
+    return ' & '.join(
+        '(' + ' | '.join(term + (':*' if prefix else '') for term, prefix in group) + ')' for group in groups
+    )
+
+
+def apply(queryset, expression):
+    """Restrict a MenuItem queryset to matches of `expression` and annotate it with RANK (lower is better)."""
+    connection = connections[queryset.db]
+    menuitem = connection.ops.quote_name(MenuItem._meta.db_table)
+    if connection.vendor == 'sqlite':
+        return queryset.extra(
+            select={RANK: f'bm25({FTS_TABLE}, 10.0, 2.0)'},
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {menuitem}."id"', f'{FTS_TABLE} MATCH %s'],
+            params=[expression],
+        )
+    return queryset.extra(
+        select={RANK: f"-ts_rank({PG_TABLE}.document, to_tsquery('simple', %s))"},
+        select_params=[expression],
+        tables=[PG_TABLE],
+        where=[f'{PG_TABLE}.menuitem_id = {menuitem}."id"', f"{PG_TABLE}.document @@ to_tsquery('simple', %s)"],
+        params=[expression],
+    )
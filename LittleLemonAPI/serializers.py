@@ -1,7 +1,16 @@
 from rest_framework import serializers
-from .models import Category, MenuItem, Cart, Order, OrderItem
+from .models import Category, MenuItem, Cart, Order, OrderItem, ArchivedOrder, ArchivedOrderItem
 from django.contrib.auth.models import User
 
+def values_for(serializer_class, queryset):
+    """
+    Rows shaped exactly like `serializer_class` output, straight from
+    .values(). For read-only list endpoints: no model instances are built and
+    no per-field serializer code runs. Only valid for serializers whose fields
+    are all concrete columns or foreign keys (emitted as ids).
+    """
+    return queryset.values(*serializer_class.Meta.fields)
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -10,7 +19,7 @@ class CategorySerializer(serializers.ModelSerializer):
 class MenuItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = MenuItem
-        fields = '__all__'
+        fields = ['id', 'title', 'price', 'featured', 'category']
 
 class CartSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,12 +33,31 @@ class CartSerializer(serializers.ModelSerializer):
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
-        fields = ['user', 'delivery_clew', 'status', 'total', 'date']
+        fields = ['id', 'user', 'delivery_crew', 'status', 'total', 'date']
+        # Always the sum of the order's item prices; set by checkout.
+        read_only_fields = ['total']
         
 class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ['order', 'menuitem', 'quantity', 'unit_price', 'price']
+
+class OrderWithItemsSerializer(OrderSerializer):
+    # Expects orderitem_set to be prefetched by the view.
+    items = OrderItemSerializer(source='orderitem_set', many=True, read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        fields = OrderSerializer.Meta.fields + ['items']
+        
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedOrder
+        fields = ['id', 'user', 'delivery_crew', 'total', 'date']
+
+class ArchivedOrderItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedOrderItem
+        fields = ['order', 'menuitem', 'quantity', 'unit_price', 'price']
         
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
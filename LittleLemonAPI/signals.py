@@ -0,0 +1,113 @@
+from django.contrib.auth.models import Group, User
+from django.contrib.auth.signals import user_logged_out
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication, catalog, events, search, usercache
+from .db import configure_sqlite
+from .instrumentation import install_query_counter
+from .models import Cart, Category, MenuItem, Order
+from .roles import forget_groups, invalidate_roles, roles_changed
+
+connection_created.connect(configure_sqlite)
+connection_created.connect(install_query_counter)
+
+
+@receiver([post_save, post_delete], sender=MenuItem)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_catalog(sender, **kwargs):
+    catalog.invalidate()
+
+
+@receiver(post_save, sender=MenuItem)
+def index_menuitem(sender, instance, using, **kwargs):
+    search.index_menuitem(instance.pk, using)
+
+
+@receiver(post_delete, sender=MenuItem)
+def unindex_menuitem(sender, instance, using, **kwargs):
+    search.remove_menuitem(instance.pk, using)
+
+
+# Items are indexed with their category's title.
+@receiver(post_save, sender=Category)
+def reindex_category(sender, instance, created, using, **kwargs):
+    if not created:
+        search.index_category(instance.pk, using)
+
+
+# Order streams report status and crew changes. Remember the values each
+# instance was loaded with so saves that change neither publish nothing.
+@receiver(post_init, sender=Order)
+def remember_order_state(sender, instance, **kwargs):
+    instance._published_state = (instance.status, instance.delivery_crew_id)
+
+
+@receiver(post_save, sender=Order)
+def publish_order_change(sender, instance, created, **kwargs):
+    previous_status, previous_crew_id = instance._published_state
+    instance._published_state = (instance.status, instance.delivery_crew_id)
+    if created or (previous_status, previous_crew_id) == instance._published_state:
+        return
+    crew_id = previous_crew_id if previous_crew_id != instance.delivery_crew_id else None
+    events.publish_order_change(instance, previous_crew_id=crew_id)
+
+
+# Covers checkout (which also empties the cart), crew assignment, status
+# updates and deletion.
+@receiver([post_save, post_delete], sender=Order)
+def bump_order_owner(sender, instance, **kwargs):
+    usercache.bump(instance.user_id)
+
+
+# Deleting a menu item cascades to cart and order lines, which send nothing
+# usercache listens to; bump their owners while the lines still exist.
+@receiver(pre_delete, sender=MenuItem)
+def bump_menuitem_buyers(sender, instance, using, **kwargs):
+    carts = Cart.objects.using(using).filter(menuitem=instance).values_list('user_id', flat=True)
+    orders = Order.objects.using(using).filter(orderitem__menuitem=instance).values_list('user_id', flat=True)
+    for user_id in carts.union(orders):
+        usercache.bump(user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_changed_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_roles(instance.pk)
+    elif pk_set:
+        invalidate_roles(*pk_set)
+    elif action == 'pre_clear':
+        # group.user_set.clear() doesn't report which users it removes.
+        invalidate_roles(*instance.user_set.values_list('pk', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Group)
+def forget_changed_group(sender, **kwargs):
+    forget_groups()
+
+
+# roles_changed is already sent again once the change commits.
+@receiver(roles_changed)
+def invalidate_tokens_on_role_change(sender, user_ids, **kwargs):
+    authentication.forget_user_tokens(user_ids)
+
+
+# Covers password changes, deactivation and any other edit of the user.
+@receiver(post_save, sender=User)
+def invalidate_tokens_on_user_save(sender, instance, **kwargs):
+    authentication.invalidate_user_tokens(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_tokens_on_logout(sender, user, **kwargs):
+    if user is not None:
+        authentication.invalidate_user_tokens(user.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    authentication.invalidate_user_tokens(instance.user_id)
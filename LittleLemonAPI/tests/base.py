@@ -0,0 +1,78 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .. import authentication, catalog, instrumentation, replicas, roles, throttling, usercache
+from ..models import Category, MenuItem
+
+
+def reset_state():
+    """Forget everything the process caches between requests."""
+    cache.clear()
+    catalog._entries.clear()
+    usercache._entries.clear()
+    roles._role_cache.clear()
+    roles._groups.clear()
+    authentication._token_cache.clear()
+    throttling._buckets = None
+    replicas.health.clear()
+    instrumentation.counters.reset()
+    instrumentation.stats.reset()
+
+
+class TemporaryCacheMixin:
+    """
+    Gives the test class a file-based cache of its own, removed afterwards:
+    shared between processes like the backends checks.py requires, so
+    versions and sticky markers behave as they do in production.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        location = tempfile.mkdtemp(prefix='littlelemon-test-cache-')
+        cls.addClassCleanup(shutil.rmtree, location, ignore_errors=True)
+        caches = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        })
+        caches.enable()
+        cls.addClassCleanup(caches.disable)
+        super().setUpClass()
+
+
+class APITestMixin(TemporaryCacheMixin):
+    def setUp(self):
+        super().setUp()
+        reset_state()
+        for name in (roles.MANAGER, roles.DELIVERY_CREW, roles.CUSTOMER):
+            Group.objects.get_or_create(name=name)
+
+    def make_user(self, username, *group_names):
+        """A user in `group_names` and an APIClient authenticated as them."""
+        # Tokens only; hashing a password would dominate the setup time.
+        user = User.objects.create(username=username, password='!')
+        user.groups.add(*Group.objects.filter(name__in=group_names))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=user).key)
+        return user, client
+
+    def make_menu(self, count=3):
+        category = Category.objects.create(slug='mains', title='Mains')
+        return [
+            MenuItem.objects.create(title=f'Dish {i}', price=f'{i + 1}.50', featured=False, category=category)
+            for i in range(count)
+        ]
+
+
+class APITestCase(APITestMixin, TestCase):
+    pass
+
+
+# For code that commits, or that has to be measured without the savepoints
+# TestCase wraps every atomic block in.
+class APITransactionTestCase(APITestMixin, TransactionTestCase):
+    pass
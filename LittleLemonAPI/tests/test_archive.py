@@ -0,0 +1,61 @@
+import datetime
+from decimal import Decimal
+
+from .. import archive
+from ..models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from ..roles import CUSTOMER, DELIVERY_CREW, MANAGER
+from .base import APITestCase
+
+
+class ArchiveTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer, self.customer_client = self.make_user('customer', CUSTOMER)
+        self.other, self.other_client = self.make_user('other', CUSTOMER)
+        self.crew, self.crew_client = self.make_user('crew', DELIVERY_CREW)
+        self.items = self.make_menu()
+        self.today = datetime.date.today()
+
+    def make_order(self, days_ago, delivered=True, user=None):
+        order = Order.objects.create(
+            user=user or self.customer, delivery_crew=self.crew, status=delivered, total='3.00',
+            date=self.today - datetime.timedelta(days=days_ago),
+        )
+        OrderItem.objects.create(order=order, menuitem=self.items[0], quantity=2, unit_price='1.50', price='3.00')
+        return order
+
+    def test_moves_orders_and_items_keeping_their_ids(self):
+        order = self.make_order(100)
+        item = order.orderitem_set.get()
+        self.assertEqual(ArchivedOrder.objects.archive([order.pk]), 1)
+        self.assertFalse(Order.objects.filter(pk=order.pk).exists())
+        self.assertFalse(OrderItem.objects.filter(pk=item.pk).exists())
+        archived = ArchivedOrder.objects.get(pk=order.pk)
+        self.assertEqual((archived.user_id, archived.delivery_crew_id, archived.total), (self.customer.pk, self.crew.pk, Decimal('3.00')))
+        archived_item = ArchivedOrderItem.objects.get(pk=item.pk)
+        self.assertEqual((archived_item.order_id, archived_item.menuitem_id, archived_item.quantity), (order.pk, self.items[0].pk, 2))
+
+    def test_batches_only_take_old_delivered_orders_oldest_first(self):
+        old = [self.make_order(days) for days in (120, 110, 100)]
+        undelivered = self.make_order(130, delivered=False)
+        recent = self.make_order(10)
+        before = archive.cutoff(90)
+        self.assertEqual(archive.archive_batch(before, batch_size=2), 2)
+        self.assertEqual(set(ArchivedOrder.objects.values_list('id', flat=True)), {old[0].pk, old[1].pk})
+        self.assertEqual(archive.archive_batch(before, batch_size=2), 1)
+        self.assertEqual(archive.archive_batch(before, batch_size=2), 0)
+        self.assertEqual(set(Order.objects.values_list('id', flat=True)), {undelivered.pk, recent.pk})
+
+    def test_archived_orders_keep_their_visibility(self):
+        mine = self.make_order(100)
+        theirs = self.make_order(100, user=self.other)
+        archive.archive_batch(archive.cutoff(90))
+        _, manager_client = self.make_user('manager', MANAGER)
+        ids = lambda client: {order['id'] for order in client.get('/api/orders/archive').json()['results']}
+        self.assertEqual(ids(self.customer_client), {mine.pk})
+        self.assertEqual(ids(self.crew_client), {mine.pk, theirs.pk})
+        self.assertEqual(ids(manager_client), {mine.pk, theirs.pk})
+        self.assertEqual(self.other_client.get(f'/api/orders/archive/{mine.pk}').status_code, 403)
+        response = self.customer_client.get(f'/api/orders/archive/{mine.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
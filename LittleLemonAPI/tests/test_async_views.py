@@ -0,0 +1,46 @@
+import datetime
+
+from ..models import Cart, Order
+from ..roles import CUSTOMER, DELIVERY_CREW, MANAGER
+from .base import APITestCase
+
+
+class AsyncViewParityTests(APITestCase):
+    """The async/ routes answer exactly like their sync counterparts."""
+
+    def setUp(self):
+        super().setUp()
+        self.items = self.make_menu(12)
+        self.customer, self.customer_client = self.make_user('customer', CUSTOMER)
+        self.crew, self.crew_client = self.make_user('crew', DELIVERY_CREW)
+        _, self.manager_client = self.make_user('manager', MANAGER)
+        Cart.objects.add_items(self.customer, {self.items[0].pk: 2, self.items[3].pk: 1})
+        for days in range(3):
+            Order.objects.create(
+                user=self.customer, delivery_crew=self.crew if days else None, total='1.00',
+                date=datetime.date(2024, 5, 10) - datetime.timedelta(days=days),
+            )
+
+    def assertSameResponse(self, client, path, query=''):
+        sync = client.get(f'/api/{path}{query}')
+        asynchronous = client.get(f'/api/async/{path}{query}')
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        # Next/previous links differ by the async/ prefix.
+        self.assertEqual(asynchronous.content.replace(b'/async', b''), sync.content)
+
+    def test_menu_items(self):
+        for query in ('', '?page=2', '?featured=false&ordering=-price', '?search=dish', '?page=9', '?price=x'):
+            with self.subTest(query=query):
+                self.assertSameResponse(self.client, 'menu-items', query)
+        self.assertSameResponse(self.client, f'menu-items/{self.items[2].pk}')
+        self.assertSameResponse(self.client, 'menu-items/999999')
+
+    def test_cart(self):
+        self.assertSameResponse(self.customer_client, 'cart/menu-items')
+        self.assertSameResponse(self.client, 'cart/menu-items')
+
+    def test_orders_for_each_role(self):
+        for client in (self.customer_client, self.crew_client, self.manager_client):
+            for query in ('', '?cursor=&page_size=2', '?status=false'):
+                with self.subTest(query=query):
+                    self.assertSameResponse(client, 'orders', query)
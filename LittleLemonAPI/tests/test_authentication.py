@@ -0,0 +1,43 @@
+from .. import authentication, roles
+from ..roles import CUSTOMER, MANAGER
+from .base import APITestCase
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.client = self.make_user('manager', MANAGER)
+        self.token = self.user.auth_token.key
+        self.assertEqual(self.client.get('/api/reports/sales').status_code, 200)
+
+    def test_hits_do_not_query_the_database(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(authentication._from_cache(self.token)[0], self.user)
+
+    def test_logout_forgets_the_token(self):
+        self.assertEqual(self.client.post('/auth/token/logout/').status_code, 204)
+        self.assertEqual(self.client.get('/api/reports/sales').status_code, 401)
+
+    def test_user_saves_are_seen_at_once(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/reports/sales').status_code, 401)
+
+    def test_group_changes_are_seen_at_once(self):
+        roles.remove_members(roles.get_group(MANAGER), [self.user.pk])
+        self.assertEqual(self.client.get('/api/reports/sales').status_code, 403)
+
+    def test_changes_made_by_another_worker_are_seen(self):
+        stale_token = authentication._token_cache.get(self.token)
+        stale_roles = roles._role_cache.get(self.user.pk)
+        self.user.groups.set([roles.get_group(CUSTOMER)])
+        # This worker never saw the change; the shared generations moved on.
+        authentication._token_cache.set(self.token, stale_token)
+        roles._role_cache.set(self.user.pk, stale_roles)
+        self.assertEqual(self.client.get('/api/reports/sales').status_code, 403)
+
+    def test_deleted_tokens_are_rejected_by_every_worker(self):
+        stale = authentication._token_cache.get(self.token)
+        self.user.auth_token.delete()
+        authentication._token_cache.set(self.token, stale)
+        self.assertEqual(self.client.get('/api/reports/sales').status_code, 401)
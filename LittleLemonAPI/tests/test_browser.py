@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.test import Client, override_settings
+
+from ..roles import CUSTOMER
+from .base import APITestCase
+
+
+# The admin login checks a real password; keep hashing it cheap.
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BrowserMiddlewareTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', password='secret')
+
+    def test_api_requests_skip_browser_middleware(self):
+        item = self.make_menu(1)[0]
+        _, client = self.make_user('customer', CUSTOMER)
+        for response in (client.get('/api/menu-items'), client.post('/api/cart/menu-items', {'itemId': item.pk, 'quantity': 1}, format='json')):
+            self.assertLess(response.status_code, 400)
+            self.assertNotIn('X-Frame-Options', response)
+            self.assertNotIn('sessionid', response.cookies)
+            self.assertNotIn('csrftoken', response.cookies)
+
+    def test_csrf_is_still_enforced_outside_the_api(self):
+        client = Client(enforce_csrf_checks=True)
+        credentials = {'username': 'admin', 'password': 'secret'}
+        self.assertEqual(client.post('/admin/login/', credentials).status_code, 403)
+        response = client.get('/admin/login/')
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        credentials['csrfmiddlewaretoken'] = response.cookies['csrftoken'].value
+        response = client.post('/admin/login/?next=/admin/', credentials)
+        self.assertEqual((response.status_code, response['Location']), (302, '/admin/'))
+        self.assertEqual(client.get('/admin/').status_code, 200)
+
+    def test_sessions_do_not_authenticate_api_requests(self):
+        client = Client()
+        client.force_login(self.admin)
+        self.assertEqual(client.get('/admin/').status_code, 200)
+        self.assertEqual(client.get('/api/cart/menu-items').status_code, 401)
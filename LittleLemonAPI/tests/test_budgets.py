@@ -0,0 +1,51 @@
+from django.test import override_settings
+
+from .. import authentication, roles, urls
+from ..bench.data import generate
+from ..bench.drivers import ClientDriver
+from ..bench.plans import SKIPPED, replays
+from ..bench.scenarios import Call
+from .base import APITransactionTestCase
+
+
+# Every route of bench/plans.py, and the writes it doesn't cover, within the
+# query_budget its view declares. A TransactionTestCase, so atomic blocks run
+# as they do in production instead of as savepoints that would be counted.
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(APITransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.data = generate(scale=0.05)
+        self.driver = ClientDriver()
+
+    def writes(self):
+        data = self.data
+        manager = data.token(data.managers[0])
+        item = data.menu_items[5]
+        return [
+            ('categories', 'manager', Call('POST', '/api/categories', manager, {'slug': 'budget', 'title': 'Budget'}, 201)),
+            ('menu-items/<int:pk>', 'manager', Call('PUT', f'/api/menu-items/{item.pk}', manager, {'title': 'Budget', 'price': '2.00', 'featured': True, 'category': item.category_id})),
+            ('menu-items/<int:pk>', 'manager', Call('DELETE', f'/api/menu-items/{data.menu_items[6].pk}', manager, None, 204)),
+            ('groups/delivery-crew/users', 'manager', Call('POST', '/api/groups/delivery-crew/users', manager, {'userId': data.customers[3].pk}, 201)),
+            ('groups/manager/users', 'manager', Call('POST', '/api/groups/manager/users', manager, {'username': data.customers[4].username})),
+            ('groups/manager/users/<int:userId>', 'manager', Call('DELETE', f'/api/groups/manager/users/{data.customers[4].pk}', manager)),
+        ]
+
+    def restore_roles(self):
+        # Some replays take users out of their groups; every call starts from
+        # the generated roles, with nothing cached.
+        roles.add_members(roles.get_group(roles.MANAGER), [user.pk for user in self.data.managers])
+        roles.add_members(roles.get_group(roles.DELIVERY_CREW), [user.pk for user in self.data.crew])
+        authentication._token_cache.clear()
+        roles._role_cache.clear()
+        roles._groups.clear()
+
+    def test_routes_stay_within_their_query_budgets(self):
+        calls = replays(self.data) + self.writes()
+        known = {str(pattern.pattern) for pattern in urls.urlpatterns}
+        self.assertEqual(known - {route for route, _, _ in calls} - set(SKIPPED), set())
+        for route, role, call in calls:
+            self.restore_roles()
+            with self.subTest(route=route, role=role, method=call.method, path=call.path):
+                status, _ = self.driver.request(call.method, call.path, call.token, call.data)
+                self.assertEqual(status, call.expect)
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from ..models import Cart, MenuItem
+from ..roles import CUSTOMER
+from .base import APITestCase
+
+
+class CartUpsertTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer, self.client = self.make_user('customer', CUSTOMER)
+        self.items = self.make_menu()
+
+    def test_inserts_new_lines_at_the_menu_price(self):
+        written = Cart.objects.add_items(self.customer, {self.items[0].pk: 2, self.items[1].pk: 1})
+        self.assertEqual(written, 2)
+        line = Cart.objects.get(user=self.customer, menuitem=self.items[0])
+        self.assertEqual((line.quantity, line.unit_price, line.price), (2, Decimal('1.50'), Decimal('3.00')))
+
+    def test_adds_to_existing_lines_and_reprices_them(self):
+        Cart.objects.add_items(self.customer, {self.items[0].pk: 2})
+        MenuItem.objects.filter(pk=self.items[0].pk).update(price='2.00')
+        Cart.objects.add_items(self.customer, {self.items[0].pk: 3})
+        line = Cart.objects.get(user=self.customer, menuitem=self.items[0])
+        self.assertEqual((line.quantity, line.unit_price, line.price), (5, Decimal('2.00'), Decimal('10.00')))
+
+    def test_skips_unknown_menu_items(self):
+        self.assertEqual(Cart.objects.add_items(self.customer, {self.items[0].pk: 1, 999999: 1}), 1)
+        self.assertEqual(Cart.objects.filter(user=self.customer).count(), 1)
+        self.assertEqual(Cart.objects.add_items(self.customer, {}), 0)
+
+    def test_batch_endpoint_reports_missing_items(self):
+        response = self.client.post('/api/cart/menu-items/batch', {'items': [
+            {'itemId': self.items[0].pk, 'quantity': 1},
+            {'itemId': self.items[0].pk, 'quantity': 2},
+            {'itemId': 999999, 'quantity': 1},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'added': 1, 'missing': [999999]})
+        self.assertEqual(Cart.objects.get(user=self.customer).quantity, 3)
@@ -0,0 +1,72 @@
+from django.test import SimpleTestCase, override_settings
+
+from .. import catalog
+from ..checks import check_production_cache, check_shared_cache
+from ..roles import MANAGER
+from .base import APITestCase
+
+
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = self.make_menu(2)
+        _, self.manager_client = self.make_user('manager', MANAGER)
+
+    def create_item(self):
+        response = self.manager_client.post('/api/menu-items', {
+            'title': 'New dish', 'price': '4.00', 'featured': False, 'category': self.items[0].category_id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_unchanged_menu_is_not_modified(self):
+        first = self.client.get('/api/menu-items')
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/menu-items', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.client.get('/api/menu-items', HTTP_IF_NONE_MATCH=f'W/{first["ETag"]}').status_code, 304)
+
+    def test_menu_changes_are_served_once_committed(self):
+        first = self.client.get('/api/menu-items')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_item()
+        response = self.client.get('/api/menu-items', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('New dish', [item['title'] for item in response.json()['results']])
+
+    def test_the_version_only_moves_on_commit(self):
+        version = catalog.get_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_item()
+            self.assertEqual(catalog.get_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(catalog.get_version(), version)
+
+    def test_other_workers_see_the_new_version(self):
+        self.client.get('/api/menu-items')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_item()
+        # Bodies built by this worker are keyed by the old version; another
+        # worker reads the version from the shared cache and rebuilds.
+        catalog._entries.clear()
+        self.assertIn('New dish', [item['title'] for item in self.client.get('/api/menu-items').json()['results']])
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+FILE = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/nonexistent'}}
+REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379'}}
+
+
+class CacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM)
+    def test_process_local_caches_are_an_error(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['LittleLemonAPI.E001'])
+
+    @override_settings(CACHES=FILE)
+    def test_the_file_cache_is_for_development_only(self):
+        self.assertEqual(check_shared_cache(None), [])
+        self.assertEqual([error.id for error in check_production_cache(None)], ['LittleLemonAPI.E002'])
+
+    @override_settings(CACHES=REDIS)
+    def test_cache_servers_pass(self):
+        self.assertEqual(check_shared_cache(None) + check_production_cache(None), [])
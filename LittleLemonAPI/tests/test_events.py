@@ -0,0 +1,107 @@
+import asyncio
+import datetime
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+
+from .. import events
+from ..models import Order, OrderEvent
+from ..roles import CUSTOMER, DELIVERY_CREW, MANAGER
+from .base import APITestCase
+
+
+class OrderEventTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer, _ = self.make_user('customer', CUSTOMER)
+        self.crew, _ = self.make_user('crew', DELIVERY_CREW)
+        self.other_crew, _ = self.make_user('other-crew', DELIVERY_CREW)
+        self.manager, _ = self.make_user('manager', MANAGER)
+        self.order = Order.objects.create(user=self.customer, delivery_crew=self.crew, total='1.00', date=datetime.date.today())
+        # A broker of its own, polled by hand instead of by a relay thread.
+        self.broker = events.Broker()
+        patcher = mock.patch.object(self.broker.relay, 'ensure_running')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def subscribe(self, user, **kwargs):
+        async def make():
+            return events.Subscriber(user.pk, **kwargs)
+        return self.broker.subscribe(self.loop.run_until_complete(make()))
+
+    def received(self, subscriber):
+        self.loop.run_until_complete(asyncio.sleep(0))
+        seen = []
+        while not subscriber.queue.empty():
+            seen.append(subscriber.queue.get_nowait())
+        return seen
+
+    def test_changes_are_recorded_for_the_customer_and_crew(self):
+        self.order.status = True
+        self.order.save()
+        event = OrderEvent.objects.get()
+        self.assertEqual(event.payload['status'], True)
+        self.assertEqual(event.recipients, sorted([self.customer.pk, self.crew.pk]))
+
+    def test_reassignment_tells_the_previous_crew(self):
+        self.order.delivery_crew = self.other_crew
+        self.order.save()
+        self.assertEqual(OrderEvent.objects.get().recipients, sorted([self.customer.pk, self.crew.pk, self.other_crew.pk]))
+
+    def test_saves_that_change_nothing_are_not_recorded(self):
+        self.order.total = '2.00'
+        self.order.save()
+        self.assertFalse(OrderEvent.objects.exists())
+
+    def test_polling_fans_events_out_to_recipients_and_managers(self):
+        customer = self.subscribe(self.customer)
+        manager = self.subscribe(self.manager, everything=True)
+        stranger = self.subscribe(self.other_crew)
+        self.order.status = True
+        self.order.save()
+        event = OrderEvent.objects.get()
+        self.assertEqual(self.broker.relay.poll(0), event.pk)
+        self.assertEqual(self.received(customer), [dict(event.payload, seq=event.pk)])
+        self.assertEqual(len(self.received(manager)), 1)
+        self.assertEqual(self.received(stranger), [])
+        # Already relayed.
+        self.assertEqual(self.broker.relay.poll(event.pk), event.pk)
+        self.assertEqual(self.received(customer), [])
+
+    def test_order_streams_only_see_their_order(self):
+        other_order = Order.objects.create(user=self.customer, total='1.00', date=datetime.date.today())
+        subscriber = self.subscribe(self.customer, order_id=self.order.pk)
+        other_order.status = True
+        other_order.save()
+        self.order.status = True
+        self.order.save()
+        self.broker.relay.poll(0)
+        self.assertEqual([event['id'] for event in self.received(subscriber)], [self.order.pk])
+
+    @override_settings(ORDER_STREAM_QUEUE_SIZE=1)
+    def test_subscribers_that_fall_behind_are_flagged(self):
+        subscriber = self.subscribe(self.customer)
+        for status in (True, False):
+            self.order.status = status
+            self.order.save()
+        self.broker.relay.poll(0)
+        self.assertEqual(len(self.received(subscriber)), 1)
+        self.assertTrue(subscriber.overflowed)
+
+    def test_the_relay_stops_without_subscribers(self):
+        subscriber = self.subscribe(self.customer)
+        self.assertFalse(self.broker.relay.should_stop())
+        self.broker.unsubscribe(subscriber)
+        self.assertTrue(self.broker.relay.should_stop())
+        self.assertEqual(len(self.broker), 0)
+
+    @override_settings(ORDER_EVENT_RETENTION=60)
+    def test_old_events_are_pruned(self):
+        old = OrderEvent.objects.create(payload={}, recipients=[])
+        OrderEvent.objects.filter(pk=old.pk).update(created_at=timezone.now() - datetime.timedelta(seconds=120))
+        recent = OrderEvent.objects.create(payload={}, recipients=[])
+        self.assertEqual(events.prune(), 1)
+        self.assertEqual(list(OrderEvent.objects.values_list('id', flat=True)), [recent.pk])
@@ -0,0 +1,62 @@
+import datetime
+
+from ..models import Category, MenuItem, Order
+from ..roles import CUSTOMER
+from .base import APITestCase
+
+
+class MenuItemFilterTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = self.make_menu(4)
+        self.items[1].featured = True
+        self.items[1].save()
+
+    def ids(self, query):
+        response = self.client.get(f'/api/menu-items?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['results']]
+
+    def test_exact_and_range_filters(self):
+        self.assertEqual(self.ids('featured=true'), [self.items[1].pk])
+        self.assertEqual(self.ids('featured=0'), [self.items[0].pk, self.items[2].pk, self.items[3].pk])
+        self.assertEqual(self.ids('price__gte=2.50&price__lt=4.50'), [self.items[1].pk, self.items[2].pk])
+        self.assertEqual(self.ids(f'category={self.items[0].category_id}&price=1.50'), [self.items[0].pk])
+
+    def test_invalid_values_are_reported_per_parameter(self):
+        response = self.client.get('/api/menu-items?price=cheap&featured=maybe&price__gte=x')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'price', 'featured', 'price__gte'})
+
+    def test_undeclared_parameters_are_ignored(self):
+        self.assertEqual(len(self.ids('inventory=3&title__contains=Dish')), 4)
+
+    def test_ordering_is_limited_to_declared_fields_and_stable(self):
+        MenuItem.objects.filter(pk=self.items[3].pk).update(price='1.50')
+        self.assertEqual(self.ids('ordering=-price'), [self.items[2].pk, self.items[1].pk, self.items[3].pk, self.items[0].pk])
+        self.assertEqual(self.ids('ordering=price'), [self.items[0].pk, self.items[3].pk, self.items[1].pk, self.items[2].pk])
+        # Not in ordering_fields: the default order.
+        self.assertEqual(self.ids('ordering=-category__title'), [item.pk for item in self.items])
+
+
+class PageSizeTests(APITestCase):
+    def test_page_size_is_capped(self):
+        category = Category.objects.create(slug='bulk', title='Bulk')
+        MenuItem.objects.bulk_create([
+            MenuItem(title=f'Item {i}', price='1.00', featured=False, category=category) for i in range(105)
+        ])
+        body = self.client.get('/api/menu-items?page_size=500').json()
+        self.assertEqual((body['count'], len(body['results'])), (105, 100))
+        self.assertEqual(len(self.client.get('/api/menu-items?page_size=7&page=2').json()['results']), 7)
+        self.assertEqual(self.client.get('/api/menu-items?page=99').status_code, 404)
+
+
+class OrderFilterTests(APITestCase):
+    def test_orders_filter_by_status_and_date(self):
+        customer, client = self.make_user('customer', CUSTOMER)
+        today = datetime.date(2024, 5, 10)
+        open_order = Order.objects.create(user=customer, total='1.00', date=today)
+        Order.objects.create(user=customer, status=True, total='1.00', date=today - datetime.timedelta(days=3))
+        self.assertEqual([order['id'] for order in client.get('/api/orders?status=false').json()['results']], [open_order.pk])
+        self.assertEqual(len(client.get('/api/orders?date__gte=2024-05-08').json()['results']), 1)
+        self.assertEqual(client.get('/api/orders?date=yesterday').status_code, 400)
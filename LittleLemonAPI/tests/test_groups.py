@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .. import roles
+from ..roles import CUSTOMER, DELIVERY_CREW, MANAGER
+from .base import APITransactionTestCase
+
+
+# Commits for real: the invalidation under test runs on commit.
+class RoleInvalidationTests(APITransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.client = self.make_user('customer', CUSTOMER)
+        _, self.manager_client = self.make_user('manager', MANAGER)
+
+    def test_roles_cached_before_the_commit_are_forgotten_after_it(self):
+        self.assertEqual(roles.get_user_roles(self.user), {CUSTOMER})
+        with transaction.atomic():
+            self.user.groups.add(roles.get_group(DELIVERY_CREW))
+            # A concurrent request caches the membership it can still see.
+            roles._role_cache.set(self.user.pk, (cache.get(roles.generation_key(self.user.pk)), frozenset([CUSTOMER])))
+        self.assertEqual(roles.get_user_roles(self.user), {CUSTOMER, DELIVERY_CREW})
+
+    def test_bulk_membership_changes_take_effect_on_the_next_request(self):
+        self.assertEqual(self.client.patch('/api/orders/999999', {'status': True}, format='json').status_code, 403)
+        response = self.manager_client.post('/api/groups/delivery-crew/users/bulk', {'users': [self.user.pk, 'nobody']}, format='json')
+        self.assertEqual([row['result'] for row in response.json()['results']], ['added', 'not_found'])
+        self.assertEqual(self.client.patch('/api/orders/999999', {'status': True}, format='json').status_code, 404)
+
+    def test_bulk_removals_report_each_user(self):
+        response = self.manager_client.delete('/api/groups/manager/users/bulk', {'users': ['manager', self.user.username]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['result'] for row in response.json()['results']], ['removed', 'not_member'])
+        self.assertEqual(self.manager_client.get('/api/reports/sales').status_code, 403)
+
+    def test_bulk_payloads_are_validated(self):
+        for payload in ({'users': []}, {'users': [True]}, {'users': ['  ']}, {'users': 'manager'}):
+            with self.subTest(payload=payload):
+                response = self.manager_client.post('/api/groups/manager/users/bulk', payload, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post('/api/groups/manager/users/bulk', {'users': [self.user.pk]}, format='json').status_code, 403)
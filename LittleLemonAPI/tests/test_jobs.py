@@ -0,0 +1,99 @@
+import datetime
+
+from django.test import override_settings
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Job, Order
+from ..roles import CUSTOMER, DELIVERY_CREW
+from .base import APITestCase
+
+
+class JobQueueTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        jobs.job('test_record')(lambda **payload: self.calls.append(payload))
+        jobs.job('test_fail')(self.fail_job)
+        self.addCleanup(jobs._handlers.pop, 'test_record')
+        self.addCleanup(jobs._handlers.pop, 'test_fail')
+
+    def fail_job(self, **payload):
+        raise RuntimeError('boom')
+
+    def test_unknown_jobs_are_rejected(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no_such_job')
+
+    def test_a_job_is_claimed_once(self):
+        queued = jobs.enqueue('test_record', value=1)
+        claimed = jobs.claim('worker-a')
+        self.assertEqual([job.pk for job in claimed], [queued.pk])
+        self.assertEqual((claimed[0].status, claimed[0].locked_by, claimed[0].attempts), (Job.RUNNING, 'worker-a', 1))
+        self.assertEqual(jobs.claim('worker-b'), [])
+
+    def test_jobs_are_claimed_when_due_in_order(self):
+        later = jobs.enqueue('test_record', run_at=timezone.now() + datetime.timedelta(hours=1))
+        second = jobs.enqueue('test_record', run_at=timezone.now() - datetime.timedelta(minutes=1))
+        first = jobs.enqueue('test_record', run_at=timezone.now() - datetime.timedelta(minutes=2))
+        self.assertEqual([job.pk for job in jobs.claim('worker', limit=10)], [first.pk, second.pk])
+        self.assertEqual(Job.objects.get(pk=later.pk).status, Job.QUEUED)
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_stale_claims_are_requeued(self):
+        stale = jobs.enqueue('test_record')
+        fresh = jobs.enqueue('test_record')
+        jobs.claim('worker')
+        Job.objects.filter(pk=stale.pk).update(locked_at=timezone.now() - datetime.timedelta(seconds=120))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(pk=stale.pk).status, Job.QUEUED)
+        self.assertEqual(Job.objects.get(pk=fresh.pk).status, Job.RUNNING)
+        self.assertEqual([job.pk for job in jobs.claim('other')], [stale.pk])
+
+    def test_finished_jobs_are_deleted(self):
+        jobs.enqueue('test_record', value=1)
+        self.assertEqual(jobs.run_pending('worker'), 1)
+        self.assertEqual(self.calls, [{'value': 1}])
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        queued = jobs.enqueue('test_fail')
+        with self.assertLogs('LittleLemonAPI.jobs', 'ERROR'):
+            jobs.run_pending('worker')
+        job = Job.objects.get(pk=queued.pk)
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.QUEUED, 1, ''))
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+        # Not due yet.
+        self.assertEqual(jobs.run_pending('worker'), 0)
+        Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        with self.assertLogs('LittleLemonAPI.jobs', 'ERROR'):
+            jobs.run_pending('worker')
+        self.assertEqual(Job.objects.get(pk=queued.pk).status, Job.FAILED)
+
+
+class DeliveryCrewAssignmentTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer, self.client = self.make_user('customer', CUSTOMER)
+        self.busy, _ = self.make_user('busy', DELIVERY_CREW)
+        self.idle, _ = self.make_user('idle', DELIVERY_CREW)
+        Order.objects.create(user=self.customer, delivery_crew=self.busy, total='1.00', date=datetime.date.today())
+
+    def test_checkout_queues_assignment_to_the_least_loaded_crew(self):
+        item = self.make_menu(1)[0]
+        self.client.post('/api/cart/menu-items', {'itemId': item.pk, 'quantity': 1}, format='json')
+        response = self.client.post('/api/orders', format='json')
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.json()['id'])
+        self.assertIsNone(order.delivery_crew_id)
+        self.assertEqual(jobs.run_pending('worker'), 1)
+        order.refresh_from_db()
+        self.assertEqual(order.delivery_crew_id, self.idle.pk)
+
+    def test_assigned_orders_are_left_alone(self):
+        order = Order.objects.create(user=self.customer, delivery_crew=self.busy, total='1.00', date=datetime.date.today())
+        jobs.assign_delivery_crew(order.pk)
+        order.refresh_from_db()
+        self.assertEqual(order.delivery_crew_id, self.busy.pk)
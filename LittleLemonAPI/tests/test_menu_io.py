@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIClient
+
+from ..models import Category, MenuItem
+from .base import APITestCase
+
+
+class MenuImportExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = self.make_menu()
+        self.directory = tempfile.mkdtemp(prefix='littlelemon-test-menu-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write_jsonl(self, name, rows):
+        with open(self.path(name), 'w', encoding='utf-8') as stream:
+            stream.writelines(json.dumps(row) + '\n' for row in rows)
+        return self.path(name)
+
+    def import_menu(self, path, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_menu', path, stdout=StringIO(), **options)
+
+    def search(self, text):
+        response = APIClient().get('/api/menu-items', {'search': text})
+        return [item['title'] for item in response.json()['results']]
+
+    def test_exports_read_back_unchanged(self):
+        for name in ('menu.csv', 'menu.jsonl'):
+            with self.subTest(format=name):
+                call_command('export_menu', self.path(name), stdout=StringIO())
+                MenuItem.objects.filter(pk=self.items[0].pk).update(price='9.99', featured=True)
+                out = StringIO()
+                with self.captureOnCommitCallbacks(execute=True):
+                    call_command('import_menu', self.path(name), stdout=out)
+                self.assertIn('3 rows', out.getvalue())
+                self.assertIn('1 updated, 2 unchanged, 0 new categories', out.getvalue())
+                item = MenuItem.objects.get(pk=self.items[0].pk)
+                self.assertEqual((item.price, item.featured), (Decimal('1.50'), False))
+        self.assertEqual(MenuItem.objects.count(), 3)
+
+    def test_rows_are_matched_by_title_and_category_slug(self):
+        path = self.write_jsonl('menu.jsonl', [
+            {'title': 'Dish 1', 'price': '5.00', 'featured': 'yes', 'category': 'mains'},
+            {'title': 'Tiramisu', 'price': '4.00', 'featured': False, 'category': 'desserts', 'category_title': 'Sweets'},
+            {'title': 'Tiramisu', 'price': '4.50', 'featured': False, 'category': 'desserts'},
+        ])
+        self.import_menu(path, batch_size=2)
+        self.assertEqual(MenuItem.objects.count(), 4)
+        item = MenuItem.objects.get(pk=self.items[1].pk)
+        self.assertEqual((item.price, item.featured), (Decimal('5.00'), True))
+        # The later row wins, here from the next chunk.
+        tiramisu = MenuItem.objects.get(title='Tiramisu')
+        self.assertEqual((tiramisu.price, tiramisu.category.title), (Decimal('4.50'), 'Sweets'))
+        self.assertEqual(Category.objects.filter(slug='desserts').count(), 1)
+
+    def test_imports_are_searchable(self):
+        path = self.write_jsonl('menu.jsonl', [
+            {'title': 'Tiramisu', 'price': '4.00', 'category': 'desserts', 'category_title': 'Desserts'},
+            {'title': 'Dish 0', 'price': '1.50', 'category': 'mains', 'category_title': 'Grill'},
+        ])
+        self.import_menu(path)
+        self.assertEqual(self.search('tiramisu'), ['Tiramisu'])
+        self.assertEqual(self.search('grill'), ['Dish 0', 'Dish 1', 'Dish 2'])
+        self.assertEqual(self.search('mains'), [])
+
+    def test_invalid_rows_stop_the_import_with_their_line(self):
+        path = self.write_jsonl('menu.jsonl', [
+            {'title': 'Tiramisu', 'price': '4.00', 'category': 'desserts'},
+            {'title': 'Cake', 'price': 'cheap', 'category': 'desserts'},
+        ])
+        with self.assertRaisesMessage(CommandError, 'line 2:'):
+            self.import_menu(path)
+        self.assertFalse(MenuItem.objects.filter(title__in=['Tiramisu', 'Cake']).exists())
+
+    def test_unknown_formats_are_rejected(self):
+        with self.assertRaisesMessage(CommandError, 'pass --format'):
+            call_command('import_menu', self.path('menu.txt'), stdout=StringIO())
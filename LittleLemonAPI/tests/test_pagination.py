@@ -0,0 +1,53 @@
+import datetime
+
+from ..models import Order
+from ..pagination import OrderCursorPagination
+from ..roles import CUSTOMER
+from .base import APITestCase
+
+
+class OrderCursorPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer, self.client = self.make_user('customer', CUSTOMER)
+        today = datetime.date(2024, 5, 10)
+        # Several orders share a date, so the id has to break ties.
+        self.orders = [
+            Order.objects.create(user=self.customer, total='1.00', date=today - datetime.timedelta(days=i // 3))
+            for i in range(7)
+        ]
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_cover_every_order_once_newest_first(self):
+        seen = []
+        url = '/api/orders?cursor=&page_size=3'
+        while url:
+            body = self.page(url)
+            seen += [order['id'] for order in body['results']]
+            url = body['next']
+        expected = [order.pk for order in sorted(self.orders, key=lambda order: (order.date, order.pk), reverse=True)]
+        self.assertEqual(seen, expected)
+
+    def test_new_orders_do_not_shift_later_pages(self):
+        first = self.page('/api/orders?cursor=&page_size=3')
+        Order.objects.create(user=self.customer, total='1.00', date=datetime.date(2024, 5, 11))
+        second = self.page(first['next'])
+        self.assertEqual(len(second['results']), 3)
+        self.assertFalse({order['id'] for order in first['results']} & {order['id'] for order in second['results']})
+
+    def test_last_page_has_no_next_link(self):
+        body = self.page('/api/orders?cursor=&page_size=7')
+        self.assertEqual(len(body['results']), 7)
+        self.assertIsNone(body['next'])
+
+    def test_cursor_round_trips(self):
+        paginator = OrderCursorPagination()
+        order = self.orders[4]
+        self.assertEqual(paginator.decode_cursor(paginator.encode_cursor(order)), (order.date, order.pk))
+
+    def test_invalid_cursor_is_404(self):
+        self.assertEqual(self.client.get('/api/orders?cursor=not-a-cursor').status_code, 404)
@@ -0,0 +1,65 @@
+import datetime
+
+from rest_framework.test import APIClient
+
+from ..models import MenuItem, Order, OrderItem
+from ..roles import CUSTOMER, DELIVERY_CREW, MANAGER
+from .base import APITestCase
+
+
+class SingleOrderPermissionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer, self.customer_client = self.make_user('customer', CUSTOMER)
+        self.crew, self.crew_client = self.make_user('crew', DELIVERY_CREW)
+        _, self.manager_client = self.make_user('manager', MANAGER)
+        _, self.stranger_client = self.make_user('stranger', CUSTOMER)
+        item = self.make_menu(1)[0]
+        self.order = Order.objects.create(user=self.customer, delivery_crew=self.crew, total='1.50', date=datetime.date.today())
+        OrderItem.objects.create(order=self.order, menuitem=item, quantity=1, unit_price='1.50', price='1.50')
+        self.url = f'/api/orders/{self.order.pk}'
+
+    def test_customers_cannot_change_orders(self):
+        self.assertEqual(self.customer_client.put(self.url, {'status': True}, format='json').status_code, 403)
+        self.assertEqual(self.customer_client.patch(self.url, {'status': True}, format='json').status_code, 403)
+        self.assertEqual(self.customer_client.delete(self.url).status_code, 403)
+        self.order.refresh_from_db()
+        self.assertFalse(self.order.status)
+
+    def test_items_are_visible_to_the_customer_crew_and_managers(self):
+        for client in (self.customer_client, self.crew_client, self.manager_client):
+            response = client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()), 1)
+        self.assertEqual(self.stranger_client.get(self.url).status_code, 403)
+
+    def test_crew_mark_their_orders_delivered(self):
+        self.assertEqual(self.crew_client.patch(self.url, {'status': True}, format='json').status_code, 200)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.status)
+
+    def test_customers_cannot_change_menu_items(self):
+        item = self.order.orderitem_set.get().menuitem
+        response = self.customer_client.put(f'/api/menu-items/{item.pk}', {'title': 'Free'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class MenuItemPermissionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = self.make_menu(1)[0]
+        self.url = f'/api/menu-items/{self.item.pk}'
+        _, self.customer_client = self.make_user('customer', CUSTOMER)
+        _, self.manager_client = self.make_user('manager', MANAGER)
+
+    def test_only_managers_patch_or_delete_menu_items(self):
+        for client in (APIClient(), self.customer_client):
+            self.assertEqual(client.patch(self.url, {'title': 'Free'}, format='json').status_code, 403)
+            self.assertEqual(client.delete(self.url).status_code, 403)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.title, 'Dish 0')
+        self.assertEqual(self.manager_client.patch(self.url, {'title': 'Special'}, format='json').status_code, 200)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.title, 'Special')
+        self.assertEqual(self.manager_client.delete(self.url).status_code, 204)
+        self.assertFalse(MenuItem.objects.filter(pk=self.item.pk).exists())
@@ -0,0 +1,50 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from rest_framework.renderers import JSONRenderer
+
+from .. import renderers
+from ..models import Cart, MenuItem, Order
+from ..roles import CUSTOMER
+from ..serializers import CartSerializer, MenuItemSerializer, OrderSerializer, values_for
+from .base import APITestCase
+
+
+class FastJSONRendererTests(APITestCase):
+    """values() rows rendered fast come out exactly as DRF renders the serializer."""
+
+    def setUp(self):
+        super().setUp()
+        self.items = self.make_menu(3)
+        self.customer, _ = self.make_user('customer', CUSTOMER)
+        Cart.objects.add_items(self.customer, {item.pk: 2 for item in self.items})
+        Order.objects.create(user=self.customer, total='10.00', date=datetime.date(2024, 5, 10))
+
+    def assertRendersLikeDRF(self, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(renderers.dumps(list(values_for(serializer_class, queryset))), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.dumps(list(values_for(serializer_class, queryset))), expected)
+
+    def test_decimals_dates_and_foreign_keys(self):
+        self.assertRendersLikeDRF(MenuItemSerializer, MenuItem.objects.order_by('id'))
+        self.assertRendersLikeDRF(CartSerializer, Cart.objects.order_by('id'))
+        self.assertRendersLikeDRF(OrderSerializer, Order.objects.order_by('id'))
+
+    def test_values_the_serializers_do_not_produce(self):
+        data = {
+            1: 'café',
+            'price': Decimal('1.50'),
+            'at': datetime.datetime(2024, 5, 10, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc),
+            'naive': datetime.datetime(2024, 5, 10, 12, 0),
+            'offset': datetime.datetime(2024, 5, 10, 12, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=2))),
+            'took': datetime.timedelta(seconds=90),
+            'rest': [None, True, 1.5],
+        }
+        self.assertEqual(renderers.dumps(data), renderers.DecimalStringEncoder(ensure_ascii=False, separators=(',', ':')).encode(data).encode())
+        self.assertIn(b'"at":"2024-05-10T12:00:00.123456Z"', renderers.dumps(data))
+
+    def test_indented_output_is_left_to_drf(self):
+        rendered = renderers.FastJSONRenderer().render({'price': Decimal('1.50')}, 'application/json; indent=2')
+        self.assertEqual(rendered, b'{\n  "price": "1.50"\n}')
@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from .. import replicas
+from ..models import MenuItem, Order
+from ..replicas import ReplicaMiddleware, ReplicaRouter, _read_alias, primary_reads
+from .base import TemporaryCacheMixin
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        token = _read_alias.set('replica1')
+        self.addCleanup(_read_alias.reset, token)
+
+    def test_reads_go_to_the_request_replica(self):
+        self.assertEqual(self.router.db_for_read(MenuItem), 'replica1')
+        self.assertEqual(self.router.db_for_write(MenuItem), 'default')
+
+    def test_reads_go_to_the_primary_outside_requests(self):
+        _read_alias.set(None)
+        self.assertEqual(self.router.db_for_read(MenuItem), 'default')
+
+    def test_credentials_and_memberships_are_read_from_the_primary(self):
+        for model in (Token, User, Group, User.groups.through):
+            self.assertEqual(self.router.db_for_read(model), 'default')
+
+    def test_transactions_read_from_the_primary(self):
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.router.db_for_read(MenuItem), 'default')
+
+    def test_relations_follow_the_instance(self):
+        order = Order()
+        order._state.db = 'default'
+        self.assertEqual(self.router.db_for_read(User, instance=order), 'default')
+
+    def test_primary_reads_block(self):
+        with primary_reads():
+            self.assertEqual(self.router.db_for_read(MenuItem), 'default')
+        self.assertEqual(self.router.db_for_read(MenuItem), 'replica1')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertIs(self.router.allow_migrate('replica1', 'LittleLemonAPI'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'LittleLemonAPI'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaMiddlewareTests(TemporaryCacheMixin, SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        replicas.health.clear()
+        self.addCleanup(replicas.health.clear)
+        self.seen = []
+        self.status = 200
+        self.middleware = ReplicaMiddleware(self.view)
+        self.factory = RequestFactory(HTTP_AUTHORIZATION='Token abc')
+        patcher = mock.patch.object(replicas.ReplicaHealth, 'check', return_value=True)
+        self.check = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def view(self, request):
+        self.seen.append(_read_alias.get())
+        return HttpResponse(status=self.status)
+
+    def test_safe_requests_read_from_a_replica(self):
+        self.middleware(self.factory.get('/api/menu-items'))
+        self.middleware(self.factory.post('/api/cart/menu-items'))
+        self.assertEqual(self.seen, ['replica1', None])
+        self.assertIsNone(_read_alias.get())
+
+    def test_clients_read_their_own_writes(self):
+        self.middleware(self.factory.post('/api/cart/menu-items'))
+        self.middleware(self.factory.get('/api/cart/menu-items'))
+        self.middleware(RequestFactory(HTTP_AUTHORIZATION='Token other').get('/api/cart/menu-items'))
+        self.assertEqual(self.seen, [None, None, 'replica1'])
+
+    def test_failed_writes_are_not_sticky(self):
+        self.status = 400
+        self.middleware(self.factory.post('/api/cart/menu-items'))
+        self.middleware(self.factory.get('/api/cart/menu-items'))
+        self.assertEqual(self.seen, [None, 'replica1'])
+
+    def test_unhealthy_replicas_are_skipped(self):
+        self.check.return_value = False
+        self.middleware(self.factory.get('/api/menu-items'))
+        self.assertEqual(self.seen, [None])
+
+    def test_a_replica_failing_mid_request_is_retried_on_the_primary(self):
+        request = self.factory.get('/api/menu-items')
+        request.resolver_match = SimpleNamespace(func=self.view, args=(), kwargs={})
+        token = _read_alias.set('replica1')
+        try:
+            response = self.middleware.process_exception(request, DatabaseError('gone'))
+        finally:
+            _read_alias.reset(token)
+        self.assertEqual((response.status_code, self.seen), (200, [None]))
+        self.assertFalse(replicas.health.is_healthy('replica1'))
+        self.assertEqual(self.check.call_count, 0)
+
+    def test_sticky_markers_are_not_read_without_a_healthy_replica(self):
+        self.middleware(self.factory.post('/api/cart/menu-items'))
+        self.check.return_value = False
+        with mock.patch.object(replicas.cache, 'get') as get:
+            self.middleware(self.factory.get('/api/cart/menu-items'))
+        get.assert_not_called()
+        self.assertEqual(self.seen, [None, None])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_unused_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaMiddleware(self.view)
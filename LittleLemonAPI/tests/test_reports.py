@@ -0,0 +1,35 @@
+import datetime
+from decimal import Decimal
+
+from ..models import DailySales
+from ..roles import CUSTOMER, MANAGER
+from .base import APITestCase
+
+
+class SalesReportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = self.make_menu(1)[0]
+        _, self.client = self.make_user('manager', MANAGER)
+        DailySales.objects.record(datetime.date(2024, 5, 1), [(self.item.pk, 2, Decimal('3.00'))])
+        DailySales.objects.record(datetime.date(2024, 5, 3), [(self.item.pk, 1, Decimal('1.50'))])
+
+    def test_reports_sales_per_day(self):
+        response = self.client.get('/api/reports/sales?start=2024-05-01&end=2024-05-31')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([row['date'] for row in body['results']], ['2024-05-01', '2024-05-03'])
+        self.assertEqual(body['totals'], {'quantity': 3, 'revenue': '4.50'})
+
+    def test_start_defaults_to_thirty_days_before_end(self):
+        body = self.client.get('/api/reports/sales?end=2024-05-30').json()
+        self.assertEqual((body['start'], len(body['results'])), ('2024-05-01', 2))
+
+    def test_dates_that_do_not_parse_are_rejected(self):
+        for query in ('end=garbage', 'start=garbage', 'end=2024-02-30', 'start=2024-05-01&end=soon'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/reports/sales?{query}').status_code, 400)
+
+    def test_is_for_managers_only(self):
+        _, client = self.make_user('customer', CUSTOMER)
+        self.assertEqual(client.get('/api/reports/sales').status_code, 403)
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import AnonymousUser
+
+from .. import roles
+from ..roles import CUSTOMER, DELIVERY_CREW, MANAGER
+from .base import APITestCase
+
+
+class RoleCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.client = self.make_user('customer', CUSTOMER)
+
+    def test_roles_are_loaded_once(self):
+        self.assertEqual(roles.get_user_roles(self.user), {CUSTOMER})
+        with self.assertNumQueries(0):
+            self.assertEqual(roles.get_user_roles(self.user), {CUSTOMER})
+
+    def test_anonymous_users_have_no_roles(self):
+        self.assertEqual(roles.get_user_roles(AnonymousUser()), frozenset())
+
+    def test_membership_changes_are_seen_at_once(self):
+        roles.get_user_roles(self.user)
+        self.user.groups.add(roles.get_group(DELIVERY_CREW))
+        self.assertEqual(roles.get_user_roles(self.user), {CUSTOMER, DELIVERY_CREW})
+        roles.remove_members(roles.get_group(CUSTOMER), [self.user.pk])
+        self.assertEqual(roles.get_user_roles(self.user), {DELIVERY_CREW})
+
+    def test_changes_made_by_another_worker_are_seen(self):
+        roles.get_user_roles(self.user)
+        stale = roles._role_cache.get(self.user.pk)
+        roles.add_members(roles.get_group(MANAGER), [self.user.pk])
+        # This worker never saw the change; the shared generation moved on.
+        roles._role_cache.set(self.user.pk, stale)
+        self.assertEqual(roles.get_user_roles(self.user), {CUSTOMER, MANAGER})
+
+    def test_manager_only_views_follow_roles(self):
+        _, manager_client = self.make_user('manager', MANAGER)
+        self.assertEqual(manager_client.get('/api/reports/sales').status_code, 200)
+        self.assertEqual(self.client.get('/api/reports/sales').status_code, 403)
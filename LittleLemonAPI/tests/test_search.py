@@ -0,0 +1,70 @@
+from rest_framework.test import APIClient
+
+from .. import catalog, search
+from ..models import Category, MenuItem
+from .base import APITestCase
+
+
+class FullTextSearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pizza = Category.objects.create(slug='pizza', title='Pizza')
+            starters = Category.objects.create(slug='starters', title='Starters')
+            self.margherita = MenuItem.objects.create(title='Margherita', price='8.00', featured=False, category=self.pizza)
+            MenuItem.objects.create(title='Marinara', price='7.00', featured=False, category=self.pizza)
+            MenuItem.objects.create(title='Pizza Bread', price='4.00', featured=False, category=starters)
+            MenuItem.objects.create(title='Bruschetta', price='5.00', featured=False, category=starters)
+
+    def titles(self, text):
+        response = APIClient().get('/api/menu-items', {'search': text})
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for item in response.json()['results']]
+
+    def test_words_match_as_prefixes(self):
+        self.assertEqual(self.titles('mar'), ['Margherita', 'Marinara'])
+        self.assertEqual(self.titles('piz bre'), ['Pizza Bread'])
+
+    def test_close_spellings_match(self):
+        self.assertEqual(self.titles('margarita'), ['Margherita'])
+        self.assertEqual(self.titles('bruscheta'), ['Bruschetta'])
+
+    def test_accents_and_case_are_ignored(self):
+        self.assertEqual(self.titles('MÀRGHERITA'), ['Margherita'])
+
+    def test_titles_rank_above_categories(self):
+        self.assertEqual(self.titles('pizza')[0], 'Pizza Bread')
+        self.assertEqual(set(self.titles('pizza')), {'Pizza Bread', 'Margherita', 'Marinara'})
+
+    def test_explicit_ordering_overrides_the_rank(self):
+        response = APIClient().get('/api/menu-items', {'search': 'pizza', 'ordering': 'price'})
+        self.assertEqual([item['title'] for item in response.json()['results']], ['Pizza Bread', 'Marinara', 'Margherita'])
+
+    def test_saves_and_deletes_update_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.margherita.title = 'Diavola'
+            self.margherita.save()
+        self.assertEqual(self.titles('diavola'), ['Diavola'])
+        self.assertEqual(self.titles('margherita'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.margherita.delete()
+        self.assertEqual(self.titles('diavola'), [])
+
+    def test_category_renames_reindex_their_items(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pizza.title = 'Pies'
+            self.pizza.save()
+        self.assertEqual(self.titles('pies'), ['Margherita', 'Marinara'])
+        self.assertEqual(self.titles('pizza'), ['Pizza Bread'])
+
+    def test_rebuild_picks_up_bulk_writes(self):
+        MenuItem.objects.filter(pk=self.margherita.pk).update(title='Quattro Formaggi')
+        self.assertEqual(self.titles('quattro'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            # As menu_io does after its bulk writes.
+            search.rebuild()
+            catalog.invalidate()
+        self.assertEqual(self.titles('quattro'), ['Quattro Formaggi'])
+
+    def test_blank_searches_return_everything(self):
+        self.assertEqual(len(self.titles('  ')), 4)
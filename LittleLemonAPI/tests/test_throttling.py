@@ -0,0 +1,126 @@
+import threading
+import time
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..admission import AdmissionMiddleware, ConcurrencyGate, DatabaseLoad
+from ..instrumentation import counters
+from ..roles import CUSTOMER
+from ..throttling import TokenBucketThrottle, spend
+from .base import APITestCase
+
+
+class SpendTests(SimpleTestCase):
+    def test_a_full_bucket_allows_a_burst_then_waits_for_a_token(self):
+        state = None
+        for _ in range(3):
+            wait, state = spend(state, 3, 0.5, 100.0)
+            self.assertEqual(wait, 0.0)
+        wait, state = spend(state, 3, 0.5, 100.0)
+        self.assertEqual(wait, 2.0)
+
+    def test_tokens_refill_at_the_rate_up_to_capacity(self):
+        wait, state = spend((0, 100.0), 3, 0.5, 101.0)
+        self.assertEqual(wait, 1.0)
+        wait, state = spend(state, 3, 0.5, 102.0)
+        self.assertEqual((wait, state), (0.0, (0.0, 102.0)))
+        _, state = spend(state, 3, 0.5, 1000.0)
+        self.assertEqual(state, (2, 1000.0))
+
+
+@mock.patch.object(TokenBucketThrottle, 'THROTTLE_RATES', {'cart': '2/min'})
+class TokenBucketThrottleTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = self.make_menu(1)[0]
+        _, self.client = self.make_user('customer', CUSTOMER)
+        _, self.other_client = self.make_user('other', CUSTOMER)
+
+    def add(self, client):
+        return client.post('/api/cart/menu-items', {'itemId': self.item.pk, 'quantity': 1}, format='json')
+
+    def test_writes_past_the_burst_are_throttled(self):
+        self.assertEqual([self.add(self.client).status_code for _ in range(2)], [201, 201])
+        response = self.add(self.client)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(counters.snapshot(), {'throttled:cart': 1})
+
+    def test_reads_and_other_users_are_not_throttled(self):
+        for _ in range(3):
+            self.add(self.client)
+        self.assertEqual(self.client.get('/api/cart/menu-items').status_code, 200)
+        self.assertEqual(self.add(self.other_client).status_code, 201)
+
+    @override_settings(THROTTLE_BACKEND='cache')
+    def test_buckets_can_live_in_the_shared_cache(self):
+        self.assertEqual([self.add(self.client).status_code for _ in range(3)], [201, 201, 429])
+
+
+class ConcurrencyGateTests(SimpleTestCase):
+    def test_sheds_when_the_queue_is_full(self):
+        gate = ConcurrencyGate(max_concurrent=1, max_queue=0)
+        self.assertIsNone(gate.acquire(timeout=0))
+        self.assertEqual(gate.acquire(timeout=0), 'queue-full')
+        gate.release()
+        self.assertTrue(gate.try_acquire())
+        self.assertFalse(gate.try_acquire())
+
+    def test_sheds_waiters_that_time_out(self):
+        gate = ConcurrencyGate(max_concurrent=1, max_queue=1)
+        gate.acquire(timeout=0)
+        self.assertEqual(gate.acquire(timeout=0.01), 'queue-timeout')
+        self.assertEqual(gate.waiting, 0)
+
+    def test_a_release_admits_a_waiter(self):
+        gate = ConcurrencyGate(max_concurrent=1, max_queue=1)
+        gate.acquire(timeout=0)
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(gate.acquire(timeout=5)))
+        waiter.start()
+        while not gate.waiting:
+            time.sleep(0.001)
+        gate.release()
+        waiter.join()
+        self.assertEqual((results, gate.active), ([None], 1))
+
+
+class DatabaseLoadTests(SimpleTestCase):
+    def test_is_a_moving_average_that_decays(self):
+        load = DatabaseLoad(half_life=0.05, weight=0.5)
+        load.observe(100)
+        load.observe(100)
+        self.assertAlmostEqual(load.current(), 75, delta=5)
+        time.sleep(0.25)
+        self.assertLess(load.current(), 5)
+
+
+@override_settings(ADMISSION_MAX_CONCURRENT=1, ADMISSION_MAX_QUEUE=0, ADMISSION_MAX_DB_MS=50, ADMISSION_RETRY_AFTER=3)
+class AdmissionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        counters.reset()
+        self.middleware = AdmissionMiddleware(lambda request: HttpResponse(status=201))
+        self.factory = RequestFactory()
+
+    def test_admits_writes_within_limits(self):
+        self.assertEqual(self.middleware(self.factory.post('/api/orders')).status_code, 201)
+        self.assertEqual(self.middleware.gate.active, 0)
+
+    def test_sheds_writes_beyond_the_concurrency_limit(self):
+        self.middleware.gate.try_acquire()
+        response = self.middleware(self.factory.post('/api/orders'))
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '3'))
+        self.assertEqual(counters.snapshot(), {'shed:queue-full': 1})
+
+    def test_sheds_writes_while_the_database_is_slow(self):
+        self.middleware.load.observe(1000)
+        self.assertEqual(self.middleware(self.factory.post('/api/orders')).status_code, 503)
+        self.assertEqual(counters.snapshot(), {'shed:database-slow': 1})
+
+    def test_always_admits_reads_and_other_paths(self):
+        self.middleware.gate.try_acquire()
+        self.middleware.load.observe(1000)
+        self.assertEqual(self.middleware(self.factory.get('/api/orders')).status_code, 201)
+        self.assertEqual(self.middleware(self.factory.post('/admin/login/')).status_code, 201)
@@ -0,0 +1,59 @@
+import datetime
+import time
+
+from django.core.cache import cache
+
+from .. import usercache
+from ..models import Order, OrderItem
+from ..roles import CUSTOMER, MANAGER
+from .base import APITestCase
+
+
+class UserCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer, self.client = self.make_user('customer', CUSTOMER)
+        _, self.manager_client = self.make_user('manager', MANAGER)
+        self.item = self.make_menu(1)[0]
+
+    def add_to_cart(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/cart/menu-items', {'itemId': self.item.pk, 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_unchanged_cart_is_not_modified(self):
+        first = self.client.get('/api/cart/menu-items')
+        self.assertEqual(first.status_code, 200)
+        response = self.client.get('/api/cart/menu-items', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+        response = self.client.get('/api/cart/menu-items', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_a_write_changes_the_etag_and_the_body(self):
+        first = self.client.get('/api/cart/menu-items')
+        self.assertEqual(first.json(), [])
+        self.add_to_cart()
+        response = self.client.get('/api/cart/menu-items', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(len(response.json()), 1)
+
+    def test_versions_never_move_backwards(self):
+        future = time.time_ns() + 10 ** 12
+        cache.set(usercache.version_key(self.customer.pk), future, timeout=None)
+        self.assertEqual(usercache.next_version(self.customer.pk), future + 1)
+
+    def test_deleting_a_menu_item_refreshes_carts_and_orders(self):
+        self.add_to_cart()
+        order = Order.objects.create(user=self.customer, total='1.50', date=datetime.date.today())
+        OrderItem.objects.create(order=order, menuitem=self.item, quantity=1, unit_price='1.50', price='1.50')
+        cart = self.client.get('/api/cart/menu-items')
+        items = self.client.get(f'/api/orders/{order.pk}')
+        self.assertEqual((len(cart.json()), len(items.json())), (1, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.manager_client.delete(f'/api/menu-items/{self.item.pk}').status_code, 204)
+        response = self.client.get('/api/cart/menu-items', HTTP_IF_NONE_MATCH=cart['ETag'])
+        self.assertEqual((response.status_code, response.json()), (200, []))
+        response = self.client.get(f'/api/orders/{order.pk}', HTTP_IF_NONE_MATCH=items['ETag'])
+        self.assertEqual((response.status_code, response.json()), (200, []))
@@ -0,0 +1,100 @@
+"""
+Token-bucket throttling for write endpoints.
+
+A view opts in with `throttle_classes = [TokenBucketThrottle]` and a
+`throttle_scope` naming a rate in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+Every user (or, for anonymous requests, client address) has one bucket per
+scope. A rate of "10/min" means the bucket holds up to 10 requests and refills
+at 10 per minute, so short bursts pass while a client retrying in a loop is
+held to the average. Safe methods are never throttled.
+
+THROTTLE_BACKEND picks where buckets live: 'local' keeps them in the process;
+'cache' keeps them in the Django cache so that all workers share them. The
+cache backend reads and writes a bucket without a lock, so concurrent requests
+of one user may occasionally share a token.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import SimpleRateThrottle
+
+from .caching import TTLCache
+from .instrumentation import counters
+
+
+class LocalBuckets:
+    def __init__(self):
+        # An idle bucket refills completely; dropping it loses nothing.
+        self._buckets = TTLCache(
+            ttl=getattr(settings, 'THROTTLE_BUCKET_TTL', 3600),
+            max_entries=getattr(settings, 'THROTTLE_MAX_ENTRIES', 10000),
+        )
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        with self._lock:
+            state = self._buckets.get(key)
+            wait, state = spend(state, capacity, rate, time.monotonic())
+            self._buckets.set(key, state)
+        return wait
+
+
+class CacheBuckets:
+    def take(self, key, capacity, rate):
+        wait, state = spend(cache.get(key), capacity, rate, time.time())
+        # Expires once it would have refilled anyway.
+        cache.set(key, state, timeout=max(int(capacity / rate) + 1, 1))
+        return wait
+
+
+def spend(state, capacity, rate, now):
+    """Refill a (tokens, timestamp) bucket up to `now` and take one token. Returns (seconds to wait, new state)."""
+    tokens, stamp = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * rate)
+    if tokens >= 1:
+        return 0.0, (tokens - 1, now)
+    return (1 - tokens) / rate, (tokens, now)
+
+
+BACKENDS = {'local': LocalBuckets, 'cache': CacheBuckets}
+_buckets = None
+
+
+def get_buckets():
+    global _buckets
+    if _buckets is None:
+        _buckets = BACKENDS[getattr(settings, 'THROTTLE_BACKEND', 'local')]()
+    return _buckets
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    # DRF's rate parsing and client identification; the history-based
+    # accounting of SimpleRateThrottle is replaced by a token bucket.
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        # The rate depends on the view, so it is looked up in allow_request().
+        pass
+
+    def get_cache_key(self, request, view):
+        ident = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+        return f'littlelemon:throttle:{self.scope}:{ident}'
+
+    def allow_request(self, request, view):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return True
+        self.scope = getattr(view, self.scope_attr, None)
+        self.rate = self.THROTTLE_RATES.get(self.scope) if self.scope else None
+        if self.rate is None:
+            return True
+        capacity, duration = self.parse_rate(self.rate)
+        self.wait_seconds = get_buckets().take(self.get_cache_key(request, view), capacity, capacity / duration)
+        if self.wait_seconds:
+            counters.increment(f'throttled:{self.scope}')
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
@@ -1,15 +1,28 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
-    # path('category', views.CategoryView),
+    path('categories', views.CategoryView.as_view()),
     path('menu-items', views.MenuItemView.as_view()),
     path('menu-items/<int:pk>', views.SingleMenuItemView.as_view()),
     path('groups/manager/users', views.ManagerUserView.as_view()),
     path('groups/manager/users/<int:userId>', views.SingleManagerUserView.as_view()),
+    path('groups/manager/users/bulk', views.ManagerUsersBulkView.as_view()),
     path('groups/delivery-crew/users', views.DeliveryUserView.as_view()),
     path('groups/delivery-crew/users/<int:userId>', views.SingleDeliveryUserView.as_view()),
+    path('groups/delivery-crew/users/bulk', views.DeliveryUsersBulkView.as_view()),
     path('cart/menu-items', views.CartView.as_view()),
+    path('cart/menu-items/batch', views.CartBatchView.as_view()),
     path('orders', views.OrderView.as_view()),
     path('orders/<int:orderId>', views.SingleOrderView.as_view()),
+    path('orders/archive', views.ArchivedOrderView.as_view()),
+    path('orders/archive/<int:orderId>', views.ArchivedOrderItemsView.as_view()),
+    path('reports/sales', views.SalesReportView.as_view()),
+    path('stats/requests', views.RequestStatsView.as_view()),
+    path('stats/counters', views.CounterStatsView.as_view()),
+    path('async/menu-items', async_views.MenuItemListView.as_view()),
+    path('async/menu-items/<int:pk>', async_views.MenuItemDetailView.as_view()),
+    path('async/cart/menu-items', async_views.CartListView.as_view()),
+    path('async/orders', async_views.OrderListView.as_view()),
+    path('async/orders/stream', async_views.OrderStreamView.as_view()),
 ]
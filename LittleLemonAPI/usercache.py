@@ -0,0 +1,117 @@
+"""
+Per-user response cache for the endpoints clients poll (their cart, their
+orders).
+
+Each user has a change version in the Django cache: the time, in nanoseconds,
+of the last committed write to their cart or orders. Cached bodies are keyed by
+that version, and the ETag and Last-Modified headers are derived from it, so a
+poll that finds nothing changed is answered 304 without building or even
+looking up the body.
+
+The version is only as fresh as the cache it lives in: CACHES must be shared by
+every worker (LittleLemonAPI.checks enforces it), or a worker that never sees
+another's bump() keeps answering 304 after the data changed.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+from .caching import TTLCache
+from .catalog import etag_matches
+from .replicas import primary_reads
+
+# (name, user id, version, full path) -> body
+_entries = TTLCache(
+    ttl=getattr(settings, 'USER_CACHE_TTL', 300),
+    max_entries=getattr(settings, 'USER_CACHE_MAX_ENTRIES', 10000),
+)
+
+
+def version_key(user_id):
+    return f'littlelemon:user-version:{user_id}'
+
+
+def get_version(user_id):
+    version = cache.get(version_key(user_id))
+    if version is None:
+        cache.add(version_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(version_key(user_id))
+    return version
+
+
+async def aget_version(user_id):
+    version = await cache.aget(version_key(user_id))
+    if version is None:
+        await cache.aadd(version_key(user_id), time.time_ns(), timeout=None)
+        version = await cache.aget(version_key(user_id))
+    return version
+
+
+def bump(user_id):
+    """Mark the user's cart/order responses stale once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set(version_key(user_id), next_version(user_id), timeout=None))
+
+
+def next_version(user_id):
+    # Past the current version even when this host's clock is behind the one
+    # that set it, so Last-Modified never moves backwards.
+    current = cache.get(version_key(user_id)) or 0
+    return max(time.time_ns(), current + 1)
+
+
+def make_etag(user_id, version, path):
+    return '"%s"' % hashlib.blake2b(f'{user_id}:{version}:{path}'.encode(), digest_size=16).hexdigest()
+
+
+def not_modified(request, etag, last_modified):
+    # The ETag changes with every write; Last-Modified only has one-second
+    # resolution, so it is consulted only when the client sent no ETag.
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        return etag_matches(request, etag)
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and last_modified <= since
+
+
+def finish(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Authorization'
+    return response
+
+
+def cached_response(request, user_id, name, build):
+    """Serve `build()` (JSON bytes) for `user_id`'s data from the cache, or 304 if the client is current."""
+    version = get_version(user_id)
+    path = request.get_full_path()
+    etag, last_modified = make_etag(user_id, version, path), version // 1_000_000_000
+    if not_modified(request, etag, last_modified):
+        return finish(HttpResponseNotModified(), etag, last_modified)
+    key = (name, user_id, version, path)
+    body = _entries.get(key)
+    if body is None:
+        with primary_reads():
+            body = build()
+        _entries.set(key, body)
+    return finish(HttpResponse(body, content_type='application/json'), etag, last_modified)
+
+
+async def acached_response(request, user_id, name, build):
+    """Like cached_response(), with `build` a coroutine function."""
+    version = await aget_version(user_id)
+    path = request.get_full_path()
+    etag, last_modified = make_etag(user_id, version, path), version // 1_000_000_000
+    if not_modified(request, etag, last_modified):
+        return finish(HttpResponseNotModified(), etag, last_modified)
+    key = (name, user_id, version, path)
+    body = _entries.get(key)
+    if body is None:
+        with primary_reads():
+            body = await build()
+        _entries.set(key, body)
+    return finish(HttpResponse(body, content_type='application/json'), etag, last_modified)
@@ -1,26 +1,49 @@
+from datetime import timedelta
 from decimal import Decimal
+from django.db import transaction
+from django.db.models import Prefetch, Q, Sum
 from django.shortcuts import get_object_or_404
-from rest_framework import generics, status, pagination
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth.models import User, Group, GroupManager
-from .serializers import UserSerializer, CategorySerializer, MenuItemSerializer, CartSerializer, OrderSerializer, OrderItemSerializer
-from .models import Category, MenuItem, Cart, Order, OrderItem
+from .serializers import UserSerializer, CategorySerializer, MenuItemSerializer, CartSerializer, OrderSerializer, OrderItemSerializer, OrderWithItemsSerializer, ArchivedOrderSerializer, ArchivedOrderItemSerializer, values_for
+from .models import Category, MenuItem, Cart, Order, OrderItem, ArchivedOrder, ArchivedOrderItem, DailySales
+from . import catalog, instrumentation, jobs, renderers, usercache
+from .filters import FieldFilterBackend, FullTextSearchFilter, StableOrderingFilter
+from .pagination import CustomPagination, OrderCursorPagination
 from .permissions import IsManagerUser
+from .throttling import TokenBucketThrottle
+from .roles import MANAGER, DELIVERY_CREW, CUSTOMER, add_members, get_group, has_role, remove_members
 
-class CustomPagination(pagination.PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+# Builds list data from .values() rows shaped like the serializer output (see
+# serializers.values_for) rather than model instances. Serializers are still
+# used for writes and validation.
+class ValuesListMixin:
+    def list_data(self):
+        queryset = values_for(self.get_serializer_class(), self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(page).data
+        return list(queryset)
 
-class CategoryView(generics.ListCreateAPIView):
+# Serves list GETs from the in-memory catalog cache (see catalog.py). The body is
+# rebuilt only when a MenuItem/Category write bumps the catalog version.
+class CatalogListMixin(ValuesListMixin):
+    catalog_name = None
+
+    def get(self, request):
+        return catalog.cached_response(request, self.catalog_name, lambda: renderers.dumps(self.list_data()))
+
+class CategoryView(CatalogListMixin, generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
-    def get(self, request):
-        queryset = self.get_queryset()
-        serializer = CategorySerializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    catalog_name = 'categories'
+    query_budget = 4
     def post(self, request):
-        if request.user.groups.filter(name='Manager').exists():
+        if has_role(request, MANAGER):
             serializer = CategorySerializer(data=request.data)
             if serializer.is_valid():
                 serializer.save()
@@ -29,24 +52,26 @@ class CategoryView(generics.ListCreateAPIView):
         else:
             return Response(status=status.HTTP_403_FORBIDDEN)
     
-class MenuItemView(generics.ListCreateAPIView):
+class MenuItemView(CatalogListMixin, generics.ListCreateAPIView):
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
     
-    # Add filters for sorting and search
+    # Add filters for sorting and search. ?search= uses the full-text index
+    # (see search.py); search_fields is only used where there is none.
+    filter_backends = [FieldFilterBackend, FullTextSearchFilter, StableOrderingFilter]
     filter_fields = ('title', 'price', 'featured', 'category')
-    search_fields = ('title', 'price', 'featured', 'category')
+    search_fields = ('title', 'category__title')
     ordering_fields = ('title', 'price', 'featured', 'category')
+    ordering = ('id',)
     
     # Add pagination
     pagination_class = CustomPagination
+    catalog_name = 'menu-items'
+    # Writes also reindex the item for search (see signals.py).
+    query_budget = {'GET': 5, 'POST': 7}
     
-    def get(self, request):
-        queryset = self.get_queryset()
-        serializer = MenuItemSerializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
     def post(self, request):
-        if request.user.groups.filter(name='Manager').exists():
+        if has_role(request, MANAGER):
             serializer = MenuItemSerializer(data=request.data)
             if serializer.is_valid():
                 serializer.save()
@@ -59,23 +84,18 @@ class SingleMenuItemView(generics.RetrieveUpdateDestroyAPIView):
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
     
-    # Add filters for sorting and search
+    # Filters narrow the lookup, e.g. /menu-items/3?featured=true is a 404 for
+    # an item that isn't featured. Search, ordering and paging don't apply to a
+    # single object.
+    filter_backends = [FieldFilterBackend]
     filter_fields = ('title', 'price', 'featured', 'category')
-    search_fields = ('title', 'price', 'featured', 'category')
-    ordering_fields = ('title', 'price', 'featured', 'category')
+    query_budget = {'GET': 4, 'PUT': 7, 'PATCH': 7, 'DELETE': 10}
     
-    # Add pagination
-    pagination_class = CustomPagination
-    
-    def get(self):
-        queryset = self.get_queryset()
-        serializer = MenuItemSerializer(queryset)
-        return Response(serializer.data)
     def post(self, request, pk):
         return Response(status=status.HTTP_403_FORBIDDEN)
     
     def put(self, request, pk):
-        if request.user.groups.filter(name='Manager').exists():
+        if has_role(request, MANAGER):
             try:
                 menu_item = MenuItem.objects.get(pk=pk)
             except MenuItem.DoesNotExist:
@@ -86,10 +106,22 @@ class SingleMenuItemView(generics.RetrieveUpdateDestroyAPIView):
                 serializer.save()
                 return Response(serializer.data, status=status.HTTP_200_OK)
             return Response(serializer.errors, status=status.HTTP_403_FORBIDDEN)
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    def patch(self, request, pk):
+        if has_role(request, MANAGER):
+            return self.partial_update(request, pk=pk)
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    def delete(self, request, pk):
+        if has_role(request, MANAGER):
+            return self.destroy(request, pk=pk)
+        return Response(status=status.HTTP_403_FORBIDDEN)
 
 class ManagerUserView(generics.ListCreateAPIView):
-    queryset = User.objects.filter(groups__name='Manager')
+    queryset = User.objects.filter(groups__name='Manager').prefetch_related('groups')
     serializer_class = UserSerializer
+    query_budget = {'GET': 6, 'POST': 8}
     
     def get(self, request):
         queryset = self.get_queryset()
@@ -115,7 +147,7 @@ class ManagerUserView(generics.ListCreateAPIView):
     
     def post(self, request):
         user = get_object_or_404(User, username=request.data.get('username'))
-        group = Group.objects.get(name='Manager')
+        group = get_group(MANAGER)
         user.groups.add(group)
         serializer = UserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -123,9 +155,10 @@ class ManagerUserView(generics.ListCreateAPIView):
 #Removes this particular user from the manager group and returns 200 – Success if everything is okay.If the user is not found, returns 404 – Not found
 class SingleManagerUserView(generics.DestroyAPIView):
     permission_classes = [IsManagerUser]
+    query_budget = 6
     def delete(self, request, userId):
         try:
-            group = Group.objects.get(name='Manager')
+            group = get_group(MANAGER)
             user = User.objects.get(pk=userId)
             user.groups.remove(group)
             return Response(status=status.HTTP_200_OK)
@@ -134,7 +167,8 @@ class SingleManagerUserView(generics.DestroyAPIView):
 
 class DeliveryUserView(generics.ListCreateAPIView):
     permission_classes = [IsManagerUser]
-    queryset = User.objects.filter(groups__name='Delivery Crew')
+    queryset = User.objects.filter(groups__name='Delivery Crew').prefetch_related('groups')
+    query_budget = {'GET': 6, 'POST': 7}
     def get(self, request):
         queryset = self.get_queryset()
         serializer = UserSerializer(queryset, many=True)
@@ -142,7 +176,7 @@ class DeliveryUserView(generics.ListCreateAPIView):
     def post(self, request):
         try:
             user = User.objects.get(pk=request.data.get('userId'))
-            group = Group.objects.get(name='Delivery Crew')
+            group = get_group(DELIVERY_CREW)
             user.groups.add(group)
             return Response(status=status.HTTP_201_CREATED)
         except:
@@ -151,127 +185,396 @@ class DeliveryUserView(generics.ListCreateAPIView):
 #Assigns the user in the payload to delivery crew group and returns 201-Created HTTP
 class SingleDeliveryUserView(generics.DestroyAPIView):
     queryset = User.objects.filter(groups__name='Delivery Crew')
-    def delete(self, request, pk):
-        user = get_object_or_404(User, pk=pk)
-        group = Group.objects.get(name='Delivery Crew')
+    query_budget = 6
+    def delete(self, request, userId):
+        user = get_object_or_404(User, pk=userId)
+        group = get_group(DELIVERY_CREW)
         user.groups.remove(group)
         return Response(status=status.HTTP_200_OK)
 
+# Adds (POST) or removes (DELETE) many users at once. The payload is
+# {"users": [...]} with user ids (numbers) and/or usernames (strings); the
+# response reports, for each entry in order, the user's id and one of added,
+# already_member, removed, not_member or not_found.
+class GroupMembersBulkView(generics.GenericAPIView):
+    permission_classes = [IsManagerUser]
+    group_name = None
+    max_users = 1000
+    query_budget = 7
+    def parse_users(self, request):
+        entries = request.data.get('users') if isinstance(request.data, dict) else request.data
+        if not isinstance(entries, list) or not entries:
+            raise ValueError("users must be a non-empty list")
+        if len(entries) > self.max_users:
+            raise ValueError(f"At most {self.max_users} users per request")
+        for entry in entries:
+            if isinstance(entry, bool) or not isinstance(entry, (int, str)) or not str(entry).strip():
+                raise ValueError("users must contain user ids or usernames")
+        return entries
+    def resolve(self, entries):
+        ids = {entry for entry in entries if isinstance(entry, int)}
+        names = {entry.strip() for entry in entries if isinstance(entry, str)}
+        found = User.objects.filter(Q(pk__in=ids) | Q(username__in=names)).values_list('pk', 'username')
+        by_id, by_name = {}, {}
+        for pk, username in found:
+            by_id[pk] = pk
+            by_name[username] = pk
+        return [by_id.get(entry) if isinstance(entry, int) else by_name.get(entry.strip()) for entry in entries]
+    def change(self, request, apply, changed, unchanged):
+        try:
+            entries = self.parse_users(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            group = get_group(self.group_name)
+        except Group.DoesNotExist:
+            return Response({"error": f"Group '{self.group_name}' does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            user_ids = self.resolve(entries)
+            done = apply(group, [pk for pk in user_ids if pk is not None])
+        results = []
+        for entry, pk in zip(entries, user_ids):
+            if pk is None:
+                result = 'not_found'
+            elif pk in done:
+                result = changed
+                done.discard(pk)  # a user listed twice is only changed once
+            else:
+                result = unchanged
+            results.append({"user": entry, "id": pk, "result": result})
+        return Response({"results": results}, status=status.HTTP_200_OK)
+    def post(self, request):
+        return self.change(request, add_members, 'added', 'already_member')
+    def delete(self, request):
+        return self.change(request, remove_members, 'removed', 'not_member')
+
+class ManagerUsersBulkView(GroupMembersBulkView):
+    group_name = MANAGER
+
+class DeliveryUsersBulkView(GroupMembersBulkView):
+    group_name = DELIVERY_CREW
+
+def parse_cart_line(data):
+    """Validate one {"itemId", "quantity"} cart line, returning (item_id, quantity) or raising ValueError."""
+    if data.get('itemId') is None:
+        raise ValueError("itemId must be provided")
+    if data.get('quantity') is None:
+        raise ValueError("Quantity must be provided")
+    try:
+        item_id = int(data['itemId'])
+    except (TypeError, ValueError):
+        raise ValueError("itemId must be an integer")
+    try:
+        quantity = int(data['quantity'])
+    except (TypeError, ValueError):
+        raise ValueError("Quantity must be an integer")
+    if quantity < 1:
+        raise ValueError("Quantity must be at least 1")
+    return item_id, quantity
+
+# Adding an item that is already in the cart increases its quantity; both
+# cases are a single INSERT ... ON CONFLICT DO UPDATE (see CartManager).
+# Reads are served from the per-user cache (see usercache.py), so every cart
+# write bumps the user's version.
 class CartView(generics.ListCreateAPIView):
     queryset = Cart.objects.all()
     serializer_class = CartSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'cart'
+    query_budget = 4
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user).order_by('id')
     def get(self, request):
-        queryset = self.get_queryset()
-        serializer = CartSerializer(queryset, many=True)
-        if request.user.groups.filter(name='Customer').exists():
-            return Response(serializer.data)
-        else:
-            return Response(serializer.data, status=status.HTTP_200_OK)
+        return usercache.cached_response(
+            request, request.user.pk, 'cart', lambda: renderers.dumps(list(values_for(CartSerializer, self.get_queryset()))),
+        )
     def post(self, request):
-        menu_item = get_object_or_404(MenuItem, pk=request.data.get('itemId'))
-        user = request.user
-        quantity = request.data.get('quantity')
-        if quantity is not None:
-            try:
-                quantity = int(quantity)
-            except ValueError:
-                return Response({"error": "Quantity must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({"error": "Quantity must be provided"}, status=status.HTTP_400_BAD_REQUEST)
-        unit_price = menu_item.price
         try:
-            price = unit_price * quantity
-        except TypeError as e:
-            return Response({"error": f"Invalid quantity: {e}"}, status=status.HTTP_400_BAD_REQUEST)
-        cart_item = Cart(user=user, menuitem=menu_item, quantity=quantity, unit_price=unit_price, price=price)
-        cart_item.save()
+            item_id, quantity = parse_cart_line(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not Cart.objects.add_items(request.user, {item_id: quantity}):
+            return Response({"error": "Menu item not found"}, status=status.HTTP_404_NOT_FOUND)
+        usercache.bump(request.user.pk)
         return Response(status=status.HTTP_201_CREATED)
     
-    def delete(self, request, pk):
-        cart_item = get_object_or_404(Cart, pk=pk)
-        cart_item.delete()
+    # Empties the current user's cart.
+    def delete(self, request):
+        self.get_queryset().delete()
+        usercache.bump(request.user.pk)
         return Response(status=status.HTTP_200_OK)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             
+# Adds several items to the cart in one statement:
+# {"items": [{"itemId": 1, "quantity": 2}, ...]}. Repeated itemIds are summed.
+class CartBatchView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'cart'
+    max_items = 100
+    query_budget = 4
+    def post(self, request):
+        lines = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(lines, list) or not lines:
+            return Response({"error": "items must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(lines) > self.max_items:
+            return Response({"error": f"At most {self.max_items} items per request"}, status=status.HTTP_400_BAD_REQUEST)
+        quantities = {}
+        errors = {}
+        for index, line in enumerate(lines):
+            try:
+                item_id, quantity = parse_cart_line(line if isinstance(line, dict) else {})
+            except ValueError as e:
+                errors[index] = str(e)
+                continue
+            quantities[item_id] = quantities.get(item_id, 0) + quantity
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        written = Cart.objects.add_items(request.user, quantities)
+        if written:
+            usercache.bump(request.user.pk)
+        missing = []
+        if written < len(quantities):
+            found = set(MenuItem.objects.filter(pk__in=quantities).values_list('id', flat=True))
+            missing = sorted(set(quantities) - found)
+        return Response({"added": written, "missing": missing}, status=status.HTTP_201_CREATED if written else status.HTTP_404_NOT_FOUND)
+
+# Managers see every order, delivery crew the orders assigned to them and
+# customers their own. Works for live and archived orders alike.
+def visible_orders(request, queryset):
+    if has_role(request, MANAGER):
+        return queryset
+    if has_role(request, DELIVERY_CREW):
+        return queryset.filter(delivery_crew=request.user)
+    return queryset.filter(user=request.user)
+
+# Page numbers by default. Passing `cursor` switches to keyset paging (newest
+# first), which stays cheap however deep the client pages.
+class OrderPaginationMixin:
+    pagination_class = CustomPagination
+    cursor_pagination_class = OrderCursorPagination
+    
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.cursor_pagination_class.cursor_query_param in self.request.query_params:
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
 # Create order view class with get and post methods, 
 # get() Returns all orders with order items created by this user, 
 # post() Creates a new order item for the current user. 
 # Gets current cart items from the cart endpoints and adds those items to the order items table. 
 # Then deletes all items from the cart for this user.
-class OrderView(generics.ListCreateAPIView):
+class OrderView(OrderPaginationMixin, ValuesListMixin, generics.ListCreateAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'checkout'
+    query_budget = {'GET': 5, 'POST': 9}
     
-    # Add filters for sorting and search
-    filter_fields = ('user', 'delivery_crew', 'status', 'total', 'date')
-    search_fields = ('user', 'delivery_crew', 'status', 'total', 'date')
-    ordering_fields = ('user', 'delivery_crew', 'status', 'total', 'date')
+    # Add filters for sorting and search. Only indexed columns and foreign
+    # keys are exposed so every filter or sort can use an index.
+    filter_backends = [FieldFilterBackend, StableOrderingFilter]
+    filter_fields = ('user', 'delivery_crew', 'status', 'date')
+    ordering_fields = ('user', 'delivery_crew', 'status', 'date')
+    ordering = ('-date',)
     
-    # Add pagination
-    pagination_class = CustomPagination
+    # ?expand=items nests each order's items, loaded with one prefetch query
+    # for the whole page.
+    def expand_items(self):
+        return self.request.method == 'GET' and self.request.query_params.get('expand') == 'items'
     
-    def get(self, request):
-        if request.user.groups.filter(name='Customer').exists():
-            order = Order.objects.filter(user=request.user)
-            serializer = OrderSerializer(order, many=True)
-            return Response(serializer.data)
-        elif request.user.groups.filter(name='Delivery crew').exists():
-            order = Order.objects.filter(delivery_crew=request.user)
-            serializer = OrderSerializer(order, many=True)
-            return Response(serializer.data)
-        elif request.user.groups.filter(name='Manager').exists():
-            order = Order.objects.all()
-            serializer = OrderSerializer(order, many=True)
-            return Response(serializer.data)
+    def get_serializer_class(self):
+        if self.expand_items():
+            return OrderWithItemsSerializer
+        return super().get_serializer_class()
+    
+    def list(self, request, *args, **kwargs):
+        # Nested items need the prefetch and the full serializer.
+        if self.expand_items():
+            return super().list(request, *args, **kwargs)
+        return Response(self.list_data())
+    
+    # Live orders only; delivered orders past ARCHIVE_AFTER_DAYS are served
+    # by ArchivedOrderView.
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.expand_items():
+            queryset = queryset.prefetch_related(Prefetch('orderitem_set', queryset=OrderItem.objects.order_by('id')))
+        return visible_orders(self.request, queryset)
+
     def post(self, request):
-        if request.user.groups.filter(name='Customer').exists():
-            user = request.user
+        if not has_role(request, CUSTOMER):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        user = request.user
+        delivery_crew = None
+        if request.data.get('delivery_crew'):
             delivery_crew = get_object_or_404(User, pk=request.data.get('delivery_crew'))
-            status = request.data.get('status')
-            total = request.data.get('total')
-            date = request.data.get('date')
-            order = Order(user=user, delivery_crew=delivery_crew, status=status, total=total, date=date)
-            order.save()
-            cart_items = Cart.objects.filter(user=user)
-            for cart_item in cart_items:
-                order_item = OrderItem(order=order, menuitem=cart_item.menuitem, quantity=cart_item.quantity, unit_price=cart_item.unit_price, price=cart_item.price)
-                order_item.save()
-            cart_items.delete()
-            return Response("Create OK.")
+        with transaction.atomic():
+            # Lock the cart so a concurrent add can't slip in between reading
+            # the rows and deleting them.
+            cart_items = list(
+                Cart.objects.select_for_update()
+                .filter(user=user)
+                .values('id', 'menuitem_id', 'quantity', 'unit_price', 'price')
+            )
+            if not cart_items:
+                return Response({"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
+            # The total is derived from the item prices, never taken from the client.
+            total = sum((item['price'] for item in cart_items), Decimal('0'))
+            order = Order.objects.create(user=user, delivery_crew=delivery_crew, total=total, date=timezone.localdate())
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, menuitem_id=item['menuitem_id'], quantity=item['quantity'], unit_price=item['unit_price'], price=item['price'])
+                for item in cart_items
+            ])
+            Cart.objects.filter(pk__in=[item['id'] for item in cart_items]).delete()
+            DailySales.objects.record(order.date, [(item['menuitem_id'], item['quantity'], item['price']) for item in cart_items])
+            # Crew assignment runs in a worker (manage.py runjobs), after commit.
+            if delivery_crew is None:
+                jobs.enqueue('assign_delivery_crew', order_id=order.pk)
+        serializer = OrderSerializer(order)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
     
 #Returns all items for this order id. If the order ID doesn’t belong to the current user, it displays an appropriate HTTP error status code.
 class SingleOrderView(generics.ListAPIView):
     queryset = OrderItem.objects.all()
     serializer_class = OrderItemSerializer
-    def get(self, request, pk):
-        if request.user.groups.filter(name='Customer').exists():
-            order_id = get_object_or_404(Order, pk=pk)
-            if order_id.user == request.user:
-                queryset = self.get_queryset()
-                serializer = OrderItemSerializer(queryset, many=True)
-                return Response(serializer.data)
-            else:
-                return Response(status=status.HTTP_403_FORBIDDEN)
+    permission_classes = [IsAuthenticated]
+    query_budget = {'GET': 4, 'PUT': 8, 'PATCH': 5, 'DELETE': 8}
+    # Visible to the customer who placed the order, its delivery crew and
+    # managers. Cached under the customer's version, which every order write
+    # bumps (see signals.py), whoever is asking.
+    def get(self, request, orderId):
+        order = get_object_or_404(Order, pk=orderId)
+        if request.user.pk not in (order.user_id, order.delivery_crew_id) and not has_role(request, MANAGER):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        queryset = self.get_queryset().filter(order=order).order_by('id')
+        return usercache.cached_response(
+            request, order.user_id, 'order-items', lambda: renderers.dumps(list(values_for(OrderItemSerializer, queryset))),
+        )
         
-    def put(self, request, pk):
-        if request.user.groups.filter(name='Manager').exist():
-            order = get_object_or_404(Order, pk=pk)
-            delivery_crew = request.data.get('delivery_crew')
-            status = request.data.get('status')
-            order.delivery_crew = delivery_crew
-            order.status = status
-            order.save()
+    # Clearing delivery_crew hands the order back to automatic assignment.
+    def put(self, request, orderId):
+        if has_role(request, MANAGER):
+            order = get_object_or_404(Order, pk=orderId)
+            serializer = OrderSerializer(order, data={
+                'delivery_crew': request.data.get('delivery_crew'),
+                'status': request.data.get('status', order.status),
+            }, partial=True)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                order = serializer.save()
+                if order.delivery_crew_id is None:
+                    jobs.enqueue('assign_delivery_crew', order_id=order.pk)
             return Response(status=status.HTTP_200_OK)
+        return Response(status=status.HTTP_403_FORBIDDEN)
     
-    def patch(self, request, pk):
-        if request.user.groups.filter(is_delivery_crew=True).exist():
-            order = get_object_or_404(Order, pk=pk)
-            status = request.data.get('status')
-            order.status = status
-            order.save()
+    # Delivery crew mark their own orders delivered; the change is pushed to
+    # the order streams (async_views.OrderStreamView).
+    def patch(self, request, orderId):
+        if has_role(request, DELIVERY_CREW):
+            order = get_object_or_404(Order, pk=orderId, delivery_crew=request.user)
+            serializer = OrderSerializer(order, data={'status': request.data.get('status')}, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
             return Response(status=status.HTTP_200_OK)
+        return Response(status=status.HTTP_403_FORBIDDEN)
     
-    def delete(self, request, pk):
-        if request.user.groups.filter(name='Manager').exist():
-            order = get_object_or_404(Order, pk=pk)
-            order.delete()
+    # Deleting an order takes its items back out of the daily sales rollup.
+    def delete(self, request, orderId):
+        if has_role(request, MANAGER):
+            with transaction.atomic():
+                order = get_object_or_404(Order.objects.select_for_update(), pk=orderId)
+                lines = list(OrderItem.objects.filter(order=order).values_list('menuitem_id', 'quantity', 'price'))
+                order.delete()
+                DailySales.objects.record(order.date, lines, sign=-1)
             return Response(status=status.HTTP_200_OK)
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+# Order history moved out of the live tables by `manage.py archive_orders`
+# (see archive.py), with the same visibility, filters and paging as OrderView.
+# Archived orders are delivered and read-only.
+class ArchivedOrderView(OrderPaginationMixin, ValuesListMixin, generics.ListAPIView):
+    queryset = ArchivedOrder.objects.all()
+    serializer_class = ArchivedOrderSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 5
+    filter_backends = [FieldFilterBackend, StableOrderingFilter]
+    filter_fields = ('user', 'delivery_crew', 'date')
+    ordering_fields = ('user', 'delivery_crew', 'date')
+    ordering = ('-date',)
+    def get_queryset(self):
+        return visible_orders(self.request, super().get_queryset())
+    def list(self, request, *args, **kwargs):
+        return Response(self.list_data())
+
+# The items of an archived order, for the same people as SingleOrderView.
+class ArchivedOrderItemsView(generics.ListAPIView):
+    queryset = ArchivedOrderItem.objects.all()
+    serializer_class = ArchivedOrderItemSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 4
+    def get(self, request, orderId):
+        order = get_object_or_404(ArchivedOrder, pk=orderId)
+        if request.user.pk not in (order.user_id, order.delivery_crew_id) and not has_role(request, MANAGER):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        queryset = self.get_queryset().filter(order=order).order_by('id')
+        return usercache.cached_response(
+            request, order.user_id, 'archived-order-items', lambda: renderers.dumps(list(values_for(ArchivedOrderItemSerializer, queryset))),
+        )
+
+CENTS = Decimal('0.01')
+
+# Sales per day (or per menu item with ?by=menuitem) between ?start= and ?end=,
+# read from the DailySales rollup so the cost grows with days, not orders.
+class SalesReportView(generics.GenericAPIView):
+    permission_classes = [IsManagerUser]
+    default_days = 30
+    query_budget = 3
+    def get(self, request):
+        end = request.query_params.get('end')
+        start = request.query_params.get('start')
+        try:
+            end = parse_date(end) if end else timezone.localdate()
+            # parse_date() returns None for text that isn't a date at all, so
+            # the default start can only be computed from a parsed end.
+            if end is not None:
+                start = parse_date(start) if start else end - timedelta(days=self.default_days - 1)
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({"error": "start and end must be YYYY-MM-DD dates"}, status=status.HTTP_400_BAD_REQUEST)
+        by = request.query_params.get('by', 'date')
+        if by not in ('date', 'menuitem'):
+            return Response({"error": "by must be 'date' or 'menuitem'"}, status=status.HTTP_400_BAD_REQUEST)
+        rows = (
+            DailySales.objects.filter(date__range=(start, end))
+            .values(by).annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+            .filter(quantity__gt=0).order_by(by)
+        )
+        results = list(rows)
+        # SQLite's SUM() loses the column's scale; report cents everywhere.
+        for row in results:
+            row['revenue'] = row['revenue'].quantize(CENTS)
+        return Response({
+            'start': start,
+            'end': end,
+            'results': results,
+            'totals': {
+                'quantity': sum(row['quantity'] for row in results),
+                'revenue': sum((row['revenue'] for row in results), Decimal('0.00')),
+            },
+        })
+
+class RequestStatsView(generics.GenericAPIView):
+    permission_classes = [IsManagerUser]
+    def get(self, request):
+        return Response(instrumentation.stats.snapshot())
+
+# Requests turned away since the worker started: throttled:<scope> (429) and
+# shed:<reason> (503). Counts are per process.
+class CounterStatsView(generics.GenericAPIView):
+    permission_classes = [IsManagerUser]
+    def get(self, request):
+        return Response(instrumentation.counters.snapshot())
@@ -0,0 +1,78 @@
+"""
+Work a new worker process would otherwise do while serving its first
+requests: compiling every URL pattern, importing the views, renderers and
+parsers, and computing the model metadata and serializer fields the endpoints
+use. wsgi.py and asgi.py call warm_up() once the application is loaded.
+
+Nothing here opens a database connection, so it is safe in a server that
+loads the application before forking its workers.
+"""
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.urls import Resolver404, URLResolver, get_resolver, resolve
+from rest_framework import serializers as drf_serializers
+from rest_framework.settings import api_settings
+
+from . import serializers
+
+_converter = re.compile(r'<(?:(\w+):)?\w+>')
+_samples = {'int': '1', 'path': 'x', 'slug': 'x', 'str': 'x', 'uuid': '00000000-0000-0000-0000-000000000000'}
+
+
+def sample_paths(patterns, prefix='/'):
+    """A concrete path for every route written with path() (regex routes are skipped)."""
+    for pattern in patterns:
+        route = getattr(pattern.pattern, '_route', None)
+        if route is None:
+            continue
+        route = _converter.sub(lambda match: _samples.get(match.group(1) or 'str', 'x'), route)
+        if isinstance(pattern, URLResolver):
+            yield from sample_paths(pattern.url_patterns, prefix + route)
+        else:
+            yield prefix + route
+
+
+def warm_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict  # compiles every pattern, included URLconfs too
+    count = 0
+    for path in sample_paths(resolver.url_patterns):
+        try:
+            resolve(path)
+        except Resolver404:
+            continue
+        count += 1
+    return count
+
+
+def warm_models():
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+
+def warm_serializers():
+    count = 0
+    for value in vars(serializers).values():
+        if isinstance(value, type) and issubclass(value, drf_serializers.ModelSerializer) and value.__module__ == serializers.__name__:
+            value().fields
+            count += 1
+    return count
+
+
+def warm_renderers():
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        renderer_class()
+    for parser_class in api_settings.DEFAULT_PARSER_CLASSES:
+        parser_class()
+
+
+def warm_up():
+    """Run every warm-up step unless WARM_UP_ON_START is off."""
+    if not getattr(settings, 'WARM_UP_ON_START', True):
+        return
+    warm_models()
+    warm_urls()
+    warm_serializers()
+    warm_renderers()